@@ -1,10 +1,21 @@
 import os
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from config import config
-from database import init_db
-from routes import auth_bp, matches_bp, predictions_bp
+from database import LAST_WRITE_HEADER, init_db
+from routes import auth_bp, matches_bp, predictions_bp, jobs_bp
+from commands import register_commands
+from utils.pagination import NEXT_CURSOR_HEADER
+from utils.http_cache import init_response_cache
+from utils.auth_utils import init_user_cache, token_or_admin_required
+from utils.compression import init_compression
+from services.auth_service import HashingBusyError, init_password_hasher
+from services.calendar_service import init_calendar_cache
+from services.live_service import init_live_broker
+from utils.log import REQUEST_ID_HEADER, init_logging
+from utils.metrics import init_metrics, render_metrics
+from utils.serializers import init_serializers
 
 def create_app(config_name='default'):
     """Создание экземпляра приложения Flask"""
@@ -13,8 +24,12 @@ def create_app(config_name='default'):
     # Загрузка конфигурации
     app.config.from_object(config[config_name])
     
-    # Инициализация CORS
-    CORS(app)
+    # Логирование до остальных расширений: их записи идут через общую очередь
+    init_logging(app)
+    
+    # Инициализация CORS (курсор пагинации, идентификатор запроса и отметка записи для
+    # read-your-writes должны быть доступны фронтенду)
+    CORS(app, expose_headers=[NEXT_CURSOR_HEADER, REQUEST_ID_HEADER, LAST_WRITE_HEADER])
     
     # Инициализация JWT
     jwt = JWTManager(app)
@@ -22,16 +37,47 @@ def create_app(config_name='default'):
     # Инициализация базы данных
     init_db(app)
     
+    # Провайдер JSON-фрагментов и кэш закодированных матчей
+    init_serializers(app)
+    
+    # Кэш ответов для чтения матчей, календаря по месяцам и кэш данных пользователей
+    init_response_cache(app)
+    init_calendar_cache(app)
+    init_user_cache(app)
+    
+    # Пул процессов для хеширования паролей
+    init_password_hasher(app)
+    
+    # Брокер потока live-обновлений матчей
+    init_live_broker(app)
+    
+    # Метрики длительности запросов и числа SQL-запросов
+    init_metrics(app)
+    
+    # Сжатие ответов (после метрик: время сжатия входит в длительность запроса)
+    init_compression(app)
+    
     # Регистрация Blueprint'ов
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(matches_bp, url_prefix='/api/matches')
     app.register_blueprint(predictions_bp, url_prefix='/api/predictions')
+    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+    
+    # Регистрация CLI-команд
+    register_commands(app)
     
     # Обработчик ошибок 404
     @app.errorhandler(404)
     def not_found(error):
         return jsonify({'message': 'Ресурс не найден'}), 404
     
+    # Пул хеширования паролей перегружен — клиенту стоит повторить запрос позже
+    @app.errorhandler(HashingBusyError)
+    def hashing_busy(error):
+        response = jsonify({'message': 'Сервер перегружен, повторите попытку позже'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
     # Обработчик ошибок 500
     @app.errorhandler(500)
     def internal_error(error):
@@ -42,14 +88,22 @@ def create_app(config_name='default'):
     def health_check():
         return jsonify({'status': 'healthy', 'message': 'API работает!'}), 200
     
+    # Метрики процесса в текстовом формате Prometheus (по METRICS_TOKEN или администратору)
+    @app.route('/api/metrics')
+    @token_or_admin_required('METRICS_TOKEN')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+    
     return app
 
 if __name__ == '__main__':
     # Определение окружения (разработка/продакшн)
     env = os.environ.get('FLASK_ENV', 'development')
     
-    # Создание приложения
-    app = create_app(env)
-    
-    # Запуск приложения
-    app.run(host='0.0.0.0', port=5000, debug=env=='development')
\ No newline at end of file
+    # Запуск приложения: в продакшене — предфоркнутые воркеры gunicorn, иначе сервер разработки
+    if env == 'production':
+        from server import run_server
+        run_server(env)
+    else:
+        app = create_app(env)
+        app.run(host='0.0.0.0', port=5000, debug=env=='development')
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Бенчмарк холодного старта воркера: create_app('production').
+
+Каждый запуск — отдельный процесс, как у предфоркнутого воркера. Сравниваются
+старт без обращения к БД (DATABASE_AUTO_BOOTSTRAP выключен, режим продакшена)
+и прежнее поведение: create_all + проверка пользователей на готовой базе и
+на пустой базе с созданием тестовых данных.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_cold_start --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app('production')
+finished = time.perf_counter()
+print(json.dumps({'import': imported - started, 'create_app': finished - imported}))
+"""
+
+
+def run_child(database_url, bootstrap):
+    """Один холодный старт в новом процессе; возвращает тайминги в секундах"""
+    env = dict(os.environ, DATABASE_URL=database_url, DATABASE_AUTO_BOOTSTRAP='1' if bootstrap else '0')
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=BACKEND_DIR, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def prepare_database(path):
+    """Готовая база: схема и тестовые данные, как после flask init-db && flask seed"""
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}', FLASK_APP="app:create_app('production')")
+    for command in ('init-db', 'seed'):
+        subprocess.run([sys.executable, '-m', 'flask', command], cwd=BACKEND_DIR, env=env,
+                       check=True, capture_output=True)
+
+
+def measure(label, runs, database_url_fn, bootstrap):
+    samples = [run_child(database_url_fn(i), bootstrap) for i in range(runs)]
+    create_times = [sample['create_app'] * 1000 for sample in samples]
+    import_times = [sample['import'] * 1000 for sample in samples]
+    print(f'{label:<34} create_app: медиана {statistics.median(create_times):8.1f} мс, '
+          f'макс {max(create_times):8.1f} мс; импорт {statistics.median(import_times):6.1f} мс')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ready = os.path.join(tmp, 'ready.db')
+        prepare_database(ready)
+        ready_url = f'sqlite:///{ready}'
+
+        measure('без обращения к БД', args.runs, lambda i: ready_url, bootstrap=False)
+        measure('create_all на готовой базе', args.runs, lambda i: ready_url, bootstrap=True)
+        measure('create_all + сидинг пустой базы', args.runs,
+                lambda i: f"sqlite:///{os.path.join(tmp, f'empty{i}.db')}", bootstrap=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Бенчмарк сжатия списка матчей.
+
+Страница матчей запрашивается без сжатия и с Accept-Encoding: gzip — с очисткой
+кэша ответов перед каждым запросом (сериализация и сжатие на каждом запросе) и с
+заполненным кэшем (сжатое тело берется из записи кэша). Печатает размер ответа и
+медиану времени ответа.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_compression --page 500
+"""
+import argparse
+import gzip
+import statistics
+import time
+
+from app import create_app
+from utils.datagen import generate
+from utils.http_cache import response_cache
+
+
+def measure(client, url, headers, iterations, cold):
+    """Медиана времени ответа, мс, и размер тела, байты"""
+    samples = []
+    client.get(url, headers=headers)
+    for _ in range(iterations):
+        if cold:
+            response_cache().clear()
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), len(response.data), response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--matches', type=int, default=5000)
+    parser.add_argument('--page', type=int, default=500, help='матчей в ответе')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    url = f'/api/matches/matches?limit={args.page}'
+    gzip_headers = {'Accept-Encoding': 'gzip'}
+    with app.app_context():
+        generate(matches=args.matches, demo=False, seed=args.seed)
+        client = app.test_client()
+
+        rows = [
+            ('Без сжатия, без кэша', *measure(client, url, {}, args.iterations, cold=True)),
+            ('gzip, без кэша', *measure(client, url, gzip_headers, args.iterations, cold=True)),
+            ('Без сжатия, кэш', *measure(client, url, {}, args.iterations, cold=False)),
+            ('gzip, кэш со сжатым телом', *measure(client, url, gzip_headers, args.iterations, cold=False)),
+        ]
+
+    plain, compressed = rows[2][3], rows[3][3]
+    if compressed.headers.get('Content-Encoding') != 'gzip' or gzip.decompress(compressed.data) != plain.data:
+        raise SystemExit('Ошибка: сжатый ответ не совпадает с исходным')
+
+    print(f'Страница из {args.page} матчей, медиана {args.iterations} повторов')
+    for title, median_ms, size, _ in rows:
+        print(f'{title:28} {median_ms:8.2f} мс  {size:9} байт')
+    print(f'Степень сжатия: {len(plain.data) / len(compressed.data):.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Бенчмарк GET /api/predictions/ с выключенным и включенным логированием.
+
+Режимы: логирование выключено (WARNING, без записей о запросах); DEBUG с записью
+о каждом запросе синхронно в файл; то же через очередь и фоновый поток (LOG_ASYNC);
+очередь с выборкой 10% записей ниже WARNING. Записи пишутся во временный файл;
+второй прогон добавляет к каждой записи задержку --sink-delay-ms — так ведет себя
+медленный приемник (заблокированный pipe stdout, syslog, сетевой сборщик логов).
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_logging --iterations 2000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from app import create_app
+from database import db
+from models.user import User
+import utils.log
+from utils.datagen import SYNTHETIC_PASSWORD, generate
+from utils.log import configure_logging, flush_logs
+
+MODES = [
+    ('выключено', {'LOG_LEVEL': 'WARNING', 'LOG_ASYNC': False}, False),
+    ('DEBUG, синхронно', {'LOG_LEVEL': 'DEBUG', 'LOG_ASYNC': False}, True),
+    ('DEBUG, очередь', {'LOG_LEVEL': 'DEBUG', 'LOG_ASYNC': True}, True),
+    ('DEBUG, очередь, выборка 10%', {'LOG_LEVEL': 'DEBUG', 'LOG_ASYNC': True,
+                                     'LOG_SAMPLING': {'app': 0.1, 'access': 0.1}}, True),
+]
+
+
+def slow_sink(delay):
+    """Обработчик вывода, каждая запись в который занимает еще delay секунд"""
+    make_handler = utils.log._output_handler
+
+    def output_handler(config):
+        handler = make_handler(config)
+        emit = handler.emit
+
+        def slow_emit(record):
+            time.sleep(delay)
+            emit(record)
+
+        handler.emit = slow_emit
+        return handler
+
+    return output_handler
+
+
+def run_modes(app, client, headers, log_file, iterations):
+    results = []
+    for name, overrides, log_requests in MODES:
+        configure_logging(dict(app.config, LOG_FILE=log_file, **overrides), app.extensions['log_stats'])
+        app.config['LOG_REQUESTS'] = log_requests
+        measure(client, headers, 100)
+        results.append((name, *measure(client, headers, iterations)))
+        flush_logs()
+    return results
+
+
+def report(title, results):
+    print(title)
+    baseline = results[0][1]
+    for name, median, p95 in results:
+        print(f'  {name:<30} медиана {median:6.3f} мс ({median - baseline:+.3f})   p95 {p95:6.3f} мс')
+
+
+def measure(client, headers, iterations):
+    """Медиана и 95-й перцентиль времени ответа, мс"""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = client.get('/api/predictions/?limit=100', headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sink-delay-ms', type=float, default=0.5, help='задержка записи медленного приемника')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        generate(users=100, matches=200, predictions=20000, demo=False, seed=args.seed)
+        fan = User.query.filter(User.username.like('fan%')).order_by(User.id).first()
+        db.session.remove()
+
+        client = app.test_client()
+        login = client.post('/api/auth/login', json={'username': fan.username, 'password': SYNTHETIC_PASSWORD})
+        headers = {'Authorization': f"Bearer {login.json['access_token']}"}
+
+        with tempfile.TemporaryDirectory() as directory:
+            log_file = os.path.join(directory, 'bench.log')
+            report('Файл на локальном диске', run_modes(app, client, headers, log_file, args.iterations))
+
+            utils.log._output_handler = slow_sink(args.sink_delay_ms / 1000)
+            report(f'Медленный приемник (+{args.sink_delay_ms} мс на запись)',
+                   run_modes(app, client, headers, log_file, args.iterations))
+            lines = sum(1 for _ in open(log_file, encoding='utf-8'))
+
+    print(f'Записей в логе: {lines}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Бенчмарк ввода результатов игрового дня.
+
+Сравнивает ввод счета по одному матчу (PUT /api/matches/matches/<id> на каждый
+матч) с одним запросом POST /api/matches/results в двух сценариях:
+- первый ввод результатов запланированных матчей (каждый повтор — новые матчи);
+- исправление результатов завершенных матчей: счет меняется в каждом повторе, и
+  пересчитываются очки и серии всех прогнозов матчей.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_results --matchday 8
+"""
+import argparse
+import statistics
+import time
+
+from app import create_app
+from database import db
+from models.match import Match
+from utils.datagen import generate
+
+
+def _login(client, username, password):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+
+def _results(match_ids, iteration):
+    return [{'match_id': match_id, 'home_score': iteration % 2 + 1, 'away_score': 1, 'status': 'finished'}
+            for match_id in match_ids]
+
+
+def per_match(client, headers, match_ids, iteration):
+    for item in _results(match_ids, iteration):
+        response = client.put(f"/api/matches/matches/{item.pop('match_id')}", json=item, headers=headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def batch(client, headers, match_ids, iteration):
+    response = client.post('/api/matches/results', json={'results': _results(match_ids, iteration)}, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.json
+
+
+def measure(func, client, headers, matchdays, iterations):
+    """Медиана времени ввода результатов всего игрового дня, мс; matchdays(i) — матчи i-го повтора"""
+    samples = []
+    for iteration in range(iterations):
+        match_ids = matchdays(iteration)
+        started = time.perf_counter()
+        func(client, headers, match_ids, iteration)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _match_ids(status, limit):
+    return [match_id for (match_id,) in db.session.query(Match.id).filter(
+        Match.status == status, Match.id > 4
+    ).order_by(Match.match_date, Match.id).limit(limit)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--matches', type=int, default=200)
+    parser.add_argument('--predictions', type=int, default=50000)
+    parser.add_argument('--matchday', type=int, default=8, help='матчей в игровом дне')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        generate(users=args.users, matches=args.matches, predictions=args.predictions, demo=False, seed=args.seed)
+        # Запланированные матчи по дате: сначала измеряется ввод по одному матчу на ранних днях,
+        # затем пачкой на поздних — оба пути начисляют очки по порядку дат
+        scheduled = _match_ids('scheduled', 2 * args.iterations * args.matchday)
+        if len(scheduled) < 2 * args.iterations * args.matchday:
+            raise SystemExit('Недостаточно запланированных матчей: увеличьте --matches')
+        days = [scheduled[start:start + args.matchday] for start in range(0, len(scheduled), args.matchday)]
+        finished = _match_ids('finished', args.matchday)
+        db.session.remove()
+
+        client = app.test_client()
+        headers = _login(client, 'admin', 'adminpass')
+        scenarios = [
+            ('Первый ввод результатов',
+             measure(per_match, client, headers, lambda i: days[i], args.iterations),
+             measure(batch, client, headers, lambda i: days[args.iterations + i], args.iterations)),
+            ('Исправление результатов',
+             measure(per_match, client, headers, lambda i: finished, args.iterations),
+             measure(batch, client, headers, lambda i: finished, args.iterations)),
+        ]
+
+    print(f'Игровой день: {args.matchday} матчей, медиана {args.iterations} повторов')
+    for title, per_match_ms, batch_ms in scenarios:
+        print(f'{title}: PUT на каждый матч {per_match_ms:8.2f} мс, '
+              f'POST /results {batch_ms:8.2f} мс ({per_match_ms / batch_ms:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Бенчмарк ключевых маршрутов API через тестовый клиент Flask.
+
+Приложение create_app('testing') (SQLite в памяти) заполняется генератором
+utils.datagen, затем каждый маршрут вызывается несколько раз; кэш ответов
+очищается перед каждым вызовом, чтобы измерялся путь через БД. Медианы
+сравниваются с файлом базовой линии: если маршрут стал медленнее больше чем на
+--threshold (и на --min-delta-ms), бенчмарк завершается с кодом 1.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_routes                      # сравнение с baseline.json
+    python -m benchmarks.bench_routes --update-baseline    # запись новой базовой линии
+    python -m benchmarks.bench_routes --users 100000 --matches 5000 --predictions 5000000
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+
+from app import create_app
+from database import db
+from models.match import Match
+from models.user import User
+from utils.datagen import SYNTHETIC_PASSWORD, generate
+from utils.http_cache import response_cache
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# (имя, метод, URL, пользователь); {match} — завершенный синтетический матч (id демо-матчей 1–4)
+ROUTES = [
+    ('matches_page', 'GET', '/api/matches/matches?limit=100', 'fan'),
+    ('matches_team_filter', 'GET', '/api/matches/matches?team=реал&limit=100', 'fan'),
+    ('past_matches', 'GET', '/api/matches/past-matches?limit=100', 'fan'),
+    ('upcoming_matches', 'GET', '/api/matches/upcoming-matches?limit=100', 'fan'),
+    ('match_detail', 'GET', '/api/matches/matches/{match}', 'fan'),
+    ('teams_autocomplete', 'GET', '/api/matches/teams?prefix=ба', 'fan'),
+    ('calendar_month', 'GET', '/api/matches/calendar?tz=Europe/Moscow', 'fan'),
+    ('my_predictions', 'GET', '/api/predictions/?limit=100', 'fan'),
+    ('leaderboard_page', 'GET', '/api/predictions/leaderboard?limit=50&offset=100', 'fan'),
+    ('leaderboard_me', 'GET', '/api/predictions/leaderboard/me?around=5', 'fan'),
+    ('auth_me', 'GET', '/api/auth/me', 'fan'),
+    ('update_match_score', 'PUT', '/api/matches/matches/{match}', 'admin'),
+]
+
+
+def _login(client, username, password):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+
+def _request_kwargs(name, iteration):
+    if name == 'update_match_score':
+        # Счет меняется на каждом вызове, чтобы каждый раз выполнялся пересчет очков
+        return {'json': {'status': 'finished', 'home_score': iteration % 2 + 1, 'away_score': 1}}
+    return {}
+
+
+def measure(client, headers, match_id, iterations, warmup):
+    """Медиана и 95-й перцентиль времени ответа каждого маршрута, мс"""
+    results = {}
+    cache = response_cache()
+    for name, method, url, role in ROUTES:
+        url = url.format(match=match_id)
+        samples = []
+        for iteration in range(warmup + iterations):
+            cache.clear()
+            started = time.perf_counter()
+            response = client.open(url, method=method, headers=headers[role], **_request_kwargs(name, iteration))
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                raise SystemExit(f'{name}: {response.status_code} {response.get_data(as_text=True)}')
+            if iteration >= warmup:
+                samples.append(elapsed)
+        samples.sort()
+        results[name] = {
+            'median_ms': round(statistics.median(samples), 3),
+            'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        }
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Маршруты, медиана которых выросла больше допустимого"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline['routes'].get(name)
+        if previous is None:
+            continue
+        limit = max(previous['median_ms'] * (1 + threshold), previous['median_ms'] + min_delta_ms)
+        if current['median_ms'] > limit:
+            regressions.append((name, previous['median_ms'], current['median_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--matches', type=int, default=200)
+    parser.add_argument('--predictions', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='записать результаты как базовую линию')
+    parser.add_argument('--threshold', type=float, default=0.25, help='допустимый рост медианы (0.25 = 25%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5, help='рост меньше этого не считается регрессией')
+    args = parser.parse_args()
+
+    params = {'users': args.users, 'matches': args.matches, 'predictions': args.predictions, 'seed': args.seed}
+
+    app = create_app('testing')
+    with app.app_context():
+        started = time.perf_counter()
+        generate(users=args.users, matches=args.matches, predictions=args.predictions, demo=False, seed=args.seed)
+        print(f'Данные: {params} за {time.perf_counter() - started:.1f} с')
+
+        fan = User.query.filter(User.username.like('fan%')).order_by(User.id).first()
+        match_id = db.session.query(Match.id).filter(
+            Match.status == 'finished', Match.id > 4
+        ).order_by(Match.id).limit(1).scalar()
+        db.session.remove()
+
+        client = app.test_client()
+        headers = {'fan': _login(client, fan.username, SYNTHETIC_PASSWORD),
+                   'admin': _login(client, 'admin', 'adminpass')}
+        results = measure(client, headers, match_id, args.iterations, args.warmup)
+
+    for name, timing in results.items():
+        print(f"{name:<22} медиана {timing['median_ms']:8.2f} мс   p95 {timing['p95_ms']:8.2f} мс")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as stream:
+            json.dump({
+                'params': params,
+                'environment': {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version},
+                'routes': results,
+            }, stream, ensure_ascii=False, indent=2)
+            stream.write('\n')
+        print(f'Базовая линия записана: {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        print('Базовой линии нет — запустите с --update-baseline')
+        return
+    with open(args.baseline, encoding='utf-8') as stream:
+        baseline = json.load(stream)
+    if baseline['params'] != params:
+        raise SystemExit(f"Параметры данных отличаются от базовой линии: {baseline['params']}")
+
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for name, previous, current in regressions:
+        print(f'РЕГРЕССИЯ {name}: {previous:.2f} мс -> {current:.2f} мс', file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+    print(f'Регрессий нет (порог {args.threshold:.0%})')
+
+
+if __name__ == '__main__':
+    main()
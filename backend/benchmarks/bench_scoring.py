@@ -0,0 +1,118 @@
+"""
+Бенчмарк начисления очков при завершении матча.
+
+Сравнивает построчный цикл через Prediction.calculate_points (прежняя реализация
+update_match) с одним UPDATE-запросом из prediction_service.score_match и
+проверяет, что оба способа дают одинаковые очки.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_scoring --predictions 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app import create_app
+from database import db
+from models.match import Match
+from models.prediction import Prediction
+from models.user import User
+from services import prediction_service
+
+CHUNK_SIZE = 50000
+
+
+def _insert_chunked(model, rows):
+    """Вставка строк пачками через executemany"""
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def populate(count, seed):
+    """Два одинаковых матча с count прогнозами от count пользователей"""
+    rng = random.Random(seed)
+
+    _insert_chunked(User, [
+        {'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': 'x'}
+        for i in range(count)
+    ])
+    first_user_id = db.session.query(db.func.min(User.id)).filter(User.username.like('bench%')).scalar()
+
+    matches = []
+    for _ in range(2):
+        match = Match(home_team='Бенчмарк', away_team='Бенчмарк', match_date=datetime(2024, 9, 1, 20, 0),
+                      home_score=2, away_score=1, status='finished')
+        db.session.add(match)
+        matches.append(match)
+    db.session.flush()
+
+    scores = [(rng.randint(0, 4), rng.randint(0, 4)) for _ in range(count)]
+    for match in matches:
+        _insert_chunked(Prediction, [
+            {'user_id': first_user_id + i, 'match_id': match.id, 'home_score': home, 'away_score': away}
+            for i, (home, away) in enumerate(scores)
+        ])
+    db.session.commit()
+
+    return matches[0].id, matches[1].id
+
+
+def score_with_loop(match_id):
+    """Прежний путь: загрузка всех прогнозов и calculate_points по одному"""
+    match = Match.query.get(match_id)
+    for prediction in match.predictions:
+        prediction.points_earned = prediction.calculate_points()
+    db.session.commit()
+
+
+def score_set_based(match_id):
+    """Новый путь: один UPDATE для прогнозов и один для таблицы лидеров"""
+    match = Match.query.get(match_id)
+    prediction_service.score_match(match)
+    db.session.commit()
+
+
+def _points(match_id):
+    rows = db.session.query(Prediction.user_id, Prediction.points_earned).filter(
+        Prediction.match_id == match_id
+    ).order_by(Prediction.user_id).all()
+    return [points for _, points in rows]
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--predictions', type=int, default=1000000, help='прогнозов на матч')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-loop', action='store_true', help='не измерять построчный цикл')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        started = time.perf_counter()
+        loop_match_id, set_match_id = populate(args.predictions, args.seed)
+        print(f'Данные: {args.predictions} прогнозов x 2 матча за {time.perf_counter() - started:.1f} с')
+
+        set_seconds = _timed(score_set_based, set_match_id)
+        print(f'Один UPDATE (score_match):      {set_seconds:8.2f} с')
+
+        if not args.skip_loop:
+            loop_seconds = _timed(score_with_loop, loop_match_id)
+            print(f'Цикл calculate_points:          {loop_seconds:8.2f} с')
+            print(f'Ускорение:                      {loop_seconds / set_seconds:8.1f}x')
+
+            if _points(loop_match_id) != _points(set_match_id):
+                raise SystemExit('Ошибка: очки UPDATE-запроса отличаются от calculate_points')
+            print('Очки совпадают с calculate_points')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Бенчмарк сериализации страницы матчей.
+
+Сравнивает прежний путь (ORM-объекты и Match.to_dict) с кортежами столбцов
+из utils.serializers: без кэша фрагментов (первый запрос после изменения) и с
+заполненным кэшем. Время включает запрос к БД и кодирование JSON; тела ответов
+обоих путей сравниваются.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_serialization --page 500
+"""
+import argparse
+import json
+import statistics
+import time
+
+from flask import jsonify
+
+from app import create_app
+from database import db
+from models.match import Match
+from utils.datagen import generate
+from utils.serializers import MATCH_COLUMNS, encode_matches, fragment_cache
+
+
+def _page(query, size):
+    return query.order_by(Match.match_date.desc(), Match.id.desc()).limit(size).all()
+
+
+def to_dict_path(size):
+    """Прежний путь: ORM-объекты, to_dict и isoformat по каждой строке"""
+    return jsonify([match.to_dict() for match in _page(Match.query, size)]).get_data()
+
+
+def tuple_path(size):
+    """Новый путь: кортежи столбцов и JSON-фрагменты матчей"""
+    return jsonify(encode_matches(_page(db.session.query(*MATCH_COLUMNS), size))).get_data()
+
+
+def measure(func, size, iterations, before=None):
+    """Медиана времени вызова, мс"""
+    samples = []
+    for _ in range(iterations):
+        if before:
+            before()
+        started = time.perf_counter()
+        func(size)
+        samples.append((time.perf_counter() - started) * 1000)
+        db.session.expunge_all()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--matches', type=int, default=5000)
+    parser.add_argument('--page', type=int, default=500, help='матчей в ответе')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        generate(matches=args.matches, demo=False, seed=args.seed)
+
+        # Каждый путь — в собственном контексте запроса, как в представлении
+        with app.test_request_context():
+            if json.loads(to_dict_path(args.page)) != json.loads(tuple_path(args.page)):
+                raise SystemExit('Ошибка: ответы путей отличаются')
+
+        with app.test_request_context():
+            to_dict_ms = measure(to_dict_path, args.page, args.iterations)
+        with app.test_request_context():
+            cold_ms = measure(tuple_path, args.page, args.iterations, before=fragment_cache().clear)
+        with app.test_request_context():
+            tuple_path(args.page)
+            warm_ms = measure(tuple_path, args.page, args.iterations)
+
+    print(f'Страница из {args.page} матчей, медиана {args.iterations} повторов')
+    print(f'Match.to_dict:                 {to_dict_ms:8.2f} мс')
+    print(f'Кортежи, без кэша фрагментов:  {cold_ms:8.2f} мс  ({to_dict_ms / cold_ms:.1f}x)')
+    print(f'Кортежи, кэш фрагментов:       {warm_ms:8.2f} мс  ({to_dict_ms / warm_ms:.1f}x)')
+    print('Ответы совпадают')
+
+
+if __name__ == '__main__':
+    main()
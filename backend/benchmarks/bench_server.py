@@ -0,0 +1,138 @@
+"""
+Бенчмарк пропускной способности: сервер разработки (app.run) против
+продакшен-сервера (server.py, gunicorn) на /api/health и списке матчей.
+
+Серверы запускаются отдельными процессами на временной базе, нагрузку дают
+несколько процессов-клиентов с постоянными соединениями.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_server --duration 10 --clients 4 --threads 8
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ['/api/health', '/api/matches/matches']
+
+DEV_SERVER = """
+import os
+from app import create_app
+create_app('production').run(host='127.0.0.1', port=int(os.environ['PORT']), threaded=True)
+"""
+
+SERVERS = {
+    'dev (app.run)': [sys.executable, '-c', DEV_SERVER],
+    'gunicorn (server.py)': [sys.executable, 'server.py'],
+}
+
+
+def _worker(port, path, deadline, counts):
+    connection = None
+    reused = False
+    done = errors = reconnects = 0
+    while time.monotonic() < deadline:
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+                reused = False
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                done += 1
+            else:
+                errors += 1
+            reused = True
+            if response.will_close:
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException):
+            # Сервер закрыл простаивающее соединение (keepalive, перезапуск воркера) — переподключаемся
+            if reused:
+                reconnects += 1
+            else:
+                errors += 1
+            connection = None
+    counts.append((done, errors, reconnects))
+
+
+def _client(port, path, duration, threads, queue):
+    """Процесс-клиент: threads потоков шлют запросы до истечения duration"""
+    counts = []
+    deadline = time.monotonic() + duration
+    pool = [threading.Thread(target=_worker, args=(port, path, deadline, counts)) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    queue.put(tuple(sum(c[i] for c in counts) for i in range(3)))
+
+
+def load(port, path, duration, clients, threads):
+    """Запросов в секунду, число ошибок и переподключений"""
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_client, args=(port, path, duration, threads, queue))
+                 for _ in range(clients)]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return (sum(r[0] for r in results) / duration, sum(r[1] for r in results),
+            sum(r[2] for r in results))
+
+
+def wait_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('Сервер не запустился')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=4, help='Процессов-клиентов')
+    parser.add_argument('--threads', type=int, default=8, help='Потоков в каждом клиенте')
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                   PORT=str(args.port), SERVER_BIND=f'127.0.0.1:{args.port}', FLASK_ENV='production',
+                   FLASK_APP="app:create_app('production')")
+        for command in ('init-db', 'seed'):
+            subprocess.run([sys.executable, '-m', 'flask', command], cwd=BACKEND_DIR, env=env,
+                           check=True, capture_output=True)
+
+        print(f'CPU: {os.cpu_count()}, клиентов: {args.clients} x {args.threads} потоков, {args.duration} с')
+        for name, command in SERVERS.items():
+            server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_ready(args.port)
+                for path in ENDPOINTS:
+                    rps, errors, reconnects = load(args.port, path, args.duration, args.clients, args.threads)
+                    print(f'{name:<22} {path:<24} {rps:9.0f} запр/с, ошибок: {errors}, '
+                          f'переподключений: {reconnects}')
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == '__main__':
+    main()
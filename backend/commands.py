@@ -0,0 +1,129 @@
+import io
+import time
+import click
+
+
+def register_commands(app):
+    """Регистрация CLI-команд приложения (flask <команда>)"""
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Создание схемы и добавление недостающих таблиц и индексов в существующую БД"""
+        from database import upgrade_schema
+
+        created = upgrade_schema()
+        click.echo('Схема БД актуальна' + (f", созданы индексы: {', '.join(created)}" if created else ''))
+
+    @app.cli.command('seed')
+    @click.option('--users', type=int, default=0, help='Синтетических пользователей')
+    @click.option('--matches', type=int, default=0, help='Синтетических матчей')
+    @click.option('--predictions', type=int, default=0, help='Прогнозов на синтетические матчи')
+    @click.option('--seed', 'random_seed', type=int, default=42, help='Зерно генератора')
+    def seed(users, matches, predictions, random_seed):
+        """Заполнение пустой БД тестовыми данными (и синтетическим объемом, например --users 100000)"""
+        from database import seed_test_data
+
+        started = time.perf_counter()
+        counts = seed_test_data(users=users, matches=matches, predictions=predictions, seed=random_seed)
+        if counts is None:
+            click.echo('В БД уже есть пользователи, тестовые данные не создавались')
+            return
+        click.echo(f"Тестовые данные созданы за {time.perf_counter() - started:.1f} с: "
+                   f"пользователей {counts['users']}, матчей {counts['matches']}, "
+                   f"прогнозов {counts['predictions']}")
+
+    @app.cli.command('rebuild-leaderboard')
+    def rebuild_leaderboard():
+        """Полный пересчет таблицы лидеров по прогнозам"""
+        from services import leaderboard_service
+
+        count = leaderboard_service.rebuild()
+        click.echo(f'Таблица лидеров пересчитана: {count} пользователей')
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats():
+        """Полный пересчет статистики прогнозов пользователей"""
+        from services import stats_service
+
+        count = stats_service.rebuild()
+        click.echo(f'Статистика прогнозов пересчитана: {count} пользователей')
+
+    @app.cli.command('sync-replicas')
+    def sync_replicas():
+        """Копирование основной SQLite-базы в файлы реплик из DATABASE_REPLICA_URLS"""
+        from database import sync_sqlite_replicas
+
+        count = sync_sqlite_replicas()
+        click.echo(f'Реплики обновлены: {count}')
+
+    @app.cli.command('rebuild-teams')
+    def rebuild_teams():
+        """Перестроение справочника команд по таблице матчей"""
+        from services import team_service
+
+        count = team_service.rebuild()
+        click.echo(f'Справочник команд перестроен: {count} команд')
+
+    @app.cli.command('scheduler')
+    @click.option('--interval', type=float, default=None, help='Пауза между циклами, секунды')
+    @click.option('--once', is_flag=True, help='Выполнить один цикл и выйти')
+    def scheduler(interval, once):
+        """
+        Планировщик: перевод начавшихся матчей в live, выполнение фоновых задач
+        (начисление очков, пересчет таблицы лидеров) и очистка старых live-событий.
+        Можно запускать несколько экземпляров.
+        """
+        from database import db
+        from services import job_service, live_service, match_service
+
+        interval = interval if interval is not None else app.config['SCHEDULER_INTERVAL']
+        locked_by = job_service.worker_id()
+        next_prune = 0.0
+        click.echo(f'Планировщик {locked_by} запущен')
+
+        while True:
+            try:
+                started = match_service.start_due_matches()
+                requeued = job_service.requeue_stale()
+                processed = job_service.run_pending(locked_by)
+                if started or requeued or processed:
+                    click.echo(f'Матчей начато: {started}, задач выполнено: {processed}, '
+                               f'возвращено в очередь: {requeued}')
+                if time.monotonic() >= next_prune:
+                    next_prune = time.monotonic() + app.config['LIVE_EVENTS_PRUNE_INTERVAL']
+                    pruned = live_service.prune_events()
+                    if pruned:
+                        click.echo(f'Удалено старых live-событий: {pruned}')
+            except Exception as error:
+                db.session.rollback()
+                click.echo(f'Ошибка цикла планировщика: {error}', err=True)
+            finally:
+                db.session.remove()
+
+            if once:
+                break
+            time.sleep(interval)
+
+    @app.cli.command('import-fixtures')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None,
+                  help='Формат файла (по умолчанию — по расширению)')
+    @click.option('--batch-size', type=int, default=None, help='Строк в одной транзакции')
+    def import_fixtures(path, fmt, batch_size):
+        """Потоковый импорт матчей из CSV/JSONL с upsert по (home_team, away_team, match_date)"""
+        from services import match_service
+
+        fmt = fmt or match_service.detect_format(path)
+        batch_size = batch_size or app.config['IMPORT_BATCH_SIZE']
+
+        with io.open(path, 'rb') as binary:
+            report = match_service.import_fixtures(match_service.decode_lines(binary), fmt, batch_size)
+
+        click.echo(f"Добавлено: {report['inserted']}, обновлено: {report['updated']}, "
+                   f"пропущено: {report['skipped']}")
+        for error in report['errors']:
+            click.echo(f"  строка {error['line']}: {error['message']}", err=True)
+        if report['aborted']:
+            aborted = report['aborted']
+            click.echo(f"Импорт прерван на строке {aborted['line']}: {aborted['message']}", err=True)
+            raise SystemExit(1)
@@ -1,6 +1,16 @@
 import os
 from datetime import timedelta
 
+
+def _parse_log_limits(value):
+    """Значения по логгерам из строки вида "routes.predictions=0.1,utils.metrics=5" """
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, limit = item.partition('=')
+        limits[name.strip()] = float(limit)
+    return limits
+
+
 class Config:
     """Базовая конфигурация"""
     # Секретный ключ для сессий и токенов
@@ -10,23 +20,157 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'champions.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Создание схемы и тестовых данных при старте приложения. В продакшене выключено:
+    # схема готовится командами `flask init-db` / `flask seed` до запуска воркеров
+    DATABASE_AUTO_BOOTSTRAP = os.environ.get('DATABASE_AUTO_BOOTSTRAP', '1') == '1'
+    
+    # Профиль движка SQLite: PRAGMA для каждого нового соединения.
+    # WAL позволяет читать во время записи, busy_timeout — ждать блокировку вместо ошибки
+    # "database is locked", отрицательный cache_size задается в КиБ
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024,
+    }
+    
+    # Профиль движка для серверных БД (PostgreSQL и т.п.): параметры пула соединений
+    DATABASE_POOL_OPTIONS = {
+        'pool_size': int(os.environ.get('DATABASE_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DATABASE_MAX_OVERFLOW', 10)),
+        'pool_timeout': 30,
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
+    
+    # Реплики для чтения: URL через запятую. Чтения GET-запросов распределяются по ним
+    # по кругу; запись и чтения после нее (в том же запросе и следующие
+    # DATABASE_REPLICA_STICKY_SECONDS секунд от того же клиента) идут в основную БД
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    DATABASE_REPLICA_RETRY = float(os.environ.get('DATABASE_REPLICA_RETRY', 30))  # Недоступная реплика исключается, секунды
+    DATABASE_REPLICA_STICKY_SECONDS = float(os.environ.get('DATABASE_REPLICA_STICKY_SECONDS', 5))
+    
     # Настройки JWT
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'champions-league-jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    
+    # Хеширование паролей: параметры хеша и пул процессов
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_SALT_LENGTH = 16
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # 0 — хешировать в потоке запроса
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 32))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 2.0))  # Секунды
+    
+    # Размер пачки строк при импорте матчей из CSV/JSONL
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+    
+    # Кэш данных пользователей (GET /api/auth/me и проверка роли для старых токенов)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))  # Секунды
+    
+    # Кэш сериализованных ответов для чтения матчей
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))  # Записей на процесс
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 30))  # Окно актуальности is_past/is_upcoming, секунды
+    MATCH_FRAGMENT_CACHE_SIZE = int(os.environ.get('MATCH_FRAGMENT_CACHE_SIZE', 10000))  # JSON-фрагментов матчей на процесс
+    CALENDAR_CACHE_SIZE = int(os.environ.get('CALENDAR_CACHE_SIZE', 512))  # Месяцев календаря (пояс, месяц) на процесс
+    
+    # Сжатие ответов gzip (если клиент его принимает). Закэшированные ответы хранят и сжатое тело
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # Меньшие ответы не сжимаются, байты
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))  # 1 — быстрее, 9 — сильнее
+    COMPRESSION_MIMETYPES = {'application/json', 'text/plain'}
+    
+    # Фоновые задачи и планировщик (flask scheduler)
+    # При DEFERRED_SCORING очки за завершенный матч начисляет планировщик, а не запрос администратора
+    DEFERRED_SCORING = os.environ.get('DEFERRED_SCORING', '0') == '1'
+    SCHEDULER_INTERVAL = float(os.environ.get('SCHEDULER_INTERVAL', 5))  # Пауза между циклами, секунды
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+    JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 10))  # Первая задержка повтора, далее x2, секунды
+    JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT', 600))  # Задача в running дольше — возвращается в очередь
+    
+    # Поток live-обновлений матчей (SSE)
+    LIVE_STREAM_HEARTBEAT = float(os.environ.get('LIVE_STREAM_HEARTBEAT', 15))  # Комментарий-пинг в тишине, секунды
+    LIVE_STREAM_RETRY = 3000  # Пауза перед переподключением клиента, мс
+    LIVE_POLL_INTERVAL = float(os.environ.get('LIVE_POLL_INTERVAL', 1.0))  # Опрос событий других воркеров, секунды
+    LIVE_BUFFER_SIZE = int(os.environ.get('LIVE_BUFFER_SIZE', 1000))  # Последних событий в памяти процесса
+    # Ожидание пропуска в id событий (транзакция с меньшим id еще не закоммичена), секунды
+    LIVE_POLL_LAG = float(os.environ.get('LIVE_POLL_LAG', 2.0))
+    LIVE_EVENTS_RETENTION = int(os.environ.get('LIVE_EVENTS_RETENTION', 86400))  # Хранение событий, секунды
+    LIVE_EVENTS_PRUNE_INTERVAL = float(os.environ.get('LIVE_EVENTS_PRUNE_INTERVAL', 600))  # Очистка планировщиком
+    
+    # Метрики запросов (/api/metrics): предупреждение в лог, если запрос выполнил больше
+    # указанного числа SQL-запросов (признак N+1); 0 — выключено
+    METRICS_QUERY_WARNING_THRESHOLD = int(os.environ.get('METRICS_QUERY_WARNING_THRESHOLD', 0))
+    # Токен сборщика метрик (Authorization: Bearer <токен>); без него /api/metrics — только администратору
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    
+    # Логирование: записи с request_id; при LOG_ASYNC поток запроса только кладет запись
+    # в очередь, форматирование и запись выполняет фоновый поток
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # json или text
+    LOG_FILE = os.environ.get('LOG_FILE')  # По умолчанию stderr
+    LOG_ASYNC = os.environ.get('LOG_ASYNC', '1') == '1'
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # При переполнении записи отбрасываются
+    LOG_REQUESTS = os.environ.get('LOG_REQUESTS', '0') == '1'  # Запись о каждом запросе (логгер access)
+    # Доля сохраняемых записей ниже WARNING и предел записей в секунду по логгерам
+    # (значение логгера действует и на дочерние): "routes.predictions=0.1,app=0.5"
+    LOG_SAMPLING = _parse_log_limits(os.environ.get('LOG_SAMPLING', ''))
+    LOG_RATE_LIMITS = _parse_log_limits(os.environ.get('LOG_RATE_LIMITS', ''))
+    
+    # Продакшен-сервер (gunicorn, python server.py): предфоркнутые воркеры (gevent или пул потоков)
+    SERVER_BIND = os.environ.get('SERVER_BIND', '0.0.0.0:' + os.environ.get('PORT', '5000'))
+    SERVER_WORKERS = int(os.environ.get('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 4))  # Потоков на воркер
+    # gevent держит тысячи простаивающих SSE-соединений без потока на каждое
+    SERVER_WORKER_CLASS = os.environ.get('SERVER_WORKER_CLASS', 'gevent')
+    SERVER_WORKER_CONNECTIONS = int(os.environ.get('SERVER_WORKER_CONNECTIONS', 1000))  # Соединений на воркер gevent
+    # Предел SSE-потоков на процесс (сверх него — 503); 0 — без предела. На воркерах с потоками
+    # поток держит по потоку воркера, поэтому по умолчанию один поток остается обычным запросам
+    LIVE_MAX_STREAMS = int(os.environ.get(
+        'LIVE_MAX_STREAMS', 0 if SERVER_WORKER_CLASS == 'gevent' else max(SERVER_THREADS - 1, 1)
+    ))
+    SERVER_TIMEOUT = int(os.environ.get('SERVER_TIMEOUT', 30))  # Зависший воркер перезапускается, секунды
+    SERVER_GRACEFUL_TIMEOUT = int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', 30))  # Дообработка запросов при перезапуске
+    SERVER_KEEPALIVE = int(os.environ.get('SERVER_KEEPALIVE', 5))
+    SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 5000))  # 0 — не перезапускать воркеры
+    SERVER_MAX_REQUESTS_JITTER = int(os.environ.get('SERVER_MAX_REQUESTS_JITTER', 500))
 
 class DevelopmentConfig(Config):
     """Конфигурация для разработки"""
     DEBUG = True
+    METRICS_QUERY_WARNING_THRESHOLD = int(os.environ.get('METRICS_QUERY_WARNING_THRESHOLD', 20))
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
     
 class TestingConfig(Config):
     """Конфигурация для тестирования"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # Дешевый хеш без пула процессов ускоряет тесты
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 0
+    LIVE_POLL_INTERVAL = 0
+    LOG_ASYNC = False
     
 class ProductionConfig(Config):
     """Конфигурация для продакшена"""
     DEBUG = False
+    DATABASE_AUTO_BOOTSTRAP = os.environ.get('DATABASE_AUTO_BOOTSTRAP') == '1'
+    DEFERRED_SCORING = os.environ.get('DEFERRED_SCORING', '1') == '1'
+    LOG_REQUESTS = os.environ.get('LOG_REQUESTS', '1') == '1'
+    
+    SQLITE_PRAGMAS = dict(
+        Config.SQLITE_PRAGMAS,
+        cache_size=-64000,
+        mmap_size=256 * 1024 * 1024,
+    )
+    
+    DATABASE_POOL_OPTIONS = dict(
+        Config.DATABASE_POOL_OPTIONS,
+        pool_size=int(os.environ.get('DATABASE_POOL_SIZE', 10)),
+        max_overflow=int(os.environ.get('DATABASE_MAX_OVERFLOW', 20)),
+    )
     # В продакшене следует использовать настоящие секретные ключи из переменных окружения
 
 # Словарь доступных конфигураций
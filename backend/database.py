@@ -1,113 +1,326 @@
+import itertools
+import logging
+import math
 import os
+import sqlite3
+import threading
+import time
+from flask import current_app, has_app_context, request
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Column, Index, MetaData, Table, UniqueConstraint, event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+# Префикс ключей SQLALCHEMY_BINDS для реплик чтения (replica_0, replica_1, ...)
+REPLICA_BIND_PREFIX = 'replica_'
+
+# Время последней записи клиента (Unix-время) для read-your-writes. Сервер выставляет cookie
+# и заголовок ответа; клиенты без cookie (другой домен, API) возвращают заголовок в запросах
+LAST_WRITE_COOKIE = 'db_last_write'
+LAST_WRITE_HEADER = 'X-DB-Last-Write'
+
+
+class ReplicaRouter:
+    """
+    Выбор реплики для чтения: по кругу среди доступных. Реплика, к которой не удалось
+    подключиться, исключается на DATABASE_REPLICA_RETRY секунд.
+    """
+
+    def __init__(self, engines, retry_after, sticky_seconds):
+        self.engines = engines
+        self.retry_after = retry_after
+        self.sticky_seconds = sticky_seconds
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._down_until = {}  # реплика -> время возвращения в ротацию (monotonic)
+        self.stats = {'replica_reads': 0, 'primary_reads': 0, 'failovers': 0}
+
+    def candidates(self):
+        """Доступные реплики по кругу, начиная со следующей"""
+        start = next(self._next)
+        now = time.monotonic()
+        with self._lock:
+            return [
+                engine for engine in (self.engines[(start + i) % len(self.engines)] for i in range(len(self.engines)))
+                if self._down_until.get(engine, 0) <= now
+            ]
+
+    def mark_down(self, engine, error):
+        with self._lock:
+            self._down_until[engine] = time.monotonic() + self.retry_after
+            self.stats['failovers'] += 1
+        logger.warning('Реплика %s недоступна, исключена на %s с: %s',
+                       engine.url.render_as_string(hide_password=True), self.retry_after, error)
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def is_sticky(self, last_write):
+        """Клиент писал меньше sticky_seconds назад: его чтения идут в основную БД"""
+        return time.time() - last_write < self.sticky_seconds
+
+
+def _last_write():
+    """
+    Время последней записи клиента из заголовка или cookie (0, если нет или некорректно).
+    Отметка приходит с клиентом, поэтому действует в любом воркере и процессе.
+    """
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+class RoutingSession(Session):
+    """
+    Сессия, отправляющая чтения GET-запросов на реплики. Запись (flush, INSERT/UPDATE/DELETE)
+    всегда идет в основную БД, и после нее все запросы сессии до конца HTTP-запроса тоже.
+    Без настроенных реплик ведет себя как обычная сессия Flask-SQLAlchemy.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        router = current_app.extensions.get('db_router') if bind is None and has_app_context() else None
+        if router is None:
+            return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+        if self._flushing or not getattr(clause, 'is_select', False):
+            self.info['wrote'] = True
+        if self.info.get('wrote') or not self.info.get('replica_allowed'):
+            return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+        if 'replica' not in self.info:
+            self.info['replica'] = self._connect_replica(router)
+        if self.info['replica'] is None:
+            router.count('primary_reads')
+            return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+        router.count('replica_reads')
+        return self.info['replica']
+
+    def _connect_replica(self, router):
+        """Подключение к первой доступной реплике; None — читать из основной БД"""
+        for engine in router.candidates():
+            try:
+                self.connection(bind_arguments={'bind': engine})
+                return engine
+            except DBAPIError as error:
+                router.mark_down(engine, error)
+        return None
+
 
 # Инициализация SQLAlchemy
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
-def init_db(app):
+def _is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+def _sqlite_pragma_listener(pragmas):
+    """Обработчик события connect, выполняющий PRAGMA профиля SQLite"""
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return set_pragmas
+
+def apply_engine_profile(app):
     """
-    Инициализация базы данных с приложением Flask
+    Применение профиля движка из конфигурации.
+    Для серверных БД параметры пула передаются в SQLALCHEMY_ENGINE_OPTIONS
+    (до db.init_app); явно заданные там значения имеют приоритет.
+    Реплики из DATABASE_REPLICA_URLS добавляются в SQLALCHEMY_BINDS с тем же профилем.
     """
-    # Создаем директорию для базы данных, если она не существует
-    instance_path = os.path.join(os.path.dirname(app.root_path), 'instance')
-    os.makedirs(instance_path, exist_ok=True)
+    if not _is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        options = dict(app.config.get('DATABASE_POOL_OPTIONS', {}))
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
     
-    db.init_app(app)
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, url in enumerate(app.config.get('DATABASE_REPLICA_URLS', [])):
+        options = {} if _is_sqlite(url) else dict(app.config.get('DATABASE_POOL_OPTIONS', {}))
+        binds[f'{REPLICA_BIND_PREFIX}{index}'] = dict(options, url=url)
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+def _replica_engines():
+    return [engine for key, engine in sorted(db.engines.items(), key=lambda item: str(item[0]))
+            if key and key.startswith(REPLICA_BIND_PREFIX)]
+
+def register_engine_events(app):
+    """Подключение PRAGMA профиля SQLite к движкам приложения и реплик (после db.init_app)"""
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
     
-    # Создаем таблицы при запуске приложения
     with app.app_context():
-        # Импортируем модели внутри функции, чтобы избежать циклического импорта
-        from models.user import User
-        from models.match import Match
-        from models.prediction import Prediction
-        
-        # Создаем все таблицы
-        db.create_all()
-        
-        # Проверяем, пустая ли база данных
-        if User.query.count() == 0:
-            create_test_data()
-
-def create_test_data():
-    """
-    Создание тестовых данных для БД
-    """
-    # Импортируем модели
-    from models.user import User
-    from models.match import Match
-    from models.prediction import Prediction
-    
-    # Создаем тестовых пользователей
-    admin = User(
-        username='admin',
-        email='admin@example.com',
-        is_admin=True
+        for engine in [db.engine] + _replica_engines():
+            if engine.url.get_backend_name() == 'sqlite':
+                event.listen(engine, 'connect', _sqlite_pragma_listener(pragmas))
+
+def _start_request():
+    session = db.session()
+    session.info.pop('wrote', None)
+    session.info.pop('replica', None)
+    # Чтения с реплик — только для GET-запросов клиентов, которые недавно не писали
+    session.info['replica_allowed'] = (
+        request.method in ('GET', 'HEAD') and not current_app.extensions['db_router'].is_sticky(_last_write())
     )
-    admin.set_password('adminpass')
+
+def _finish_request(response):
+    session = db.session()
+    if session.info.pop('wrote', False):
+        # Отметка записи уходит клиенту: следующий запрос может попасть в другой воркер
+        written_at = f'{time.time():.3f}'
+        sticky_seconds = current_app.extensions['db_router'].sticky_seconds
+        response.set_cookie(LAST_WRITE_COOKIE, written_at, max_age=max(1, math.ceil(sticky_seconds)),
+                            httponly=True, samesite='Lax')
+        response.headers[LAST_WRITE_HEADER] = written_at
+    session.info.pop('replica_allowed', None)
+    session.info.pop('replica', None)
+    return response
+
+def init_read_replicas(app):
+    """Маршрутизация чтений на реплики, если они настроены (после db.init_app)"""
+    with app.app_context():
+        engines = _replica_engines()
+    if not engines:
+        return
     
-    user1 = User(
-        username='user1',
-        email='user1@example.com'
+    # Схема реплик — схема основной БД: пустые метаданные их ключей убираются,
+    # чтобы create_all/drop_all не обращались к репликам
+    for key in list(db.metadatas):
+        if key and key.startswith(REPLICA_BIND_PREFIX):
+            del db.metadatas[key]
+    
+    router = ReplicaRouter(
+        engines, app.config['DATABASE_REPLICA_RETRY'], app.config['DATABASE_REPLICA_STICKY_SECONDS']
     )
-    user1.set_password('user1pass')
+    app.extensions['db_router'] = router
+    
+    # Реплика, оборвавшая соединение посреди запроса, тоже исключается из ротации
+    def handle_error(context):
+        if context.is_disconnect and context.engine is not None:
+            router.mark_down(context.engine, context.original_exception)
     
-    db.session.add_all([admin, user1])
+    for engine in engines:
+        event.listen(engine, 'handle_error', handle_error)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+def sync_sqlite_replicas():
+    """
+    Копирование основной SQLite-базы в файлы реплик (online backup API) —
+    для локальной проверки чтения с реплик без настоящей репликации.
+    Возвращает число обновленных реплик.
+    """
+    if db.engine.url.get_backend_name() != 'sqlite':
+        raise ValueError('Синхронизация реплик поддерживается только для SQLite')
+    
+    synced = 0
+    source = db.engine.raw_connection()
+    try:
+        for engine in _replica_engines():
+            if engine.url.get_backend_name() != 'sqlite':
+                continue
+            engine.dispose()
+            # Реплика может быть открыта только на чтение (sqlite:///file:replica.db?mode=ro&uri=true)
+            path = engine.url.database
+            target = sqlite3.connect(path[5:] if engine.url.query.get('uri') else path)
+            try:
+                source.driver_connection.backup(target)
+            finally:
+                target.close()
+            synced += 1
+    finally:
+        source.close()
+    return synced
+
+def init_db(app):
+    """
+    Инициализация базы данных с приложением Flask
+    """
+    # Создаем директорию для базы данных, если она не существует
+    instance_path = os.path.join(os.path.dirname(app.root_path), 'instance')
+    os.makedirs(instance_path, exist_ok=True)
     
-    # Создаем тестовые матчи (прошедшие и будущие)
-    past_matches = [
-        Match(
-            home_team='Барселона',
-            away_team='Бавария',
-            home_score=2,
-            away_score=1,
-            match_date=datetime(2024, 9, 15, 20, 0),
-            status='finished'
-        ),
-        Match(
-            home_team='ПСЖ',
-            away_team='Манчестер Сити',
-            home_score=0,
-            away_score=2,
-            match_date=datetime(2024, 9, 16, 20, 0),
-            status='finished'
-        )
-    ]
+    apply_engine_profile(app)
+    db.init_app(app)
+    register_engine_events(app)
+    init_read_replicas(app)
     
-    upcoming_matches = [
-        Match(
-            home_team='Реал Мадрид',
-            away_team='Ливерпуль',
-            match_date=datetime(2025, 4, 15, 20, 0),
-            status='scheduled'
-        ),
-        Match(
-            home_team='Арсенал',
-            away_team='Интер',
-            match_date=datetime(2025, 4, 16, 20, 0),
-            status='scheduled'
-        )
-    ]
+    # Импортируем модели, чтобы они были зарегистрированы в метаданных
+    import models  # noqa: F401
     
-    db.session.add_all(past_matches + upcoming_matches)
+    # Схема и тестовые данные создаются командами `flask init-db` и `flask seed`;
+    # при старте воркера база не трогается. Для разработки и тестов оставлен автозапуск
+    if app.config.get('DATABASE_AUTO_BOOTSTRAP'):
+        with app.app_context():
+            upgrade_schema()
+            seed_test_data()
+
+def _missing_indexes(inspector):
+    """Индексы из моделей, которых нет в существующих таблицах (create_all их не добавляет)"""
+    existing_tables = set(inspector.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                yield index
+
+def _missing_unique_constraints(inspector):
+    """
+    Уникальные ограничения, отсутствующие в существующих таблицах.
+    ALTER TABLE ... ADD CONSTRAINT в SQLite недоступен, поэтому они
+    создаются как уникальные индексы с тем же именем.
+    """
+    existing_tables = set(inspector.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        covered = {tuple(c['column_names']) for c in inspector.get_unique_constraints(table.name)}
+        covered |= {tuple(i['column_names']) for i in inspector.get_indexes(table.name) if i['unique']}
+        for constraint in table.constraints:
+            if not isinstance(constraint, UniqueConstraint) or not constraint.name:
+                continue
+            columns = tuple(column.name for column in constraint.columns)
+            if columns not in covered:
+                # Индекс строится на отдельной копии таблицы, чтобы не менять метаданные моделей
+                detached = Table(table.name, MetaData(), *(Column(c.name, c.type) for c in constraint.columns))
+                yield Index(constraint.name, *detached.c, unique=True)
+
+def upgrade_schema():
+    """
+    Приведение схемы к моделям: создание недостающих таблиц, индексов и
+    уникальных ограничений. Идемпотентно; возвращает имена созданных индексов.
+    """
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        pending = list(_missing_indexes(inspector)) + list(_missing_unique_constraints(inspector))
+        db.metadata.create_all(connection)
+        for index in pending:
+            index.create(connection)
+    return [index.name for index in pending]
+
+def seed_test_data(**volume):
+    """Заполнение пустой базы тестовыми данными; возвращает число созданных записей или None"""
+    from models.user import User
     
-    # Создаем тестовые прогнозы для будущих матчей
-    predictions = [
-        Prediction(
-            user_id=2,  # user1
-            match_id=3,  # Реал Мадрид - Ливерпуль
-            home_score=3,
-            away_score=1,
-            comment='Думаю, Реал уверенно победит дома'
-        ),
-        Prediction(
-            user_id=1,  # admin
-            match_id=3,  # Реал Мадрид - Ливерпуль
-            home_score=2,
-            away_score=2,
-            comment='Будет ничья с голами'
-        )
-    ]
+    if db.session.query(User.query.exists()).scalar():
+        return None
+    return create_test_data(**volume)
+
+def create_test_data(users=0, matches=0, predictions=0, seed=42):
+    """
+    Создание тестовых данных для БД: демонстрационные пользователи admin и user1,
+    матчи и прогнозы, а также (по запросу) синтетический объем для нагрузочных проверок
+    """
+    from utils.datagen import generate
     
-    db.session.add_all(predictions)
-    db.session.commit()
\ No newline at end of file
+    return generate(users=users, matches=matches, predictions=predictions, seed=seed)
@@ -1,5 +1,11 @@
 from models.user import User
 from models.match import Match
 from models.prediction import Prediction
+from models.leaderboard import LeaderboardEntry
+from models.team import Team, TeamTrigram
+from models.table_version import TableVersion
+from models.match_event import MatchEvent
+from models.job import Job
+from models.user_stats import UserStats
 
-__all__ = ['User', 'Match', 'Prediction']
\ No newline at end of file
+__all__ = ['User', 'Match', 'Prediction', 'LeaderboardEntry', 'Team', 'TeamTrigram', 'TableVersion', 'MatchEvent', 'Job', 'UserStats']
\ No newline at end of file
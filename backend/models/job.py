@@ -0,0 +1,46 @@
+from database import db
+from datetime import datetime
+
+class Job(db.Model):
+    """Фоновая задача в очереди на базе таблицы (выполняется командой flask scheduler)"""
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # score_match, rebuild_leaderboard
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    # Ключ дедупликации ожидающей задачи: повторная постановка не создает дубль.
+    # Сбрасывается, когда задача взята в работу
+    dedupe_key = db.Column(db.String(100), nullable=True, unique=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Не раньше этого времени
+    locked_by = db.Column(db.String(100), nullable=True)  # Процесс планировщика, выполняющий задачу
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Выборка очередной задачи и подсчет очереди
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+    def to_dict(self):
+        """Сериализация модели в словарь"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,32 @@
+from database import db
+from datetime import datetime
+
+class LeaderboardEntry(db.Model):
+    """Материализованная строка таблицы лидеров (агрегат по пользователю)"""
+    __tablename__ = 'leaderboard'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    total_points = db.Column(db.Integer, nullable=False, default=0)
+    predictions_count = db.Column(db.Integer, nullable=False, default=0)  # Количество оцененных прогнозов
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Индекс повторяет порядок сортировки таблицы лидеров: страницы и ранг читаются по нему
+    __table_args__ = (
+        db.Index('ix_leaderboard_rank', total_points.desc(), user_id),
+    )
+
+    # Отношения
+    user = db.relationship('User', lazy='joined', innerjoin=True)
+
+    def to_dict(self, rank=None):
+        """Сериализация модели в словарь"""
+        return {
+            'rank': rank,
+            'user_id': self.user_id,
+            'username': self.user.username,
+            'total_points': self.total_points,
+            'predictions_count': self.predictions_count
+        }
+
+    def __repr__(self):
+        return f'<LeaderboardEntry user={self.user_id} points={self.total_points}>'
@@ -17,6 +17,15 @@ class Match(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Фильтры прошедших/предстоящих матчей и keyset-пагинация по (match_date, id)
+        db.Index('ix_matches_match_date', 'match_date', 'id'),
+        db.Index('ix_matches_status_date', 'status', 'match_date'),
+        # Фильтр по команде (названия из справочника teams) и поиск матча по составу и дате
+        db.Index('ix_matches_fixture', 'home_team', 'away_team', 'match_date'),
+        db.Index('ix_matches_away_team', 'away_team', 'match_date'),
+    )
+    
     # Отношения
     predictions = db.relationship('Prediction', backref='match', lazy=True, cascade='all, delete-orphan')
     
@@ -0,0 +1,27 @@
+from database import db
+from datetime import datetime
+
+class MatchEvent(db.Model):
+    """Изменение счета или статуса матча для потока live-обновлений (id — id SSE-события)"""
+    __tablename__ = 'match_events'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Без внешнего ключа: событие об удаленном матче остается в журнале для дочитывания клиентами
+    match_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=True)
+    home_score = db.Column(db.Integer, nullable=True)
+    away_score = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def to_dict(self):
+        """Сериализация события в словарь (небольшая дельта вместо полного матча)"""
+        return {
+            'match_id': self.match_id,
+            'status': self.status,
+            'home_score': self.home_score,
+            'away_score': self.away_score,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<MatchEvent {self.id} match={self.match_id}>'
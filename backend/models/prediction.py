@@ -16,6 +16,15 @@ class Prediction(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Один прогноз пользователя на матч; индекс также обслуживает поиск по user_id
+        db.UniqueConstraint('user_id', 'match_id', name='uq_predictions_user_match'),
+        # Начисление очков и удаление матча
+        db.Index('ix_predictions_match_id', 'match_id'),
+        # Постраничная выдача прогнозов пользователя по (created_at, id)
+        db.Index('ix_predictions_user_created', 'user_id', 'created_at', 'id'),
+    )
+    
     @property
     def prediction_result(self):
         """Результат прогноза (если матч завершен)"""
@@ -0,0 +1,37 @@
+from database import db
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+
+# INSERT с ON CONFLICT по диалекту основной базы
+_UPSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+class TableVersion(db.Model):
+    """Счетчик изменений таблицы (основа ETag и инвалидации кэша ответов)"""
+    __tablename__ = 'table_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def current(cls, name):
+        """Текущая версия таблицы и время последнего изменения"""
+        row = db.session.query(cls.version, cls.updated_at).filter(cls.name == name).first()
+        return (row.version, row.updated_at) if row else (0, None)
+
+    @classmethod
+    def bump(cls, name):
+        """
+        Увеличение версии таблицы в текущей транзакции (коммит выполняет вызывающий код).
+        Один INSERT ... ON CONFLICT: первые конкурентные записи не падают на первичном ключе.
+        """
+        now = datetime.utcnow()
+        statement = _UPSERTS[db.engine.dialect.name](cls).values(name=name, version=1, updated_at=now)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[cls.name],
+            set_={'version': cls.version + 1, 'updated_at': now}
+        ))
+
+    def __repr__(self):
+        return f'<TableVersion {self.name}={self.version}>'
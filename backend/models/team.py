@@ -0,0 +1,27 @@
+from database import db
+from datetime import datetime
+
+class Team(db.Model):
+    """Справочник команд для поиска и автодополнения"""
+    __tablename__ = 'teams'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)  # Название как в матчах
+    name_norm = db.Column(db.String(100), nullable=False, index=True)  # Нормализованное название (casefold)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Отношения
+    trigrams = db.relationship('TeamTrigram', backref='team', lazy=True, cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f'<Team {self.name}>'
+
+class TeamTrigram(db.Model):
+    """Триграммы нормализованного названия команды (индекс поиска по подстроке)"""
+    __tablename__ = 'team_trigrams'
+
+    trigram = db.Column(db.String(3), primary_key=True)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id', ondelete='CASCADE'), primary_key=True)
+
+    def __repr__(self):
+        return f'<TeamTrigram {self.trigram} team={self.team_id}>'
@@ -1,3 +1,4 @@
+from flask import current_app
 from database import db
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
@@ -19,7 +20,11 @@ class User(db.Model):
     
     def set_password(self, password):
         """Установка хеша пароля"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(
+            password,
+            method=current_app.config['PASSWORD_HASH_METHOD'],
+            salt_length=current_app.config['PASSWORD_SALT_LENGTH']
+        )
         
     def check_password(self, password):
         """Проверка пароля"""
@@ -0,0 +1,46 @@
+from database import db
+from datetime import datetime
+
+# Значение stage у строки с итогами по всем стадиям
+ALL_STAGES = ''
+
+class UserStats(db.Model):
+    """
+    Материализованная статистика прогнозов пользователя: строка итогов (stage = '')
+    и строки по стадиям турнира. Обновляется при начислении очков за матч.
+    """
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    stage = db.Column(db.String(50), primary_key=True, default=ALL_STAGES)
+    predictions_count = db.Column(db.Integer, nullable=False, default=0)  # Количество оцененных прогнозов
+    exact_count = db.Column(db.Integer, nullable=False, default=0)  # Угадан точный счет (3 очка)
+    outcome_count = db.Column(db.Integer, nullable=False, default=0)  # Угадан только исход (1 очко)
+    total_points = db.Column(db.Integer, nullable=False, default=0)
+    # Серия прогнозов подряд с очками (по дате матча) — только в строке итогов
+    current_streak = db.Column(db.Integer, nullable=False, default=0)
+    # Последний учтенный в серии матч: по нему проверяется, что очки начисляются по порядку дат
+    last_match_date = db.Column(db.DateTime, nullable=True)
+    last_match_id = db.Column(db.Integer, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def accuracy(self):
+        """Доля прогнозов с очками, в процентах"""
+        if not self.predictions_count:
+            return None
+        return round(100 * (self.exact_count + self.outcome_count) / self.predictions_count, 1)
+
+    def to_dict(self):
+        """Сериализация модели в словарь"""
+        return {
+            'predictions_count': self.predictions_count,
+            'exact_count': self.exact_count,
+            'outcome_count': self.outcome_count,
+            'missed_count': self.predictions_count - self.exact_count - self.outcome_count,
+            'total_points': self.total_points,
+            'accuracy': self.accuracy
+        }
+
+    def __repr__(self):
+        return f'<UserStats user={self.user_id} stage={self.stage!r} points={self.total_points}>'
@@ -1,5 +1,6 @@
 from routes.auth import auth_bp
 from routes.matches import matches_bp
 from routes.predictions import predictions_bp
+from routes.jobs import jobs_bp
 
-__all__ = ['auth_bp', 'matches_bp', 'predictions_bp']
\ No newline at end of file
+__all__ = ['auth_bp', 'matches_bp', 'predictions_bp', 'jobs_bp']
\ No newline at end of file
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
 from database import db
 from models.user import User
+from utils.auth_utils import forget_user, get_user_data, token_claims
+from services.auth_service import get_password_hasher
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
@@ -25,9 +27,9 @@ def register():
     # Создаем нового пользователя
     user = User(
         username=data['username'],
-        email=data['email']
+        email=data['email'],
+        password_hash=get_password_hasher().hash(data['password'])
     )
-    user.set_password(data['password'])
     
     db.session.add(user)
     db.session.commit()
@@ -46,16 +48,23 @@ def login():
     # Находим пользователя
     user = User.query.filter_by(username=data['username']).first()
     
-    # Проверяем пароль
-    if not user or not user.check_password(data['password']):
+    # Проверяем пароль (в пуле процессов хеширования)
+    hasher = get_password_hasher()
+    if not user or not hasher.verify(user.password_hash, data['password']):
         return jsonify({'message': 'Неверное имя пользователя или пароль'}), 401
     
+    # Хеш со старыми параметрами прозрачно пересчитываем, пока известен пароль
+    if hasher.needs_rehash(user.password_hash):
+        user.password_hash = hasher.hash(data['password'])
+    
     # Обновляем время последнего входа
     user.last_login = datetime.utcnow()
     db.session.commit()
+    forget_user(user.id)
     
-    # Создаем JWT токены
-    access_token = create_access_token(identity=user.id)
+    # Создаем JWT токены; роль передается в claims access-токена, чтобы не читать ее из БД
+    # на каждом запросе. В refresh-токен роль не пишется: она перечитывается при обновлении
+    access_token = create_access_token(identity=user.id, additional_claims=token_claims(user))
     refresh_token = create_refresh_token(identity=user.id)
     
     return jsonify({
@@ -70,7 +79,14 @@ def login():
 def refresh():
     """Обновление access токена"""
     current_user_id = get_jwt_identity()
-    access_token = create_access_token(identity=current_user_id)
+    
+    # Роль читается из БД, а не из refresh-токена: refresh-токен живет 30 дней,
+    # и отозванные права администратора не должны продлеваться вместе с ним
+    user = db.session.get(User, current_user_id)
+    if not user:
+        return jsonify({'message': 'Пользователь не найден'}), 404
+    
+    access_token = create_access_token(identity=current_user_id, additional_claims=token_claims(user))
     
     return jsonify({'access_token': access_token}), 200
 
@@ -79,12 +95,12 @@ def refresh():
 def me():
     """Получение информации о текущем пользователе"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_user_data(current_user_id)
     
     if not user:
         return jsonify({'message': 'Пользователь не найден'}), 404
     
-    return jsonify(user.to_dict()), 200
+    return jsonify(user), 200
 
 @auth_bp.route('/change-password', methods=['PUT'])
 @jwt_required()
@@ -101,10 +117,12 @@ def change_password():
     if not all(k in data for k in ('current_password', 'new_password')):
         return jsonify({'message': 'Не все обязательные поля заполнены'}), 400
     
-    if not user.check_password(data['current_password']):
+    hasher = get_password_hasher()
+    if not hasher.verify(user.password_hash, data['current_password']):
         return jsonify({'message': 'Текущий пароль неверен'}), 401
     
-    user.set_password(data['new_password'])
+    user.password_hash = hasher.hash(data['new_password'])
     db.session.commit()
+    forget_user(user.id)
     
     return jsonify({'message': 'Пароль успешно изменен'}), 200
\ No newline at end of file
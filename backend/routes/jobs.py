@@ -0,0 +1,57 @@
+from flask import Blueprint, request, jsonify
+from database import db
+from models.job import Job
+from services import job_service
+from utils.auth_utils import admin_required
+from utils.validators import parse_int
+
+jobs_bp = Blueprint('jobs', __name__)
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+@jobs_bp.route('', methods=['GET'])
+@admin_required
+def get_jobs():
+    """Список фоновых задач, новые первыми (только для админов)"""
+    try:
+        limit = parse_int(request.args.get('limit'), default=50, min_value=1, max_value=200)
+    except ValueError:
+        return jsonify({'message': 'Параметр limit должен быть целым числом'}), 400
+    
+    query = Job.query
+    status = request.args.get('status')
+    if status:
+        if status not in JOB_STATUSES:
+            return jsonify({'message': 'Некорректный статус задачи'}), 400
+        query = query.filter(Job.status == status)
+    if request.args.get('kind'):
+        query = query.filter(Job.kind == request.args['kind'])
+    
+    jobs = query.order_by(Job.id.desc()).limit(limit).all()
+    return jsonify([job.to_dict() for job in jobs]), 200
+
+@jobs_bp.route('/metrics', methods=['GET'])
+@admin_required
+def get_job_metrics():
+    """Размер очереди и задержка выполнения задач (только для админов)"""
+    return jsonify(job_service.metrics()), 200
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+@admin_required
+def get_job(job_id):
+    """Состояние задачи (только для админов)"""
+    job = db.session.get(Job, job_id)
+    
+    if not job:
+        return jsonify({'message': 'Задача не найдена'}), 404
+    
+    return jsonify(job.to_dict()), 200
+
+@jobs_bp.route('/rebuild-leaderboard', methods=['POST'])
+@admin_required
+def rebuild_leaderboard():
+    """Постановка пересчета таблицы лидеров в очередь планировщика (только для админов)"""
+    job = job_service.enqueue('rebuild_leaderboard', dedupe_key='rebuild_leaderboard')
+    db.session.commit()
+    
+    return jsonify(job.to_dict()), 202
@@ -1,13 +1,87 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from database import db
 from models.match import Match
-from models.user import User
+from services import calendar_service, leaderboard_service, live_service, match_service, stats_service, team_service
+from utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, keyset_filter, paginate
+from utils.validators import parse_int
+from utils.auth_utils import admin_required
+from utils.http_cache import (
+    MATCH_LIST_TAG, cached_response, calendar_versions, invalidate_matches, match_tag, matches_version,
+    touch_calendar, touch_matches
+)
+from utils.serializers import MATCH_COLUMNS, encode_match, encode_matches, iter_match_fragments
 from datetime import datetime
 
 matches_bp = Blueprint('matches', __name__)
 
+# Размер пачки строк, которую серверный курсор отдает при потоковой выдаче
+STREAM_BATCH_SIZE = 500
+
+def _stream_matches(query):
+    """Потоковая выдача JSON-массива матчей по серверному курсору"""
+    fragments = iter_match_fragments(query.yield_per(STREAM_BATCH_SIZE))
+
+    def generate():
+        yield '['
+        first = True
+        for fragment in fragments:
+            yield ('' if first else ',') + fragment
+            first = False
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def _list_matches(query, descending):
+    """
+    Постраничная выдача матчей с keyset-пагинацией по (match_date, id).
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    С параметром stream=1 весь результат (начиная с курсора) отдается потоком.
+    query выбирает столбцы MATCH_COLUMNS.
+    """
+    try:
+        limit = parse_int(request.args.get('limit'), default=100, min_value=1, max_value=500)
+    except ValueError:
+        return jsonify({'message': 'Параметр limit должен быть целым числом'}), 400
+
+    cursor_values = None
+    if request.args.get('cursor'):
+        try:
+            cursor_values = decode_cursor(request.args['cursor'], (datetime, int))
+        except ValueError:
+            return jsonify({'message': 'Некорректный курсор'}), 400
+
+    columns = (Match.match_date, Match.id)
+
+    if request.args.get('stream') in ('1', 'true'):
+        if cursor_values is not None:
+            query = query.filter(keyset_filter(columns, cursor_values, descending))
+        query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+        return _stream_matches(query)
+
+    matches, next_cursor = paginate(query, columns, cursor_values, limit, descending)
+
+    response = jsonify(encode_matches(matches))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response, 200
+
+def _list_version():
+    """Версия данных для ETag списков матчей"""
+    return matches_version()
+
+def _list_tags():
+    return {MATCH_LIST_TAG}
+
+def _match_version(id):
+    """Версия данных для ETag отдельного матча — время его последнего изменения"""
+    updated_at = db.session.query(Match.updated_at).filter(Match.id == id).scalar()
+    return (updated_at.isoformat(), updated_at) if updated_at else None
+
+def _match_tags(id):
+    return {match_tag(id)}
+
 @matches_bp.route('/matches', methods=['GET'])
+@cached_response(_list_version, _list_tags)
 def get_matches():
     """Получение всех матчей"""
     # Параметры фильтрации
@@ -16,19 +90,21 @@ def get_matches():
     from_date = request.args.get('from_date')
     to_date = request.args.get('to_date')
     
-    # Базовый запрос
-    query = Match.query
+    # Базовый запрос: только столбцы, без ORM-объектов
+    query = db.session.query(*MATCH_COLUMNS)
     
     # Применяем фильтры
+    descending = True
     if status == 'past':
-        query = query.filter(Match.match_date < datetime.utcnow()).order_by(Match.match_date.desc())
+        query = query.filter(Match.match_date < datetime.utcnow())
     elif status == 'upcoming':
-        query = query.filter(Match.match_date > datetime.utcnow()).order_by(Match.match_date.asc())
-    else:
-        query = query.order_by(Match.match_date.desc())
+        query = query.filter(Match.match_date > datetime.utcnow())
+        descending = False
     
     if team:
-        query = query.filter((Match.home_team.ilike(f'%{team}%')) | (Match.away_team.ilike(f'%{team}%')))
+        # Подходящие названия ищутся по индексу справочника команд, матчи — по индексам home_team/away_team
+        names = team_service.find_team_names(team)
+        query = query.filter(Match.home_team.in_(names) | Match.away_team.in_(names))
     
     if from_date:
         try:
@@ -44,32 +120,106 @@ def get_matches():
         except ValueError:
             pass
     
-    # Выполняем запрос и форматируем результат
-    matches = query.all()
-    result = [match.to_dict() for match in matches]
+    return _list_matches(query, descending)
+
+def _calendar_args():
+    """Часовой пояс и диапазон дат календаря из параметров запроса (ValueError при ошибке)"""
+    tz = calendar_service.parse_timezone(request.args.get('tz'))
+    start, end = calendar_service.parse_range(request.args.get('from'), request.args.get('to'), tz)
+    return tz, start, end
+
+def _calendar_version():
+    """Версии месяцев календаря для ETag; при некорректных параметрах — без кэша"""
+    try:
+        _, start, end = _calendar_args()
+    except ValueError:
+        return None
+    return calendar_versions(calendar_service.months(start, end))
+
+def _calendar_tags():
+    # Версии месяцев входят в ключ кэша: устаревшие записи не читаются и вытесняются LRU
+    return set()
+
+@matches_bp.route('/calendar', methods=['GET'])
+@cached_response(_calendar_version, _calendar_tags)
+def get_calendar():
+    """
+    Календарь матчей по дням: from/to — местные даты (ГГГГ-ММ-ДД), tz — часовой пояс IANA.
+    Для каждого дня с матчами — количество и краткие данные матчей с местным временем начала.
+    """
+    try:
+        tz, start, end = _calendar_args()
+    except ValueError as error:
+        return jsonify({'message': str(error)}), 400
     
-    return jsonify(result), 200
+    return jsonify(calendar_service.get_calendar(tz, start, end)), 200
+
+@matches_bp.route('/teams', methods=['GET'])
+def get_teams():
+    """Автодополнение названий команд по префиксу"""
+    prefix = request.args.get('prefix', '')
+
+    try:
+        limit = parse_int(request.args.get('limit'), default=10, min_value=1, max_value=50)
+    except ValueError:
+        return jsonify({'message': 'Параметр limit должен быть целым числом'}), 400
+
+    return jsonify(team_service.autocomplete(prefix, limit)), 200
+
+@matches_bp.route('/live/stream', methods=['GET'])
+def live_stream():
+    """
+    Поток live-обновлений счета и статуса матчей (Server-Sent Events).
+    Переподключившийся клиент передает Last-Event-ID и получает пропущенные события.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    broker = live_service.get_live_broker()
+    
+    if last_event_id:
+        try:
+            position = parse_int(last_event_id, default=0, min_value=0)
+        except ValueError:
+            return jsonify({'message': 'Некорректный Last-Event-ID'}), 400
+    else:
+        position = broker.current_id()
+    
+    heartbeat = current_app.config['LIVE_STREAM_HEARTBEAT']
+    retry = current_app.config['LIVE_STREAM_RETRY']
+    
+    # Поток занимает соединение до отключения клиента: на воркерах с потоками их число ограничено
+    if not broker.acquire_stream():
+        response = jsonify({'message': 'Слишком много открытых потоков, повторите попытку позже'})
+        response.headers['Retry-After'] = str(retry // 1000)
+        return response, 503
+    
+    # Генератор не держит контекст запроса и сессию БД: ожидание идет на брокере
+    def generate(position):
+        yield f'retry: {retry}\n\n'
+        while True:
+            frames, position = broker.wait(position, heartbeat)
+            yield ''.join(frames) if frames else ': heartbeat\n\n'
+    
+    response = Response(generate(position), mimetype='text/event-stream')
+    response.call_on_close(broker.release_stream)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Без буферизации в nginx
+    return response
 
 @matches_bp.route('/matches/<int:id>', methods=['GET'])
+@cached_response(_match_version, _match_tags)
 def get_match(id):
     """Получение информации о конкретном матче"""
-    match = Match.query.get(id)
+    row = db.session.query(*MATCH_COLUMNS).filter(Match.id == id).first()
     
-    if not match:
+    if not row:
         return jsonify({'message': 'Матч не найден'}), 404
     
-    return jsonify(match.to_dict()), 200
+    return jsonify(encode_match(row)), 200
 
 @matches_bp.route('/matches', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_match():
     """Создание нового матча (только для админов)"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if not user or not user.is_admin:
-        return jsonify({'message': 'Доступ запрещен'}), 403
-    
     data = request.get_json()
     required_fields = ['home_team', 'away_team', 'match_date']
     
@@ -92,26 +242,27 @@ def create_match():
     )
     
     db.session.add(match)
+    team_service.register_teams([match.home_team, match.away_team])
+    touch_matches()
+    touch_calendar(match.match_date)
     db.session.commit()
+    invalidate_matches()
     
     return jsonify({'message': 'Матч успешно создан', 'match_id': match.id}), 201
 
 @matches_bp.route('/matches/<int:id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_match(id):
     """Обновление информации о матче (только для админов)"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if not user or not user.is_admin:
-        return jsonify({'message': 'Доступ запрещен'}), 403
-    
     match = Match.query.get(id)
     
     if not match:
         return jsonify({'message': 'Матч не найден'}), 404
     
     data = request.get_json()
+    live_before = {field: getattr(match, field) for field in live_service.LIVE_FIELDS}
+    calendar_before = (match.home_team, match.away_team, match.match_date)
+    stage_before = match.stage
     
     # Обновляем поля
     if 'home_team' in data:
@@ -134,52 +285,122 @@ def update_match(id):
     if 'status' in data:
         match.status = data['status']
     
-    db.session.commit()
+    if 'home_team' in data or 'away_team' in data:
+        team_service.register_teams([match.home_team, match.away_team])
+    
+    # Вклад уже оцененного матча переносится в статистику новой стадии и порядок серий — до
+    # начисления очков, которое считает разницу уже по новым стадии и дате
+    stats_service.move_match(match, stage_before, calendar_before[2])
     
-    # Если матч был завершен, обновляем очки для всех прогнозов
-    if match.status == 'finished' and match.home_score is not None and match.away_score is not None:
-        for prediction in match.predictions:
-            prediction.points_earned = prediction.calculate_points()
-        db.session.commit()
+    # Если матч был завершен, начисляем очки всем прогнозам одним запросом и коммитим
+    # вместе с изменениями матча (или ставим задачу планировщику при DEFERRED_SCORING)
+    match_service.apply_result(match)
+    
+    # Изменение счета или статуса уходит подписчикам потока live-обновлений
+    live_service.publish_match_update(
+        match, [field for field, value in live_before.items() if getattr(match, field) != value]
+    )
+    
+    touch_matches()
+    # Календарь показывает команды и время матча: месяцы старой и новой даты
+    if calendar_before != (match.home_team, match.away_team, match.match_date):
+        touch_calendar(calendar_before[2], match.match_date)
+    db.session.commit()
+    invalidate_matches(match.id)
+    live_service.notify_subscribers()
     
     return jsonify({'message': 'Матч успешно обновлен'}), 200
 
 @matches_bp.route('/matches/<int:id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_match(id):
     """Удаление матча (только для админов)"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    
-    if not user or not user.is_admin:
-        return jsonify({'message': 'Доступ запрещен'}), 403
-    
     match = Match.query.get(id)
     
     if not match:
         return jsonify({'message': 'Матч не найден'}), 404
     
+    # Очки удаляемых прогнозов вычитаем из таблицы лидеров и статистики пользователей
+    leaderboard_service.revoke_match(match.id)
+    stats_service.revoke_match(match)
+    
     db.session.delete(match)
+    touch_matches()
+    touch_calendar(match.match_date)
     db.session.commit()
+    invalidate_matches(id)
     
     return jsonify({'message': 'Матч успешно удален'}), 200
 
+# Максимальное число матчей в одном запросе ввода результатов
+MAX_BATCH_RESULTS = 64
+
+@matches_bp.route('/results', methods=['POST'])
+@admin_required
+def submit_results():
+    """
+    Ввод результатов нескольких матчей одним запросом (только для админов).
+    Тело: {"results": [{"match_id", "home_score"?, "away_score"?, "status"?}, ...]}.
+    Все изменения и начисление очков сохраняются одной транзакцией; при ошибке
+    в любом элементе не меняется ничего.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('results') if isinstance(data, dict) else None
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'message': 'Передайте непустой список results'}), 400
+    if len(items) > MAX_BATCH_RESULTS:
+        return jsonify({'message': f'Не больше {MAX_BATCH_RESULTS} матчей за запрос'}), 400
+    
+    report, errors = match_service.apply_results(items)
+    if errors:
+        return jsonify({'message': 'Результаты не сохранены', 'errors': errors}), 400
+    
+    return jsonify(dict(report, message='Результаты сохранены')), 200
+
+@matches_bp.route('/import', methods=['POST'])
+@admin_required
+def import_matches():
+    """
+    Импорт матчей из CSV/JSONL (только для админов).
+    Файл передается полем file (multipart) или телом запроса с Content-Type
+    text/csv / application/x-ndjson; формат можно указать параметром format.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        raw_stream = upload.stream
+        default_format = match_service.detect_format(upload.filename)
+    else:
+        raw_stream = request.stream
+        default_format = 'jsonl' if 'ndjson' in (request.mimetype or '') else 'csv'
+
+    fmt = request.args.get('format') or default_format
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({'message': f'Неподдерживаемый формат: {fmt}'}), 400
+
+    # Файл читается потоком и пишется пачками — память не зависит от его размера
+    stream = match_service.decode_lines(raw_stream)
+    report = match_service.import_fixtures(stream, fmt, current_app.config['IMPORT_BATCH_SIZE'])
+
+    # Строки до ошибки чтения уже сохранены: отчет показывает, где импорт остановился
+    if report['aborted']:
+        return jsonify(dict(report, message=f"Импорт прерван: {report['aborted']['message']}")), 400
+    return jsonify(dict(report, message='Импорт завершен')), 200
+
 @matches_bp.route('/past-matches', methods=['GET'])
+@cached_response(_list_version, _list_tags)
 def get_past_matches():
-    """Получение всех прошедших матчей"""
-    matches = Match.query.filter(
+    """Получение прошедших матчей (постранично)"""
+    query = db.session.query(*MATCH_COLUMNS).filter(
         (Match.match_date < datetime.utcnow()) | (Match.status == 'finished')
-    ).order_by(Match.match_date.desc()).all()
-    
-    result = [match.to_dict() for match in matches]
-    return jsonify(result), 200
+    )
+    return _list_matches(query, descending=True)
 
 @matches_bp.route('/upcoming-matches', methods=['GET'])
+@cached_response(_list_version, _list_tags)
 def get_upcoming_matches():
-    """Получение всех предстоящих матчей"""
-    matches = Match.query.filter(
+    """Получение предстоящих матчей (постранично)"""
+    query = db.session.query(*MATCH_COLUMNS).filter(
         (Match.match_date > datetime.utcnow()) & (Match.status != 'finished')
-    ).order_by(Match.match_date.asc()).all()
-    
-    result = [match.to_dict() for match in matches]
-    return jsonify(result), 200
\ No newline at end of file
+    )
+    return _list_matches(query, descending=False)
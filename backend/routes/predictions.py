@@ -1,133 +1,105 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database import db
 from models.prediction import Prediction
 from models.match import Match
-from models.user import User
+from services import leaderboard_service, prediction_service, stats_service
+from utils.validators import parse_int
+from utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, paginate
 from datetime import datetime
-import logging
 from flask import current_app
 
 # Create the Blueprint without duplicating the route prefix
 predictions_bp = Blueprint('predictions', __name__)
 
+def _serialize_prediction_row(row):
+    """Сериализация строки (прогноз + поля матча) из одного запроса с JOIN"""
+    match_data = {
+        'id': row.match_id,
+        'home_team': row.match_home_team,
+        'away_team': row.match_away_team,
+        'match_date': row.match_date.isoformat() if row.match_date else None,
+        'status': row.match_status
+    }
+    if row.match_home_score is not None:
+        match_data['home_score'] = row.match_home_score
+    if row.match_away_score is not None:
+        match_data['away_score'] = row.match_away_score
+
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'match_id': row.match_id,
+        'home_score': row.home_score,
+        'away_score': row.away_score,
+        'comment': row.comment,
+        'subject': row.subject,
+        'points_earned': row.points_earned,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+        'match': match_data
+    }
+
 @predictions_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_user_predictions():
-    """Получение всех прогнозов текущего пользователя"""
-    # Подробное логирование
-    current_app.logger.info("=== Starting get_user_predictions() ===")
-    
+    """
+    Получение прогнозов текущего пользователя (новые первыми).
+    Данные матча читаются тем же запросом; курсор следующей страницы
+    возвращается в заголовке X-Next-Cursor.
+    """
+    current_user_id = get_jwt_identity()
+    match_status = request.args.get('match_status')
+
     try:
-        # Детально логируем заголовки
-        current_app.logger.info(f"Request headers: {dict(request.headers)}")
-        
-        # Получаем ID текущего пользователя
-        current_user_id = get_jwt_identity()
-        current_app.logger.info(f"JWT identity (user_id): {current_user_id}")
-        
-        # Поиск пользователя
-        user = User.query.get(current_user_id)
-        if not user:
-            current_app.logger.warning(f"User not found. User ID: {current_user_id}")
-            return jsonify({'message': 'Пользователь не найден'}), 404
-            
-        current_app.logger.info(f"User found: {user.username}")
-        
-        # Проверка параметров запроса
-        match_status = request.args.get('match_status')
-        current_app.logger.info(f"Request params - match_status: {match_status}")
-        
-        # Базовый запрос
+        limit = parse_int(request.args.get('limit'), default=100, min_value=1, max_value=500)
+    except ValueError:
+        return jsonify({'message': 'Параметр limit должен быть целым числом'}), 400
+
+    cursor_values = None
+    if request.args.get('cursor'):
         try:
-            query = Prediction.query.filter_by(user_id=current_user_id)
-            current_app.logger.info(f"Base query created")
-            
-            # Объединяем с таблицей матчей для фильтрации
-            if match_status:
-                current_app.logger.info(f"Filtering by match_status: {match_status}")
-                
-                if match_status == 'past':
-                    query = query.join(Match).filter(
-                        (Match.match_date < datetime.utcnow()) | (Match.status == 'finished')
-                    )
-                elif match_status == 'upcoming':
-                    query = query.join(Match).filter(
-                        (Match.match_date > datetime.utcnow()) & (Match.status != 'finished')
-                    )
-                else:
-                    current_app.logger.warning(f"Invalid match_status: {match_status}")
-                    return jsonify({'message': f'Недопустимое значение match_status: {match_status}'}), 400
-            
-            # Выполняем запрос
-            current_app.logger.info("Executing query...")
-            predictions = query.all()
-            current_app.logger.info(f"Query returned {len(predictions)} predictions")
-            
-            # Форматируем результат
-            result = []
-            for prediction in predictions:
-                try:
-                    current_app.logger.info(f"Processing prediction ID: {prediction.id}")
-                    
-                    # Создаем базовый словарь вручную вместо вызова to_dict()
-                    prediction_data = {
-                        'id': prediction.id,
-                        'user_id': prediction.user_id,
-                        'match_id': prediction.match_id,
-                        'home_score': prediction.home_score,
-                        'away_score': prediction.away_score,
-                        'comment': prediction.comment,
-                        'points_earned': prediction.points_earned,
-                        'created_at': prediction.created_at.isoformat() if prediction.created_at else None,
-                        'updated_at': prediction.updated_at.isoformat() if prediction.updated_at else None
-                    }
-                    
-                    # Добавляем subject только если атрибут существует
-                    if hasattr(prediction, 'subject'):
-                        prediction_data['subject'] = prediction.subject
-                        
-                    # Безопасное получение данных матча
-                    try:
-                        if hasattr(prediction, 'match') and prediction.match:
-                            current_app.logger.info(f"Adding match data for match ID: {prediction.match_id}")
-                            match_data = {
-                                'id': prediction.match.id,
-                                'home_team': prediction.match.home_team,
-                                'away_team': prediction.match.away_team,
-                                'match_date': prediction.match.match_date.isoformat() if prediction.match.match_date else None,
-                                'status': prediction.match.status
-                            }
-                            
-                            # Добавляем дополнительные поля, если они есть
-                            if hasattr(prediction.match, 'home_score') and prediction.match.home_score is not None:
-                                match_data['home_score'] = prediction.match.home_score
-                            if hasattr(prediction.match, 'away_score') and prediction.match.away_score is not None:
-                                match_data['away_score'] = prediction.match.away_score
-                                
-                            prediction_data['match'] = match_data
-                        else:
-                            current_app.logger.warning(f"Match not found for prediction ID: {prediction.id}")
-                            prediction_data['match'] = None
-                    except Exception as match_error:
-                        current_app.logger.error(f"Error processing match data: {str(match_error)}")
-                        prediction_data['match'] = {'error': 'Unable to load match data'}
-                        
-                    result.append(prediction_data)
-                except Exception as pred_error:
-                    current_app.logger.error(f"Error processing prediction {prediction.id}: {str(pred_error)}")
-                    # Продолжаем с другими прогнозами
-            
-            current_app.logger.info("=== get_user_predictions() completed successfully ===")
-            return jsonify(result), 200
-            
-        except Exception as query_error:
-            current_app.logger.error(f"Database query error: {str(query_error)}")
-            return jsonify({'message': 'Ошибка при выполнении запроса к базе данных', 'error': str(query_error)}), 500
-            
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error in get_user_predictions(): {str(e)}")
-        return jsonify({'message': 'Произошла непредвиденная ошибка', 'error': str(e)}), 500
+            cursor_values = decode_cursor(request.args['cursor'], (datetime, int))
+        except ValueError:
+            return jsonify({'message': 'Некорректный курсор'}), 400
+
+    # Только нужные столбцы: без ORM-объектов и ленивых загрузок prediction.match
+    query = db.session.query(
+        Prediction.id,
+        Prediction.user_id,
+        Prediction.match_id,
+        Prediction.home_score,
+        Prediction.away_score,
+        Prediction.comment,
+        Prediction.subject,
+        Prediction.points_earned,
+        Prediction.created_at,
+        Prediction.updated_at,
+        Match.home_team.label('match_home_team'),
+        Match.away_team.label('match_away_team'),
+        Match.match_date.label('match_date'),
+        Match.status.label('match_status'),
+        Match.home_score.label('match_home_score'),
+        Match.away_score.label('match_away_score')
+    ).join(Match, Prediction.match_id == Match.id).filter(Prediction.user_id == current_user_id)
+
+    if match_status == 'past':
+        query = query.filter((Match.match_date < datetime.utcnow()) | (Match.status == 'finished'))
+    elif match_status == 'upcoming':
+        query = query.filter((Match.match_date > datetime.utcnow()) & (Match.status != 'finished'))
+    elif match_status:
+        return jsonify({'message': f'Недопустимое значение match_status: {match_status}'}), 400
+
+    rows, next_cursor = paginate(
+        query, (Prediction.created_at, Prediction.id), cursor_values, limit, descending=True
+    )
+    current_app.logger.debug('get_user_predictions: user=%s rows=%d', current_user_id, len(rows))
+
+    response = jsonify([_serialize_prediction_row(row) for row in rows])
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response, 200
 
 @predictions_bp.route('/<int:match_id>', methods=['POST'])
 @jwt_required()
@@ -144,11 +116,10 @@ def create_prediction(match_id):
     if match.match_date < datetime.utcnow():
         return jsonify({'message': 'Нельзя делать прогноз на прошедший матч'}), 400
 
-    # Проверка, что прогноз еще не существует
-    existing = Prediction.query.filter_by(user_id=current_user_id, match_id=match_id).first()
-    if existing:
-        return jsonify({'message': 'Прогноз для этого матча уже существует'}), 400
+    if not isinstance(data.get('home_score'), int) or not isinstance(data.get('away_score'), int):
+        return jsonify({'message': 'Счет прогноза должен быть целым числом'}), 400
 
+    # Повторный прогноз отсекает уникальный индекс (user_id, match_id) — без предварительного SELECT
     prediction = Prediction(
         user_id=current_user_id,
         match_id=match_id,
@@ -157,7 +128,11 @@ def create_prediction(match_id):
         comment=data.get('comment', '')
     )
     db.session.add(prediction)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Прогноз для этого матча уже существует'}), 400
 
     return jsonify({
         'id': prediction.id,
@@ -167,6 +142,41 @@ def create_prediction(match_id):
         'comment': prediction.comment
     }), 201
 
+# Наибольшее число прогнозов в одном пакетном запросе
+MAX_BATCH_PREDICTIONS = 64
+
+@predictions_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def submit_predictions_batch():
+    """
+    Прогнозы на несколько матчей (например, на весь игровой день) одним запросом.
+    Тело: {"predictions": [{"match_id", "home_score", "away_score", "comment"?}, ...]}.
+    Существующие прогнозы обновляются; все изменения сохраняются одной транзакцией.
+    """
+    current_user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    items = data.get('predictions') if isinstance(data, dict) else None
+
+    if not isinstance(items, list) or not items:
+        return jsonify({'message': 'Передайте непустой список predictions'}), 400
+    if len(items) > MAX_BATCH_PREDICTIONS:
+        return jsonify({'message': f'Не больше {MAX_BATCH_PREDICTIONS} прогнозов за запрос'}), 400
+
+    results = prediction_service.submit_batch(current_user_id, items)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Параллельный запрос успел создать прогноз на тот же матч
+        db.session.rollback()
+        return jsonify({'message': 'Прогнозы изменились во время сохранения, повторите запрос'}), 409
+
+    return jsonify({
+        'results': results,
+        'created': sum(1 for result in results if result['status'] == 'created'),
+        'updated': sum(1 for result in results if result['status'] == 'updated'),
+        'failed': sum(1 for result in results if result['status'] == 'error')
+    }), 200
+
 @predictions_bp.route('/<int:prediction_id>', methods=['PUT'])
 @jwt_required()
 def update_prediction(prediction_id):
@@ -193,4 +203,41 @@ def update_prediction(prediction_id):
         'home_score': prediction.home_score,
         'away_score': prediction.away_score,
         'comment': prediction.comment
-    }), 200
\ No newline at end of file
+    }), 200
+
+@predictions_bp.route('/stats', methods=['GET'])
+@jwt_required()
+def get_my_stats():
+    """
+    Статистика прогнозов текущего пользователя: точность, точные счета, исходы,
+    текущая серия и разбивка по стадиям (из материализованных строк user_stats)
+    """
+    return jsonify(stats_service.get_user_stats(get_jwt_identity())), 200
+
+@predictions_bp.route('/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """Получение страницы таблицы лидеров"""
+    try:
+        limit = parse_int(request.args.get('limit'), default=50, min_value=1, max_value=100)
+        offset = parse_int(request.args.get('offset'), default=0, min_value=0)
+    except ValueError:
+        return jsonify({'message': 'Параметры limit и offset должны быть целыми числами'}), 400
+
+    return jsonify(leaderboard_service.get_page(limit, offset)), 200
+
+@predictions_bp.route('/leaderboard/me', methods=['GET'])
+@jwt_required()
+def get_my_leaderboard_position():
+    """Ранг текущего пользователя и его соседи по таблице лидеров"""
+    current_user_id = get_jwt_identity()
+
+    try:
+        around = parse_int(request.args.get('around'), default=5, min_value=0, max_value=50)
+    except ValueError:
+        return jsonify({'message': 'Параметр around должен быть целым числом'}), 400
+
+    position = leaderboard_service.get_user_position(current_user_id, around)
+    if position is None:
+        return jsonify({'message': 'Пользователь еще не попал в таблицу лидеров'}), 404
+
+    return jsonify(position), 200
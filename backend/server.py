@@ -0,0 +1,63 @@
+"""
+Продакшен-сервер: приложение под gunicorn с предфоркнутыми воркерами.
+
+Параметры (число воркеров и потоков, таймауты, перезапуск воркеров по
+max_requests) берутся из конфигурации приложения. Плавный перезапуск
+воркеров — сигнал HUP мастер-процессу.
+
+Запуск из каталога backend:
+    FLASK_ENV=production python server.py
+"""
+import os
+
+from gunicorn.app.base import BaseApplication
+
+from config import config
+
+
+def server_options(settings):
+    """Настройки gunicorn из класса конфигурации"""
+    return {
+        'bind': settings.SERVER_BIND,
+        'workers': settings.SERVER_WORKERS,
+        'threads': settings.SERVER_THREADS,
+        'worker_class': settings.SERVER_WORKER_CLASS,
+        'worker_connections': settings.SERVER_WORKER_CONNECTIONS,
+        'timeout': settings.SERVER_TIMEOUT,
+        'graceful_timeout': settings.SERVER_GRACEFUL_TIMEOUT,
+        'keepalive': settings.SERVER_KEEPALIVE,
+        'max_requests': settings.SERVER_MAX_REQUESTS,
+        'max_requests_jitter': settings.SERVER_MAX_REQUESTS_JITTER,
+        'accesslog': '-' if settings.DEBUG else None,
+    }
+
+
+class ProductionServer(BaseApplication):
+    """
+    gunicorn, запускаемый из Python с настройками из Config.
+    Приложение создается в каждом воркере после fork (и после monkey-patching
+    воркера gevent), а не в мастер-процессе.
+    """
+
+    def __init__(self, config_name, options=None):
+        self.config_name = config_name
+        self.options = options if options is not None else server_options(config[config_name])
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from app import create_app
+        return create_app(self.config_name)
+
+
+def run_server(config_name='production'):
+    """Запуск приложения под продакшен-сервером (блокирует до остановки мастер-процесса)"""
+    ProductionServer(config_name).run()
+
+
+if __name__ == '__main__':
+    run_server(os.environ.get('FLASK_ENV', 'production'))
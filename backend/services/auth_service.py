@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusyError(Exception):
+    """Очередь хеширования паролей переполнена или ожидание превысило лимит"""
+
+
+def _run_in_worker(operation, args, deadline):
+    """
+    Выполнение операции в процессе пула.
+    Задача, простоявшая в очереди дольше лимита, не выполняется: клиент уже получил отказ.
+    Возвращает (результат, время начала, время окончания).
+    """
+    started = time.time()
+    if started > deadline:
+        return None, started, started
+
+    if operation == 'hash':
+        result = generate_password_hash(*args)
+    else:
+        result = check_password_hash(*args)
+
+    return result, started, time.time()
+
+
+class PasswordHasher:
+    """
+    Хеширование и проверка паролей в пуле процессов с ограниченной очередью.
+
+    PBKDF2 намеренно дорог по CPU: в пуле он не занимает рабочий поток запроса
+    и не конкурирует за GIL с остальными эндпоинтами. Одновременно в работе и в
+    очереди не больше workers + queue_size операций; ожидание места дольше
+    queue_timeout секунд завершается HashingBusyError.
+    При workers == 0 операции выполняются в текущем потоке.
+    """
+
+    def __init__(self, method, salt_length, workers, queue_size, queue_timeout):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size) if workers else None
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'rejected': 0,
+            'expired': 0,
+            'in_flight': 0,
+            'queue_seconds_total': 0.0,
+            'hash_seconds_total': 0.0
+        }
+
+    def _get_executor(self):
+        # Пул создается лениво и заново после fork: процессы пула не наследуются воркерами
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _record(self, **changes):
+        with self._lock:
+            for name, value in changes.items():
+                self._metrics[name] += value
+
+    def _run(self, operation, *args):
+        submitted = time.time()
+        self._record(submitted=1)
+
+        if not self.workers:
+            result, started, finished = _run_in_worker(operation, args, float('inf'))
+            self._record(completed=1, hash_seconds_total=finished - started)
+            return result
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._record(rejected=1)
+            raise HashingBusyError()
+
+        self._record(in_flight=1)
+        try:
+            deadline = submitted + self.queue_timeout
+            future = self._get_executor().submit(_run_in_worker, operation, args, deadline)
+            result, started, finished = future.result()
+        finally:
+            self._slots.release()
+            self._record(in_flight=-1)
+
+        self._record(queue_seconds_total=max(started - submitted, 0.0))
+        if finished == started and started > deadline:
+            self._record(expired=1)
+            raise HashingBusyError()
+
+        self._record(completed=1, hash_seconds_total=finished - started)
+        return result
+
+    def hash(self, password):
+        """Хеш пароля с текущими параметрами из Config"""
+        return self._run('hash', password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        """Проверка пароля по сохраненному хешу"""
+        return self._run('check', password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        Хеш создан с параметрами, отличными от текущих: другой метод, число итераций
+        или длина соли (формат werkzeug — метод$соль$хеш).
+        """
+        parts = password_hash.split('$', 2)
+        return len(parts) != 3 or parts[0] != self.method or len(parts[1]) != self.salt_length
+
+    def metrics(self):
+        """Снимок счетчиков пула хеширования"""
+        with self._lock:
+            return dict(self._metrics, workers=self.workers)
+
+
+def init_password_hasher(app):
+    """Создание пула хеширования паролей для приложения"""
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config['PASSWORD_SALT_LENGTH'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_size=app.config['PASSWORD_HASH_QUEUE_SIZE'],
+        queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT']
+    )
+
+
+def get_password_hasher():
+    return current_app.extensions['password_hasher']
@@ -0,0 +1,166 @@
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from flask import current_app
+from sqlalchemy import case, func, literal
+from database import db
+from models.match import Match
+from utils.cache import LRUCache
+from utils.http_cache import calendar_month, calendar_versions
+
+# Наибольший диапазон дат одного запроса календаря
+MAX_CALENDAR_DAYS = 100
+# Шаг поиска переходов на летнее/зимнее время (переходы не бывают чаще)
+_OFFSET_STEP = timedelta(hours=6)
+
+
+def init_calendar_cache(app):
+    """Кэш календаря по месяцам: (пояс, месяц, версия месяца) -> матчи по дням"""
+    app.extensions['calendar_months'] = LRUCache(app.config['CALENDAR_CACHE_SIZE'])
+
+
+def calendar_cache():
+    return current_app.extensions['calendar_months']
+
+
+def parse_timezone(name):
+    """Часовой пояс IANA (Europe/Moscow); по умолчанию UTC. Неизвестный пояс — ValueError"""
+    try:
+        return ZoneInfo(name or 'UTC')
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f'Неизвестный часовой пояс: {name}') from None
+
+
+def parse_range(from_value, to_value, tz):
+    """
+    Диапазон местных дат (ГГГГ-ММ-ДД) включительно; по умолчанию — текущий месяц в поясе tz.
+    Ошибки формата и слишком длинный диапазон — ValueError.
+    """
+    try:
+        today = datetime.now(tz).date()
+        start = date.fromisoformat(from_value) if from_value else today.replace(day=1)
+        end = date.fromisoformat(to_value) if to_value else _next_month(start.year, start.month) - timedelta(days=1)
+    except ValueError:
+        raise ValueError('Даты from и to передаются в формате ГГГГ-ММ-ДД') from None
+
+    if end < start:
+        raise ValueError('Дата to раньше from')
+    if (end - start).days >= MAX_CALENDAR_DAYS:
+        raise ValueError(f'Диапазон не больше {MAX_CALENDAR_DAYS} дней')
+    return start, end
+
+
+def _next_month(year, month):
+    return date(year + month // 12, month % 12 + 1, 1)
+
+
+def months(start, end):
+    """Месяцы (ГГГГ-ММ), которые затрагивает диапазон дат"""
+    result, current = [], start.replace(day=1)
+    while current <= end:
+        result.append(calendar_month(current.year, current.month))
+        current = _next_month(current.year, current.month)
+    return result
+
+
+def _utc(local_date, tz):
+    """Начало местных суток в UTC (наивное время, как match_date)"""
+    return datetime.combine(local_date, time(), tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _offsets(tz, start, end):
+    """
+    Смещения пояса от UTC на интервале [start, end): [(начало отрезка в UTC, секунды)].
+    Моменты переходов на летнее/зимнее время находятся делением пополам с точностью до секунды.
+    """
+    def offset(moment):
+        return int(moment.replace(tzinfo=timezone.utc).astimezone(tz).utcoffset().total_seconds())
+
+    segments = [(start, offset(start))]
+    moment = start
+    while moment < end:
+        following = min(moment + _OFFSET_STEP, end)
+        if offset(following) != segments[-1][1]:
+            low, high = moment, following
+            while high - low > timedelta(seconds=1):
+                middle = low + timedelta(seconds=(high - low).total_seconds() // 2)
+                if offset(middle) == segments[-1][1]:
+                    low = middle
+                else:
+                    high = middle
+            segments.append((high, offset(high)))
+        moment = following
+    return segments
+
+
+def _local_datetime(segments):
+    """
+    SQL-выражение местного времени матча: к match_date прибавляется смещение отрезка,
+    в который попадает матч (CASE по моментам переходов).
+    """
+    def by_segment(value):
+        if len(segments) == 1:
+            return literal(value(segments[0][1]))
+        return case(
+            *[(Match.match_date < start, value(offset)) for (_, offset), (start, _) in zip(segments, segments[1:])],
+            else_=value(segments[-1][1])
+        )
+
+    if db.engine.dialect.name == 'sqlite':
+        return func.datetime(Match.match_date, by_segment(lambda offset: f'{offset:+d} seconds'))
+    return Match.match_date + func.make_interval(0, 0, 0, 0, 0, 0, by_segment(float))
+
+
+def _load_month(tz, month):
+    """
+    Матчи месяца по местным дням: {'ГГГГ-ММ-ДД': [матчи]}. Местное время считается в SQL,
+    строки выбираются по индексу match_date в порядке времени начала.
+    """
+    year, month_number = map(int, month.split('-'))
+    start = _utc(date(year, month_number, 1), tz)
+    end = _utc(_next_month(year, month_number), tz)
+
+    local = _local_datetime(_offsets(tz, start, end)).label('local')
+    rows = db.session.query(local, Match.id, Match.home_team, Match.away_team).filter(
+        Match.match_date >= start, Match.match_date < end
+    ).order_by(Match.match_date, Match.id)
+
+    days = {}
+    for local_time, match_id, home_team, away_team in rows:
+        if isinstance(local_time, str):
+            local_time = datetime.fromisoformat(local_time)
+        days.setdefault(local_time.date().isoformat(), []).append({
+            'id': match_id, 'home_team': home_team, 'away_team': away_team,
+            'time': local_time.strftime('%H:%M')
+        })
+    return days
+
+
+def get_calendar(tz, start, end):
+    """
+    Матчи диапазона местных дат по дням: количество и краткие данные матчей.
+    Месяцы берутся из кэша, пока не изменилась их версия (utils.http_cache.touch_calendar).
+    """
+    requested = months(start, end)
+    versions, _ = calendar_versions(requested)
+    cache = calendar_cache()
+
+    first, last = start.isoformat(), end.isoformat()
+    days = []
+    for month, version in versions:
+        key = (tz.key, month, version)
+        month_days = cache.get(key)
+        if month_days is None:
+            month_days = _load_month(tz, month)
+            cache.set(key, month_days)
+        days += [
+            {'date': day, 'count': len(matches), 'matches': matches}
+            for day, matches in month_days.items() if first <= day <= last
+        ]
+
+    return {
+        'tz': tz.key,
+        'from': first,
+        'to': last,
+        'total': sum(day['count'] for day in days),
+        'days': days
+    }
@@ -0,0 +1,185 @@
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models.job import Job
+from models.match import Match
+from services import leaderboard_service, prediction_service
+
+logger = logging.getLogger(__name__)
+
+
+def _score_match(payload):
+    """Начисление очков прогнозам завершенного матча (повторный запуск ничего не меняет)"""
+    match = db.session.get(Match, payload['match_id'])
+    if match is None or match.status != 'finished' or match.home_score is None or match.away_score is None:
+        return
+    prediction_service.score_match(match)
+
+
+def _rebuild_leaderboard(payload):
+    leaderboard_service.rebuild()
+
+
+# Обработчики задач по виду. Обработчик должен быть идемпотентным: после сбоя
+# или истечения JOB_TIMEOUT задача выполняется повторно
+HANDLERS = {
+    'score_match': _score_match,
+    'rebuild_leaderboard': _rebuild_leaderboard,
+}
+
+
+def worker_id():
+    """Идентификатор процесса планировщика для поля locked_by"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(kind, payload=None, dedupe_key=None, run_at=None):
+    """
+    Постановка задачи в очередь в текущей транзакции (коммит выполняет вызывающий код,
+    поэтому задача появляется атомарно с изменением, которое ее породило).
+    Если ожидающая задача с тем же dedupe_key уже есть, возвращается она.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f'Неизвестный вид задачи: {kind}')
+
+    if dedupe_key is not None:
+        existing = Job.query.filter_by(dedupe_key=dedupe_key).first()
+        if existing is not None:
+            return existing
+
+    job = Job(
+        kind=kind,
+        payload=payload or {},
+        dedupe_key=dedupe_key,
+        run_at=run_at or datetime.utcnow(),
+        max_attempts=current_app.config['JOB_MAX_ATTEMPTS']
+    )
+    try:
+        # Точка сохранения: параллельная постановка с тем же ключом не откатывает транзакцию вызывающего
+        with db.session.begin_nested():
+            db.session.add(job)
+    except IntegrityError:
+        return Job.query.filter_by(dedupe_key=dedupe_key).one()
+    return job
+
+
+def claim(locked_by, now=None):
+    """
+    Захват очередной готовой задачи одним условным UPDATE: из нескольких
+    планировщиков задачу получает только один. Возвращает задачу или None.
+    """
+    now = now or datetime.utcnow()
+    candidate = (
+        select(Job.id)
+        .where(Job.status == 'queued', Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)  # PostgreSQL; в SQLite запись и так сериализована
+        .scalar_subquery()
+    )
+    result = db.session.execute(
+        update(Job)
+        .where(Job.id == candidate, Job.status == 'queued')
+        .values(status='running', locked_by=locked_by, started_at=now,
+                attempts=Job.attempts + 1, dedupe_key=None)
+        .returning(Job.id)
+        .execution_options(synchronize_session=False)
+    )
+    job_id = result.scalar()
+    db.session.commit()
+    return db.session.get(Job, job_id) if job_id is not None else None
+
+
+def _backoff(attempts):
+    """Задержка перед повтором: экспоненциально от JOB_RETRY_DELAY, не больше часа"""
+    return timedelta(seconds=min(current_app.config['JOB_RETRY_DELAY'] * 2 ** (attempts - 1), 3600))
+
+
+def run_job(job):
+    """
+    Выполнение захваченной задачи. Результат обработчика и отметка о завершении
+    коммитятся вместе; при ошибке задача возвращается в очередь с задержкой
+    или, после max_attempts попыток, помечается failed.
+    """
+    try:
+        HANDLERS[job.kind](job.payload)
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+        job.last_error = None
+        db.session.commit()
+        return True
+    except Exception as error:
+        db.session.rollback()
+        logger.exception('Задача %s (%s) завершилась ошибкой', job.id, job.kind)
+
+        job = db.session.get(Job, job.id)
+        job.last_error = f'{type(error).__name__}: {error}'
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = 'queued'
+            job.run_at = datetime.utcnow() + _backoff(job.attempts)
+        job.locked_by = None
+        db.session.commit()
+        return False
+
+
+def run_pending(locked_by, limit=100):
+    """Выполнение готовых задач, пока очередь не опустеет (не больше limit); возвращает их число"""
+    processed = 0
+    while processed < limit:
+        job = claim(locked_by)
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def requeue_stale(now=None):
+    """Возврат в очередь задач, зависших в running дольше JOB_TIMEOUT (планировщик упал)"""
+    now = now or datetime.utcnow()
+    result = db.session.execute(
+        update(Job)
+        .where(Job.status == 'running',
+               Job.started_at < now - timedelta(seconds=current_app.config['JOB_TIMEOUT']))
+        .values(status='queued', run_at=now, locked_by=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def metrics(now=None):
+    """
+    Состояние очереди: число задач по статусам, размер готовой к выполнению очереди,
+    возраст самой старой ожидающей задачи и среднее ожидание до старта за последний час.
+    """
+    now = now or datetime.utcnow()
+    counts = dict(db.session.query(Job.status, func.count()).group_by(Job.status).all())
+
+    backlog, oldest = db.session.query(func.count(), func.min(Job.run_at)).filter(
+        Job.status == 'queued', Job.run_at <= now
+    ).one()
+
+    recent = db.session.query(Job.run_at, Job.started_at).filter(
+        Job.status == 'done', Job.finished_at >= now - timedelta(hours=1)
+    ).order_by(Job.finished_at.desc()).limit(1000).all()
+    waits = [max((started - run_at).total_seconds(), 0.0) for run_at, started in recent]
+
+    return {
+        'queued': counts.get('queued', 0),
+        'running': counts.get('running', 0),
+        'done': counts.get('done', 0),
+        'failed': counts.get('failed', 0),
+        'backlog': backlog,
+        'oldest_queued_seconds': (now - oldest).total_seconds() if oldest else 0.0,
+        'avg_wait_seconds_1h': sum(waits) / len(waits) if waits else 0.0
+    }
@@ -0,0 +1,175 @@
+from datetime import datetime
+from sqlalchemy import func, insert, update, exists, literal, or_, and_, case
+from database import db
+from models.leaderboard import LeaderboardEntry
+from models.prediction import Prediction
+
+
+def _ensure_entries(match_id):
+    """Создание пустых строк таблицы лидеров для пользователей, прогнозировавших матч"""
+    missing = db.session.query(
+        Prediction.user_id, literal(0), literal(0), literal(datetime.utcnow())
+    ).filter(
+        Prediction.match_id == match_id,
+        ~exists().where(LeaderboardEntry.user_id == Prediction.user_id)
+    ).distinct()
+
+    db.session.execute(insert(LeaderboardEntry).from_select(
+        ['user_id', 'total_points', 'predictions_count', 'updated_at'],
+        missing
+    ))
+
+
+def apply_match_scoring(match_id, points):
+    """
+    Применение новых очков прогнозов матча к таблице лидеров одним UPDATE ... FROM.
+    points — SQL-выражение новых очков прогноза. Вызывается до обновления
+    predictions.points_earned; коммит выполняет вызывающий код.
+    """
+    _ensure_entries(match_id)
+
+    previous = Prediction.points_earned
+    deltas = db.session.query(
+        Prediction.user_id.label('user_id'),
+        func.sum(points - func.coalesce(previous, 0)).label('points'),
+        func.sum(case((previous.is_(None), 1), else_=0)).label('scored')
+    ).filter(Prediction.match_id == match_id).group_by(Prediction.user_id).subquery()
+
+    db.session.execute(
+        update(LeaderboardEntry)
+        .where(LeaderboardEntry.user_id == deltas.c.user_id)
+        .values(
+            total_points=LeaderboardEntry.total_points + deltas.c.points,
+            predictions_count=LeaderboardEntry.predictions_count + deltas.c.scored,
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def revoke_match(match_id):
+    """Вычитание очков прогнозов матча из таблицы лидеров (перед удалением матча)"""
+    scored = db.session.query(
+        Prediction.user_id.label('user_id'),
+        func.sum(Prediction.points_earned).label('points'),
+        func.count(Prediction.points_earned).label('scored')
+    ).filter(
+        Prediction.match_id == match_id,
+        Prediction.points_earned.isnot(None)
+    ).group_by(Prediction.user_id).subquery()
+
+    db.session.execute(
+        update(LeaderboardEntry)
+        .where(LeaderboardEntry.user_id == scored.c.user_id)
+        .values(
+            total_points=LeaderboardEntry.total_points - scored.c.points,
+            predictions_count=LeaderboardEntry.predictions_count - scored.c.scored,
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _ordering():
+    """Порядок строк таблицы лидеров (совпадает с индексом ix_leaderboard_rank)"""
+    return (LeaderboardEntry.total_points.desc(), LeaderboardEntry.user_id.asc())
+
+
+def _ranked(entries, first_position, first_rank):
+    """
+    Проставление рангов строкам, идущим подряд в порядке таблицы.
+    Одинаковое число очков дает одинаковый ранг (1, 2, 2, 4 ...).
+    """
+    result = []
+    position, rank, previous_points = first_position, first_rank, None
+
+    for entry in entries:
+        if previous_points is not None and entry.total_points != previous_points:
+            rank = position
+        result.append(entry.to_dict(rank=rank))
+        previous_points = entry.total_points
+        position += 1
+
+    return result
+
+
+def _position_and_rank(entry):
+    """Позиция строки в таблице и ее ранг — один запрос по индексу"""
+    above_points = LeaderboardEntry.total_points > entry.total_points
+    same_points_before = and_(
+        LeaderboardEntry.total_points == entry.total_points,
+        LeaderboardEntry.user_id < entry.user_id
+    )
+    greater, tied_before = db.session.query(
+        func.coalesce(func.sum(case((above_points, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((same_points_before, 1), else_=0)), 0)
+    ).filter(or_(above_points, same_points_before)).one()
+
+    return greater + tied_before + 1, greater + 1
+
+
+def get_page(limit, offset=0):
+    """Страница таблицы лидеров с рангами"""
+    entries = LeaderboardEntry.query.order_by(*_ordering()).offset(offset).limit(limit).all()
+    if not entries:
+        return []
+
+    first_rank = db.session.query(func.count(LeaderboardEntry.user_id)).filter(
+        LeaderboardEntry.total_points > entries[0].total_points
+    ).scalar() + 1
+
+    return _ranked(entries, offset + 1, first_rank)
+
+
+def get_user_position(user_id, around=5):
+    """
+    Ранг пользователя и соседи по таблице (around строк выше и ниже).
+    Возвращает None, если у пользователя еще нет оцененных прогнозов.
+    """
+    entry = LeaderboardEntry.query.get(user_id)
+    if entry is None:
+        return None
+
+    above = LeaderboardEntry.query.filter(or_(
+        LeaderboardEntry.total_points > entry.total_points,
+        and_(LeaderboardEntry.total_points == entry.total_points, LeaderboardEntry.user_id < entry.user_id)
+    )).order_by(LeaderboardEntry.total_points.asc(), LeaderboardEntry.user_id.desc()).limit(around).all()
+    above.reverse()
+
+    below = LeaderboardEntry.query.filter(or_(
+        LeaderboardEntry.total_points < entry.total_points,
+        and_(LeaderboardEntry.total_points == entry.total_points, LeaderboardEntry.user_id > entry.user_id)
+    )).order_by(*_ordering()).limit(around).all()
+
+    window = above + [entry] + below
+    position, rank = _position_and_rank(window[0])
+    neighbours = _ranked(window, position, rank)
+
+    return {
+        'rank': neighbours[len(above)]['rank'],
+        'entry': neighbours[len(above)],
+        'neighbours': neighbours
+    }
+
+
+def rebuild():
+    """
+    Полный пересчет таблицы лидеров по таблице прогнозов.
+    Используется для восстановления, если материализованные данные разошлись с прогнозами.
+    """
+    LeaderboardEntry.query.delete(synchronize_session=False)
+
+    aggregated = db.session.query(
+        Prediction.user_id,
+        func.sum(Prediction.points_earned),
+        func.count(Prediction.points_earned),
+        literal(datetime.utcnow())
+    ).filter(Prediction.points_earned.isnot(None)).group_by(Prediction.user_id)
+
+    db.session.execute(insert(LeaderboardEntry).from_select(
+        ['user_id', 'total_points', 'predictions_count', 'updated_at'],
+        aggregated
+    ))
+    db.session.commit()
+
+    return LeaderboardEntry.query.count()
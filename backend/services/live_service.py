@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+
+from database import db
+from models.match_event import MatchEvent
+
+logger = logging.getLogger(__name__)
+
+# Поля матча, изменение которых публикуется в поток live-обновлений
+LIVE_FIELDS = ('status', 'home_score', 'away_score')
+
+
+def _frame(event):
+    """SSE-кадр события; кодируется один раз и раздается всем подписчикам"""
+    return f'id: {event.id}\nevent: match\ndata: {json.dumps(event.to_dict(), ensure_ascii=False)}\n\n'
+
+
+class LiveBroker:
+    """
+    Раздача live-обновлений матчей подписчикам SSE внутри процесса.
+
+    События пишутся в таблицу match_events в транзакции изменения матча, поэтому
+    их видят все воркеры: один поток-опросчик на процесс читает новые строки и
+    складывает готовые SSE-кадры в кольцевой буфер. Подписчики не имеют своих
+    очередей — они ждут на общем Condition и дочитывают буфер от своего
+    последнего id, так что публикация не зависит от числа соединений.
+    Клиент, отставший дальше буфера, дочитывается из таблицы.
+    При poll_interval == 0 поток не запускается (обновления только из этого процесса).
+
+    Id событий выдаются при вставке, а коммиты могут идти в другом порядке: событие
+    с меньшим id становится видно позже большего. Поэтому позиция не перескакивает
+    пропуск в id — события после него ждут до poll_lag секунд, пока пропуск не
+    заполнится (иначе транзакция откатилась, и id не появится никогда).
+    """
+
+    def __init__(self, app, buffer_size, poll_interval, poll_lag=0, max_streams=0):
+        self.app = app
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        self.poll_lag = poll_lag
+        self.max_streams = max_streams
+        self._buffer = deque(maxlen=buffer_size)  # (id, кадр) по возрастанию id
+        self._last_id = None
+        self._gap = None  # (первый пропущенный id, время обнаружения)
+        self._streams = 0
+        self._streams_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._poll_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._poller_pid = None
+
+    def _fetch(self, after_id, limit):
+        """События с id > after_id из таблицы (в собственном контексте приложения)"""
+        with self.app.app_context():
+            query = MatchEvent.query
+            if after_id is None:
+                # Первый опрос: последние события для дочитывания по Last-Event-ID
+                events = query.order_by(MatchEvent.id.desc()).limit(limit).all()[::-1]
+            else:
+                events = query.filter(MatchEvent.id > after_id).order_by(MatchEvent.id).limit(limit).all()
+            return [(event.id, _frame(event)) for event in events]
+
+    def _settled(self, rows):
+        """
+        Начало rows (по возрастанию id) без пропусков после текущей позиции. Пропуск,
+        который держится дольше poll_lag, считается откатом транзакции и перескакивается.
+        """
+        position, now = self._last_id, time.monotonic()
+        for index, (event_id, _) in enumerate(rows):
+            if event_id != position + 1:
+                if self._gap is None or self._gap[0] != position + 1:
+                    self._gap = (position + 1, now)
+                if now - self._gap[1] < self.poll_lag:
+                    return rows[:index]
+                self._gap = None
+            position = event_id
+        return rows
+
+    def poll(self):
+        """Чтение новых событий из таблицы и пробуждение подписчиков"""
+        with self._poll_lock:
+            while True:
+                rows = self._fetch(self._last_id, self.buffer_size)
+                if self._last_id is None:
+                    # Первый опрос: уже закоммиченные события пропусков не ждут
+                    self._last_id = 0
+                    ready = rows
+                else:
+                    ready = self._settled(rows)
+                if ready:
+                    with self._condition:
+                        self._buffer.extend(ready)
+                        self._last_id = ready[-1][0]
+                        self._condition.notify_all()
+                if len(ready) < self.buffer_size:
+                    return
+
+    def _run_poller(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Ошибка опроса live-событий')
+
+    def _ensure_started(self):
+        # Поток создается лениво и заново после fork: потоки не наследуются воркерами.
+        # Процесс отмечается запущенным только после первого опроса, чтобы подписчик не получил позицию None
+        if self._poller_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._poller_pid == os.getpid():
+                return
+            if self._last_id is None:
+                self.poll()
+            if self.poll_interval > 0:
+                threading.Thread(target=self._run_poller, name='live-broker', daemon=True).start()
+            self._poller_pid = os.getpid()
+
+    def current_id(self):
+        """Id последнего известного события — начальная позиция нового подписчика"""
+        self._ensure_started()
+        return self._last_id
+
+    def events_after(self, last_id):
+        """Готовые SSE-кадры событий с id > last_id и новая позиция подписчика"""
+        with self._condition:
+            if self._buffer and last_id >= self._buffer[0][0] - 1:
+                frames = [frame for event_id, frame in self._buffer if event_id > last_id]
+                return frames, max(last_id, self._last_id)
+
+        if self._last_id is not None and last_id >= self._last_id:
+            return [], last_id
+
+        # Клиент отстал дальше буфера — дочитываем из таблицы
+        rows = self._fetch(last_id, self.buffer_size)
+        return [frame for _, frame in rows], (rows[-1][0] if rows else last_id)
+
+    def wait(self, last_id, timeout):
+        """Ожидание событий с id > last_id не дольше timeout секунд"""
+        self._ensure_started()
+        frames, position = self.events_after(last_id)
+        if frames:
+            return frames, position
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_id > last_id, timeout)
+        return self.events_after(last_id)
+
+    def acquire_stream(self):
+        """Занятие места SSE-потока; False — достигнут предел max_streams процесса"""
+        with self._streams_lock:
+            if self.max_streams and self._streams >= self.max_streams:
+                return False
+            self._streams += 1
+            return True
+
+    def release_stream(self):
+        with self._streams_lock:
+            self._streams -= 1
+
+
+def publish_match_update(match, changed=LIVE_FIELDS):
+    """
+    Запись события об изменении счета или статуса матча в текущей транзакции.
+    Коммит выполняет вызывающий код, затем вызывает notify_subscribers().
+    """
+    if not any(field in changed for field in LIVE_FIELDS):
+        return
+    db.session.add(MatchEvent(
+        match_id=match.id,
+        status=match.status,
+        home_score=match.home_score,
+        away_score=match.away_score
+    ))
+
+
+def notify_subscribers():
+    """Немедленная раздача закоммиченных событий подписчикам этого процесса"""
+    get_live_broker().poll()
+
+
+def prune_events(now=None):
+    """
+    Удаление событий старше LIVE_EVENTS_RETENTION секунд; возвращает число удаленных.
+    Последнее событие остается всегда: иначе SQLite выдаст его id заново, и клиенты
+    с Last-Event-ID пропустят новые события.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=current_app.config['LIVE_EVENTS_RETENTION'])
+    last_id = db.session.query(func.max(MatchEvent.id)).scalar()
+    if last_id is None:
+        return 0
+    deleted = MatchEvent.query.filter(
+        MatchEvent.created_at < cutoff, MatchEvent.id < last_id
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def init_live_broker(app):
+    """Создание брокера live-обновлений для приложения"""
+    app.extensions['live_broker'] = LiveBroker(
+        app,
+        buffer_size=app.config['LIVE_BUFFER_SIZE'],
+        poll_interval=app.config['LIVE_POLL_INTERVAL'],
+        poll_lag=app.config['LIVE_POLL_LAG'],
+        max_streams=app.config['LIVE_MAX_STREAMS']
+    )
+
+
+def get_live_broker():
+    return current_app.extensions['live_broker']
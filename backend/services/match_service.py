@@ -0,0 +1,353 @@
+import csv
+import json
+import time
+from datetime import datetime
+from itertools import islice
+from flask import current_app
+from sqlalchemy import insert
+from database import db
+from models.match import Match
+from services import job_service, live_service, prediction_service, stats_service, team_service
+from utils.http_cache import invalidate_matches, touch_calendar, touch_matches
+from utils.validators import parse_iso_datetime
+
+# Поля матча, которые можно задать в файле импорта
+IMPORT_FIELDS = ('home_team', 'away_team', 'match_date', 'home_score', 'away_score', 'stadium', 'stage', 'status')
+# Поля файла импорта, которые принимаются только строками (JSONL может передать любые значения)
+IMPORT_TEXT_FIELDS = ('home_team', 'away_team', 'match_date', 'stadium', 'stage', 'status')
+# Сколько ошибок разбора строк возвращать в отчете
+MAX_REPORTED_ERRORS = 20
+# Статусы матча
+MATCH_STATUSES = ('scheduled', 'live', 'finished', 'postponed', 'canceled')
+# Поля, которые можно задать при вводе результатов пачкой
+RESULT_FIELDS = ('home_score', 'away_score', 'status')
+
+
+def _has_result(match):
+    return match.status == 'finished' and match.home_score is not None and match.away_score is not None
+
+
+def apply_result(match, stale_streaks=None):
+    """
+    Начисление очков прогнозам, если матч завершен со счетом. При DEFERRED_SCORING
+    вместо подсчета в текущем запросе ставится задача score_match (одна на матч,
+    пока не взята в работу). Коммит выполняет вызывающий код.
+    stale_streaks — см. prediction_service.score_match.
+    Возвращает количество прогнозов с измененными очками или None, если очки не начислялись.
+    """
+    if not _has_result(match):
+        return None
+    if current_app.config['DEFERRED_SCORING']:
+        job_service.enqueue('score_match', {'match_id': match.id}, dedupe_key=f'score_match:{match.id}')
+        return None
+    return prediction_service.score_match(match, stale_streaks)
+
+
+def _is_score(value):
+    return value is None or (isinstance(value, int) and not isinstance(value, bool) and value >= 0)
+
+
+def _result_errors(items):
+    """Ошибки элементов пачки результатов: [{'index', 'match_id', 'message'}]"""
+    errors, seen = [], set()
+    for index, item in enumerate(items):
+        match_id = item.get('match_id') if isinstance(item, dict) else None
+        if match_id is None:
+            message = 'Не указан match_id'
+        elif not isinstance(match_id, int) or isinstance(match_id, bool):
+            message = 'match_id должен быть целым числом'
+        elif match_id in seen:
+            message = 'Матч указан в запросе несколько раз'
+        elif not any(field in item for field in RESULT_FIELDS):
+            message = 'Не указаны home_score, away_score или status'
+        elif not _is_score(item.get('home_score')) or not _is_score(item.get('away_score')):
+            message = 'Счет должен быть неотрицательным целым числом'
+        elif 'status' in item and item['status'] not in MATCH_STATUSES:
+            message = f"Недопустимый статус: {item['status']}"
+        else:
+            seen.add(match_id)
+            continue
+        errors.append({'index': index, 'match_id': match_id, 'message': message})
+    return errors
+
+
+def apply_results(items):
+    """
+    Ввод счета и статуса нескольких матчей (игрового дня) одной транзакцией.
+    Элемент: {"match_id", "home_score"?, "away_score"?, "status"?}. Если хотя бы один
+    элемент некорректен или матч не найден, ничего не меняется и возвращается
+    (None, ошибки). Иначе очки начисляются по матчам в порядке даты (серии
+    пользователей продлеваются без пересчета по истории), все изменения
+    коммитятся один раз. Возвращает (отчет, []), где в отчете — число
+    пересчитанных прогнозов по каждому матчу и время выполнения.
+    """
+    started = time.perf_counter()
+    errors = _result_errors(items)
+    if errors:
+        return None, errors
+
+    by_id = {item['match_id']: item for item in items}
+    matches = {match.id: match for match in Match.query.filter(Match.id.in_(by_id))}
+    errors = [
+        {'index': index, 'match_id': item['match_id'], 'message': 'Матч не найден'}
+        for index, item in enumerate(items) if item['match_id'] not in matches
+    ]
+    if errors:
+        return None, errors
+
+    results, stale_streaks = {}, set()
+    scoring_started = time.perf_counter()
+    for match in sorted(matches.values(), key=lambda match: (match.match_date, match.id)):
+        item = by_id[match.id]
+        changed = [field for field in RESULT_FIELDS if field in item and getattr(match, field) != item[field]]
+        for field in changed:
+            setattr(match, field, item[field])
+
+        rescored = apply_result(match, stale_streaks)
+        live_service.publish_match_update(match, changed)
+        if rescored is not None:
+            scoring = 'scored'
+        elif _has_result(match) and current_app.config['DEFERRED_SCORING']:
+            scoring = 'queued'
+        else:
+            scoring = 'skipped'
+        results[match.id] = {
+            'match_id': match.id, 'status': match.status, 'changed': changed,
+            'scoring': scoring, 'rescored': rescored or 0
+        }
+    # Серии пользователей, которые нельзя было продлить, пересчитываются один раз после всех матчей
+    stats_service.recompute_streaks(stale_streaks)
+    scoring_ms = (time.perf_counter() - scoring_started) * 1000
+
+    touch_matches()
+    db.session.commit()
+    invalidate_matches(*matches)
+    live_service.notify_subscribers()
+
+    ordered = [results[item['match_id']] for item in items]
+    return {
+        'results': ordered,
+        'rescored': sum(result['rescored'] for result in ordered),
+        'scoring_ms': round(scoring_ms, 3),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+    }, []
+
+
+def start_due_matches(now=None):
+    """Перевод запланированных матчей, время начала которых наступило, в статус live"""
+    now = now or datetime.utcnow()
+    matches = Match.query.filter(Match.status == 'scheduled', Match.match_date <= now).all()
+    if not matches:
+        return 0
+
+    for match in matches:
+        match.status = 'live'
+        live_service.publish_match_update(match, ('status',))
+
+    touch_matches()
+    db.session.commit()
+    invalidate_matches(*[match.id for match in matches])
+    live_service.notify_subscribers()
+    return len(matches)
+
+
+def _parse_score(value):
+    """Счет из строки файла: CSV дает строки, JSONL — числа; пустое значение — None"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str) and value.strip().isdecimal():
+        value = int(value)
+    if not _is_score(value):
+        raise ValueError('Счет должен быть неотрицательным целым числом')
+    return value
+
+
+def _parse_fixture(raw):
+    """
+    Разбор строки файла в словарь полей матча; при ошибке — ValueError.
+    В словарь попадают только поля, присутствующие в строке: отсутствующие
+    поля существующего матча при upsert не затираются.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError('Строка должна быть объектом')
+
+    fixture = {field: raw[field] for field in IMPORT_FIELDS if field in raw}
+    for field in IMPORT_TEXT_FIELDS:
+        if fixture.get(field) is not None and not isinstance(fixture[field], str):
+            raise ValueError(f'Поле {field} должно быть строкой')
+    for field in ('home_team', 'away_team'):
+        fixture[field] = (fixture.get(field) or '').strip()
+    if not fixture['home_team'] or not fixture['away_team'] or not fixture.get('match_date'):
+        raise ValueError('Не заполнены home_team, away_team или match_date')
+
+    fixture['match_date'] = parse_iso_datetime(fixture['match_date'])
+    for field in ('home_score', 'away_score'):
+        if field in fixture:
+            fixture[field] = _parse_score(fixture[field])
+    for field in ('stadium', 'stage', 'status'):
+        if field in fixture:
+            fixture[field] = fixture[field] or None
+    if 'status' in fixture and fixture['status'] is None:
+        del fixture['status']
+    if 'status' in fixture and fixture['status'] not in MATCH_STATUSES:
+        raise ValueError(f"Недопустимый статус: {fixture['status']}")
+
+    return fixture
+
+
+def decode_lines(binary):
+    """
+    Строки бинарного потока файла импорта в UTF-8 (BOM в начале пропускается).
+    Строки декодируются по одной, поэтому ошибка кодировки указывает на строку файла.
+    """
+    for number, line in enumerate(binary, start=1):
+        yield line.decode('utf-8-sig' if number == 1 else 'utf-8')
+
+
+class FixtureReadError(ValueError):
+    """Файл импорта не дочитать: не UTF-8 или поврежденный CSV. line — строка, где остановилось чтение"""
+
+    def __init__(self, line, message):
+        super().__init__(message)
+        self.line = line
+
+
+def _read_rows(stream, fmt):
+    """
+    Потоковое чтение строк файла: (номер строки, словарь) без загрузки файла в память.
+    Ошибка декодирования или CSV прерывает чтение с FixtureReadError.
+    """
+    line_number, reader = 0, None
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+        elif fmt == 'jsonl':
+            for line_number, line in enumerate(stream, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, None
+        else:
+            raise ValueError(f'Неподдерживаемый формат: {fmt}')
+    except (UnicodeDecodeError, csv.Error) as error:
+        # Номер прочитанной строки не растет на строке с ошибкой
+        line = (reader.line_num if reader else line_number) + 1
+        if isinstance(error, UnicodeDecodeError):
+            raise FixtureReadError(line, 'Файл должен быть в кодировке UTF-8') from None
+        raise FixtureReadError(line, f'Некорректный CSV: {error}') from None
+
+
+def _apply_batch(fixtures, report):
+    """
+    Upsert пачки матчей по ключу (home_team, away_team, match_date) в одной транзакции:
+    один SELECT существующих матчей, массовая вставка новых и обновление измененных.
+    """
+    keys = list(fixtures)
+    # Кандидаты ищутся по индексу match_date (IN по кортежам SQLite выполняет полным просмотром),
+    # точное совпадение ключа проверяется ниже
+    candidates = Match.query.filter(Match.match_date.in_({key[2] for key in keys}))
+    existing = {
+        (match.home_team, match.away_team, match.match_date): match
+        for match in candidates
+    }
+
+    new_rows, updated_ids = [], []
+    for key, fixture in fixtures.items():
+        match = existing.get(key)
+        if match is None:
+            new_rows.append(fixture)
+            continue
+
+        changed = {field: value for field, value in fixture.items() if getattr(match, field) != value}
+        if not changed:
+            report['skipped'] += 1
+            continue
+
+        stage_before = match.stage
+        for field, value in changed.items():
+            setattr(match, field, value)
+        updated_ids.append(match.id)
+        # Дата — часть ключа upsert и не меняется; новая стадия переносит вклад оцененного матча
+        stats_service.move_match(match, stage_before, match.match_date)
+        live_service.publish_match_update(match, changed)
+
+        # Импортированный результат начисляет очки так же, как update_match
+        apply_result(match)
+
+    if new_rows:
+        # executemany требует одинаковый набор ключей во всех строках
+        defaults = {field: None for field in IMPORT_FIELDS}
+        defaults['status'] = 'scheduled'
+        db.session.execute(insert(Match), [dict(defaults, **row) for row in new_rows])
+
+    team_service.register_teams(name for key in keys for name in key[:2])
+    touch_matches()
+    # Команды и дата существующих матчей — ключ upsert, в календаре меняются только новые матчи
+    touch_calendar(*[row['match_date'] for row in new_rows])
+    db.session.commit()
+    invalidate_matches(*updated_ids)
+    live_service.notify_subscribers()
+
+    report['inserted'] += len(new_rows)
+    report['updated'] += len(updated_ids)
+
+
+def import_fixtures(stream, fmt, batch_size=1000):
+    """
+    Импорт матчей из строк CSV или JSONL (текстовый поток или decode_lines) с upsert по
+    (home_team, away_team, match_date). Файл читается и записывается пачками
+    по batch_size строк с коммитом после каждой пачки, поэтому память не зависит
+    от размера файла. Возвращает отчет с количеством вставленных, обновленных
+    и пропущенных строк и первыми ошибками разбора.
+    Если файл не дочитать (FixtureReadError), строки до ошибки применяются, импорт
+    останавливается, а в отчете aborted — строка и причина остановки.
+    """
+    report = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': [], 'aborted': None}
+    rows = _read_rows(stream, fmt)
+
+    while report['aborted'] is None:
+        chunk = []
+        try:
+            for row in islice(rows, batch_size):
+                chunk.append(row)
+        except FixtureReadError as error:
+            report['aborted'] = {'line': error.line, 'message': str(error)}
+        if not chunk:
+            break
+
+        fixtures = {}
+        for line_number, raw in chunk:
+            try:
+                fixture = _parse_fixture(raw)
+            except (ValueError, TypeError) as error:
+                report['skipped'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'line': line_number, 'message': str(error) or 'Некорректная строка'})
+                continue
+
+            key = (fixture['home_team'], fixture['away_team'], fixture['match_date'])
+            if key in fixtures:
+                # Повтор ключа внутри пачки: действует последняя строка
+                report['skipped'] += 1
+            fixtures[key] = fixture
+
+        if fixtures:
+            _apply_batch(fixtures, report)
+        # Освобождаем объекты пачки: память не растет с числом строк
+        db.session.expunge_all()
+
+    return report
+
+
+def detect_format(filename, default='csv'):
+    """Формат файла импорта по расширению"""
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    return default
@@ -0,0 +1,146 @@
+from datetime import datetime
+from sqlalchemy import case, literal, update
+from database import db
+from models.match import Match
+from models.prediction import Prediction
+from services import leaderboard_service, stats_service
+
+
+def _outcome(home, away):
+    """Исход матча в виде числа: 1 — победа хозяев, 2 — победа гостей, 0 — ничья"""
+    if home > away:
+        return 1
+    if home < away:
+        return 2
+    return 0
+
+
+def points_expression(match):
+    """
+    SQL-выражение очков прогноза для матча.
+    Повторяет правила Prediction.calculate_points: 3 — точный счет, 1 — исход, 0 — неверно.
+    """
+    if not match.is_past or match.home_score is None or match.away_score is None:
+        return literal(0)
+
+    predicted_outcome = case(
+        (Prediction.home_score > Prediction.away_score, 1),
+        (Prediction.home_score < Prediction.away_score, 2),
+        else_=0
+    )
+
+    return case(
+        ((Prediction.home_score == match.home_score) & (Prediction.away_score == match.away_score), 3),
+        (predicted_outcome == _outcome(match.home_score, match.away_score), 1),
+        else_=0
+    )
+
+
+def score_match(match, stale_streaks=None):
+    """
+    Начисление очков всем прогнозам матча одним UPDATE-запросом.
+    Таблица лидеров и статистика пользователей обновляются в той же транзакции;
+    коммит выполняет вызывающий код.
+    Если передано множество stale_streaks, пользователи с устаревшей серией добавляются
+    в него, а пересчет по истории выполняет вызывающий код (один раз на несколько матчей).
+    Возвращает количество прогнозов, у которых изменились очки.
+    """
+    points = points_expression(match)
+
+    # Агрегаты обновляем до прогнозов: дельты считаются от старых значений points_earned
+    leaderboard_service.apply_match_scoring(match.id, points)
+    stale = stats_service.apply_match_scoring(match, points)
+
+    result = db.session.execute(
+        update(Prediction)
+        .where(Prediction.match_id == match.id)
+        .where(Prediction.points_earned.is_distinct_from(points))
+        .values(points_earned=points)
+        .execution_options(synchronize_session=False)
+    )
+
+    # Серии, которые нельзя было продлить (повторная оценка, матч раньше учтенных), — по истории
+    if stale_streaks is None:
+        stats_service.recompute_streaks(stale)
+    else:
+        stale_streaks.update(stale)
+
+    return result.rowcount
+
+
+def _is_score(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def submit_batch(user_id, items):
+    """
+    Создание и изменение прогнозов пользователя на несколько матчей в одной транзакции.
+    Сроки проверяются одним запросом к матчам, существующие прогнозы находятся
+    одним запросом по (user_id, match_id). Возвращает результаты по каждому элементу
+    в порядке запроса; коммит выполняет вызывающий код.
+    """
+    results = [None] * len(items)
+    valid = {}
+
+    for index, item in enumerate(items):
+        match_id = item.get('match_id') if isinstance(item, dict) else None
+        if match_id is None:
+            results[index] = {'match_id': match_id, 'status': 'error', 'message': 'Не указан match_id'}
+        elif not isinstance(match_id, int) or isinstance(match_id, bool):
+            results[index] = {'match_id': match_id, 'status': 'error', 'message': 'match_id должен быть целым числом'}
+        elif not _is_score(item.get('home_score')) or not _is_score(item.get('away_score')):
+            results[index] = {'match_id': match_id, 'status': 'error', 'message': 'Счет прогноза должен быть целым числом'}
+        elif match_id in valid:
+            results[index] = {'match_id': match_id, 'status': 'error', 'message': 'Матч указан в запросе несколько раз'}
+        else:
+            valid[match_id] = index
+
+    if not valid:
+        return results
+
+    match_dates = dict(db.session.query(Match.id, Match.match_date).filter(Match.id.in_(valid)))
+    existing = {
+        prediction.match_id: prediction
+        for prediction in Prediction.query.filter(
+            Prediction.user_id == user_id,
+            Prediction.match_id.in_(valid)
+        )
+    }
+
+    now = datetime.utcnow()
+    saved = []
+    for match_id, index in valid.items():
+        item = items[index]
+        if match_id not in match_dates:
+            results[index] = {'match_id': match_id, 'status': 'error', 'message': 'Матч не найден'}
+            continue
+        if match_dates[match_id] < now:
+            results[index] = {'match_id': match_id, 'status': 'error', 'message': 'Прием прогнозов на матч закрыт'}
+            continue
+
+        prediction = existing.get(match_id)
+        if prediction is None:
+            prediction = Prediction(user_id=user_id, match_id=match_id, comment=item.get('comment', ''))
+            db.session.add(prediction)
+            status = 'created'
+        else:
+            if 'comment' in item:
+                prediction.comment = item['comment']
+            status = 'updated'
+        prediction.home_score = item['home_score']
+        prediction.away_score = item['away_score']
+        saved.append((index, prediction, status))
+
+    # Одна запись в БД для всех прогнозов пачки; id новых прогнозов нужны в ответе
+    db.session.flush()
+    for index, prediction, status in saved:
+        results[index] = {
+            'match_id': prediction.match_id,
+            'status': status,
+            'id': prediction.id,
+            'home_score': prediction.home_score,
+            'away_score': prediction.away_score,
+            'comment': prediction.comment
+        }
+
+    return results
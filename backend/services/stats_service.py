@@ -0,0 +1,258 @@
+from datetime import datetime
+from sqlalchemy import and_, case, exists, func, insert, literal, or_, update
+from database import db
+from models.match import Match
+from models.prediction import Prediction
+from models.user_stats import ALL_STAGES, UserStats
+
+# Сколько пользователей пересчитывать за один запрос истории
+STREAK_CHUNK_SIZE = 500
+
+
+def _stage_keys(stage):
+    """Строки статистики, которые затрагивает матч: итоги и его стадия (если указана)"""
+    return [ALL_STAGES, stage] if stage else [ALL_STAGES]
+
+
+def _is(expression, value):
+    return case((expression == value, 1), else_=0)
+
+
+def _ensure_rows(match_id, stage_keys):
+    """Создание пустых строк статистики для пользователей, прогнозировавших матч"""
+    for stage in stage_keys:
+        missing = db.session.query(
+            Prediction.user_id, literal(stage), literal(datetime.utcnow())
+        ).filter(
+            Prediction.match_id == match_id,
+            ~exists().where(and_(UserStats.user_id == Prediction.user_id, UserStats.stage == stage))
+        ).distinct()
+
+        db.session.execute(insert(UserStats).from_select(['user_id', 'stage', 'updated_at'], missing))
+
+
+def _in_order(match):
+    """Матч идет после последнего учтенного в серии пользователя"""
+    return or_(
+        UserStats.last_match_id.is_(None),
+        UserStats.last_match_date < match.match_date,
+        and_(UserStats.last_match_date == match.match_date, UserStats.last_match_id < match.id)
+    )
+
+
+def apply_match_scoring(match, points):
+    """
+    Применение новых очков прогнозов матча к статистике пользователей.
+    points — SQL-выражение новых очков; вызывается до обновления predictions.points_earned.
+    Счетчики меняются на разницу между старыми и новыми очками, серия — продлевается
+    или обнуляется, если матч оценивается впервые и позже уже учтенных.
+    Возвращает пользователей, серию которых нужно пересчитать по истории
+    (recompute_streaks) после обновления прогнозов.
+    """
+    stage_keys = _stage_keys(match.stage)
+    _ensure_rows(match.id, stage_keys)
+
+    previous = Prediction.points_earned
+    overall = and_(UserStats.user_id == Prediction.user_id, UserStats.stage == ALL_STAGES)
+
+    # Повторная оценка, после которой прогноз перестал или начал приносить очки, или матч
+    # раньше уже учтенных: серию нельзя продлить
+    stale = [user_id for (user_id,) in db.session.query(Prediction.user_id).join(UserStats, overall).filter(
+        Prediction.match_id == match.id,
+        or_(
+            and_(previous.isnot(None), (previous > 0) != (points > 0)),
+            and_(previous.is_(None), ~_in_order(match))
+        )
+    )]
+
+    deltas = db.session.query(
+        Prediction.user_id.label('user_id'),
+        (points - func.coalesce(previous, 0)).label('points'),
+        case((previous.is_(None), 1), else_=0).label('scored'),
+        (_is(points, 3) - _is(previous, 3)).label('exact'),
+        (_is(points, 1) - _is(previous, 1)).label('outcome'),
+        previous.is_(None).label('fresh'),
+        (points > 0).label('hit')
+    ).filter(Prediction.match_id == match.id).subquery()
+
+    now = datetime.utcnow()
+    db.session.execute(
+        update(UserStats)
+        .where(UserStats.user_id == deltas.c.user_id, UserStats.stage.in_(stage_keys))
+        .values(
+            predictions_count=UserStats.predictions_count + deltas.c.scored,
+            exact_count=UserStats.exact_count + deltas.c.exact,
+            outcome_count=UserStats.outcome_count + deltas.c.outcome,
+            total_points=UserStats.total_points + deltas.c.points,
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    db.session.execute(
+        update(UserStats)
+        .where(UserStats.user_id == deltas.c.user_id, UserStats.stage == ALL_STAGES,
+               deltas.c.fresh, _in_order(match))
+        .values(
+            current_streak=case((deltas.c.hit, UserStats.current_streak + 1), else_=0),
+            last_match_date=match.match_date,
+            last_match_id=match.id
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    return stale
+
+
+def _scored_history():
+    """Оцененные прогнозы с датой матча в порядке серии"""
+    return db.session.query(
+        Prediction.user_id, Prediction.points_earned, Match.match_date, Match.id
+    ).join(Match, Prediction.match_id == Match.id).filter(Prediction.points_earned.isnot(None))
+
+
+def _streaks(user_ids, rows):
+    """Текущая серия и последний матч пользователей по их истории, упорядоченной по дате матча"""
+    streaks = {
+        user_id: {'user_id': user_id, 'stage': ALL_STAGES, 'current_streak': 0,
+                  'last_match_date': None, 'last_match_id': None}
+        for user_id in user_ids
+    }
+    for user_id, points, match_date, match_id in rows:
+        streak = streaks[user_id]
+        streak['current_streak'] = streak['current_streak'] + 1 if points > 0 else 0
+        streak['last_match_date'], streak['last_match_id'] = match_date, match_id
+    return list(streaks.values())
+
+
+def recompute_streaks(user_ids, exclude_match_id=None):
+    """Пересчет серий пользователей по всей истории их оцененных прогнозов"""
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), STREAK_CHUNK_SIZE):
+        chunk = user_ids[start:start + STREAK_CHUNK_SIZE]
+        history = _scored_history().filter(Prediction.user_id.in_(chunk))
+        if exclude_match_id is not None:
+            history = history.filter(Match.id != exclude_match_id)
+
+        rows = _streaks(chunk, history.order_by(Match.match_date, Match.id))
+        db.session.execute(update(UserStats), rows)
+
+
+def _scored_predictions(match_id):
+    return db.session.query(
+        Prediction.user_id.label('user_id'),
+        Prediction.points_earned.label('points'),
+        _is(Prediction.points_earned, 3).label('exact'),
+        _is(Prediction.points_earned, 1).label('outcome')
+    ).filter(
+        Prediction.match_id == match_id,
+        Prediction.points_earned.isnot(None)
+    ).subquery()
+
+
+def _add_scored(match_id, stage_keys, sign):
+    """Прибавление (sign=1) или вычитание (sign=-1) оцененных прогнозов матча в строках stage_keys"""
+    scored = _scored_predictions(match_id)
+    db.session.execute(
+        update(UserStats)
+        .where(UserStats.user_id == scored.c.user_id, UserStats.stage.in_(stage_keys))
+        .values(
+            predictions_count=UserStats.predictions_count + sign,
+            exact_count=UserStats.exact_count + sign * scored.c.exact,
+            outcome_count=UserStats.outcome_count + sign * scored.c.outcome,
+            total_points=UserStats.total_points + sign * scored.c.points,
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return [user_id for (user_id,) in db.session.query(scored.c.user_id)]
+
+
+def revoke_match(match):
+    """Вычитание оцененных прогнозов матча из статистики (перед удалением матча)"""
+    user_ids = _add_scored(match.id, _stage_keys(match.stage), -1)
+    recompute_streaks(user_ids, exclude_match_id=match.id)
+
+
+def move_match(match, previous_stage, previous_date):
+    """
+    Перенос вклада уже оцененного матча после изменения его стадии или даты (до коммита).
+    Прогнозы вычитаются из строки прежней стадии и добавляются в строку новой; при смене
+    даты серии пользователей пересчитываются по истории в новом порядке матчей.
+    """
+    stage_changed = (previous_stage or ALL_STAGES) != (match.stage or ALL_STAGES)
+    if not stage_changed and previous_date == match.match_date:
+        return
+    scored = db.session.query(exists().where(
+        Prediction.match_id == match.id, Prediction.points_earned.isnot(None)
+    )).scalar()
+    if not scored:
+        return
+
+    user_ids = None
+    if stage_changed:
+        if previous_stage:
+            user_ids = _add_scored(match.id, [previous_stage], -1)
+        if match.stage:
+            _ensure_rows(match.id, [match.stage])
+            user_ids = _add_scored(match.id, [match.stage], 1)
+    if previous_date != match.match_date:
+        recompute_streaks(user_ids if user_ids is not None else [
+            user_id for (user_id,) in db.session.query(_scored_predictions(match.id).c.user_id)
+        ])
+
+
+def get_user_stats(user_id):
+    """
+    Статистика пользователя: итоги, текущая серия и разбивка по стадиям.
+    Читаются только строки пользователя, независимо от длины его истории.
+    """
+    rows = UserStats.query.filter_by(user_id=user_id).order_by(UserStats.stage).all()
+    overall = next((row for row in rows if row.stage == ALL_STAGES), None) or UserStats(
+        user_id=user_id, stage=ALL_STAGES, predictions_count=0, exact_count=0,
+        outcome_count=0, total_points=0, current_streak=0
+    )
+
+    result = overall.to_dict()
+    result['user_id'] = user_id
+    result['current_streak'] = overall.current_streak
+    result['stages'] = [
+        dict(row.to_dict(), stage=row.stage)
+        for row in rows if row.stage != ALL_STAGES and row.predictions_count
+    ]
+    return result
+
+
+def rebuild():
+    """
+    Полный пересчет статистики по таблице прогнозов.
+    Используется для восстановления, если материализованные данные разошлись с прогнозами
+    (например, после изменения прогнозов в обход сервисов).
+    """
+    UserStats.query.delete(synchronize_session=False)
+
+    points = Prediction.points_earned
+    columns = ['user_id', 'stage', 'predictions_count', 'exact_count', 'outcome_count', 'total_points', 'updated_at']
+    aggregates = (func.count(points), func.sum(_is(points, 3)), func.sum(_is(points, 1)),
+                  func.sum(points), literal(datetime.utcnow()))
+
+    overall = db.session.query(Prediction.user_id, literal(ALL_STAGES), *aggregates).filter(
+        points.isnot(None)
+    ).group_by(Prediction.user_id)
+    db.session.execute(insert(UserStats).from_select(columns, overall))
+
+    by_stage = db.session.query(Prediction.user_id, Match.stage, *aggregates).join(
+        Match, Prediction.match_id == Match.id
+    ).filter(points.isnot(None), Match.stage.isnot(None), Match.stage != ALL_STAGES).group_by(
+        Prediction.user_id, Match.stage
+    )
+    db.session.execute(insert(UserStats).from_select(columns, by_stage))
+
+    user_ids = [user_id for (user_id,) in db.session.query(UserStats.user_id).filter_by(stage=ALL_STAGES)]
+    history = _scored_history().order_by(Prediction.user_id, Match.match_date, Match.id)
+    rows = _streaks(user_ids, history.yield_per(50000))
+    for start in range(0, len(rows), 50000):
+        db.session.execute(update(UserStats), rows[start:start + 50000])
+    db.session.commit()
+
+    return len(user_ids)
@@ -0,0 +1,107 @@
+from datetime import datetime
+from sqlalchemy import bindparam, distinct, func, insert, select, union
+from database import db
+from models.match import Match
+from models.team import Team, TeamTrigram
+
+# Верхняя граница диапазона для поиска по префиксу: name_norm >= p AND name_norm < p + MAX_CHAR
+MAX_CHAR = '\U0010ffff'
+
+
+def normalize(name):
+    """
+    Нормализация названия команды для поиска.
+    casefold() корректно приводит регистр кириллицы (в отличие от LOWER/ILIKE в SQLite).
+    """
+    return ' '.join(name.casefold().replace('ё', 'е').split())
+
+
+def trigrams(normalized):
+    """Множество триграмм нормализованной строки"""
+    return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
+
+def register_teams(names):
+    """
+    Добавление в справочник команд, которых в нем еще нет.
+    Вызывается при создании и изменении матчей и при импорте; вставка идет
+    пачками через executemany. Коммит выполняет вызывающий код.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return
+
+    existing = {name for (name,) in db.session.query(Team.name).filter(Team.name.in_(names))}
+    missing = names - existing
+    if not missing:
+        return
+
+    normalized = {name: normalize(name) for name in missing}
+    db.session.execute(insert(Team), [
+        {'name': name, 'name_norm': normalized[name], 'created_at': datetime.utcnow()} for name in missing
+    ])
+
+    team_ids = db.session.query(Team.id, Team.name).filter(Team.name.in_(missing))
+    rows = [
+        {'trigram': trigram, 'team_id': team_id}
+        for team_id, name in team_ids
+        for trigram in trigrams(normalized[name])
+    ]
+    if rows:
+        db.session.execute(insert(TeamTrigram), rows)
+
+
+# Запрос автодополнения собирается один раз: на горячем пути остаются только параметры
+_AUTOCOMPLETE = select(Team.name).where(
+    Team.name_norm >= bindparam('low'),
+    Team.name_norm < bindparam('high')
+).order_by(Team.name_norm).limit(bindparam('limit'))
+
+
+def autocomplete(prefix, limit=10):
+    """Названия команд, начинающиеся с prefix, в алфавитном порядке"""
+    prefix = normalize(prefix)
+    if not prefix:
+        return []
+
+    # Core-выполнение на соединении сессии, без ORM-обвязки: диапазон по индексу name_norm
+    result = db.session.connection().execute(
+        _AUTOCOMPLETE, {'low': prefix, 'high': prefix + MAX_CHAR, 'limit': limit}
+    )
+    return result.scalars().all()
+
+
+def find_team_names(query):
+    """
+    Названия команд, содержащих query (без учета регистра).
+    Строки от трех символов ищутся по триграммному индексу. У более коротких триграмм
+    нет — подстрока ищется просмотром индекса name_norm (без чтения строк справочника).
+    """
+    query = normalize(query)
+    if not query:
+        return []
+
+    if len(query) < 3:
+        matching = db.session.query(Team.id).filter(Team.name_norm.contains(query, autoescape=True))
+        return [name for (name,) in db.session.query(Team.name).filter(Team.id.in_(matching))]
+
+    needed = trigrams(query)
+    candidates = db.session.query(TeamTrigram.team_id).filter(
+        TeamTrigram.trigram.in_(needed)
+    ).group_by(TeamTrigram.team_id).having(func.count(distinct(TeamTrigram.trigram)) == len(needed))
+
+    rows = db.session.query(Team.name, Team.name_norm).filter(Team.id.in_(candidates))
+    # Триграммы дают кандидатов; точное вхождение проверяем по нормализованной строке
+    return [name for name, normalized in rows if query in normalized]
+
+
+def rebuild():
+    """Полное перестроение справочника команд по таблице матчей"""
+    TeamTrigram.query.delete(synchronize_session=False)
+    Team.query.delete(synchronize_session=False)
+
+    names = union(db.session.query(Match.home_team), db.session.query(Match.away_team))
+    register_teams(name for (name,) in db.session.execute(names))
+    db.session.commit()
+
+    return Team.query.count()
@@ -0,0 +1,27 @@
+import pytest
+
+from app import create_app
+from database import db
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """Заголовки авторизации для тестового пользователя"""
+    def _login(username, password):
+        response = client.post('/api/auth/login', json={'username': username, 'password': password})
+        return {'Authorization': f"Bearer {response.json['access_token']}"}
+    return _login
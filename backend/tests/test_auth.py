@@ -0,0 +1,82 @@
+from flask_jwt_extended import create_access_token
+from werkzeug.security import generate_password_hash
+
+from database import db
+from models.user import User
+from services.auth_service import PasswordHasher
+from utils.auth_utils import forget_user
+
+
+def _bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_admin_required_uses_role_claim(client, login):
+    """admin_required пропускает и отклоняет по claim is_admin без обращения к пользователю"""
+    assert client.get('/api/jobs', headers=login('admin', 'adminpass')).status_code == 200
+    assert client.get('/api/jobs', headers=login('user1', 'user1pass')).status_code == 403
+
+    # Claim имеет приоритет над записью пользователя
+    promoted = create_access_token(identity=2, additional_claims={'is_admin': True})
+    demoted = create_access_token(identity=1, additional_claims={'is_admin': False})
+    assert client.get('/api/jobs', headers=_bearer(promoted)).status_code == 200
+    assert client.get('/api/jobs', headers=_bearer(demoted)).status_code == 403
+
+
+def test_admin_required_falls_back_to_user_for_tokens_without_claim(client):
+    """Токены, выданные до появления claim, проверяются по записи пользователя"""
+    assert client.get('/api/jobs', headers=_bearer(create_access_token(identity=1))).status_code == 200
+    assert client.get('/api/jobs', headers=_bearer(create_access_token(identity=2))).status_code == 403
+    assert client.get('/api/jobs', headers=_bearer(create_access_token(identity=999))).status_code == 403
+
+
+def test_refresh_rereads_role(client):
+    """Новый access-токен получает текущую роль из БД, а не из refresh-токена"""
+    tokens = client.post('/api/auth/login', json={'username': 'admin', 'password': 'adminpass'}).json
+    refresh_headers = _bearer(tokens['refresh_token'])
+
+    def refreshed_status():
+        access_token = client.post('/api/auth/refresh', headers=refresh_headers).json['access_token']
+        return client.get('/api/jobs', headers=_bearer(access_token)).status_code
+
+    assert refreshed_status() == 200
+
+    db.session.get(User, 1).is_admin = False
+    db.session.commit()
+    forget_user(1)
+    assert refreshed_status() == 403
+
+
+def test_login_upgrades_hash_with_outdated_parameters(app, client):
+    """Вход перехеширует пароль, если изменилось число итераций или только длина соли"""
+    method, salt_length = app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_SALT_LENGTH']
+    user = db.session.get(User, 2)
+
+    for outdated in [generate_password_hash('user1pass', 'pbkdf2:sha256:500', salt_length),
+                     generate_password_hash('user1pass', method, salt_length // 2)]:
+        user.password_hash = outdated
+        db.session.commit()
+
+        response = client.post('/api/auth/login', json={'username': 'user1', 'password': 'user1pass'})
+        assert response.status_code == 200
+        db.session.refresh(user)
+        stored_method, salt, _ = user.password_hash.split('$')
+        assert (stored_method, len(salt)) == (method, salt_length)
+
+    current = user.password_hash
+    client.post('/api/auth/login', json={'username': 'user1', 'password': 'user1pass'})
+    db.session.refresh(user)
+    assert user.password_hash == current
+
+
+def test_login_returns_503_when_hashing_pool_busy(app, client):
+    """Занятый пул хеширования отвечает 503 с Retry-After, а не держит запрос"""
+    hasher = PasswordHasher(method=app.config['PASSWORD_HASH_METHOD'], salt_length=app.config['PASSWORD_SALT_LENGTH'],
+                            workers=1, queue_size=0, queue_timeout=0.01)
+    app.extensions['password_hasher'] = hasher
+    hasher._slots.acquire()  # Единственное место занято другим запросом
+
+    response = client.post('/api/auth/login', json={'username': 'user1', 'password': 'user1pass'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert hasher.metrics()['rejected'] == 1
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from database import db
+from models.job import Job
+from models.match import Match
+from models.prediction import Prediction
+from services import job_service, match_service
+
+
+def test_deferred_scoring_runs_as_deduplicated_job(app, client, login):
+    """При DEFERRED_SCORING запрос администратора только ставит задачу; очки начисляет планировщик"""
+    app.config['DEFERRED_SCORING'] = True
+    headers = login('admin', 'adminpass')
+
+    for home_score in (2, 3):
+        response = client.put('/api/matches/matches/3', headers=headers,
+                              json={'status': 'finished', 'home_score': home_score, 'away_score': 1})
+        assert response.status_code == 200
+
+    # Повторное изменение результата не создает вторую ожидающую задачу
+    jobs = Job.query.all()
+    assert [(job.kind, job.status) for job in jobs] == [('score_match', 'queued')]
+    assert Prediction.query.filter(Prediction.points_earned.isnot(None)).count() == 0
+
+    assert job_service.run_pending('test') == 1
+    assert {p.user_id: p.points_earned for p in Prediction.query.filter_by(match_id=3)} == {1: 0, 2: 3}
+
+    metrics = client.get('/api/jobs/metrics', headers=headers).json
+    assert (metrics['done'], metrics['backlog']) == (1, 0)
+
+
+def test_failed_job_is_retried_with_backoff(app, monkeypatch):
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError('сбой')
+
+    monkeypatch.setitem(job_service.HANDLERS, 'rebuild_leaderboard', flaky)
+    job = job_service.enqueue('rebuild_leaderboard')
+    db.session.commit()
+
+    assert job_service.run_pending('test') == 1
+    job = db.session.get(Job, job.id)
+    assert (job.status, job.attempts) == ('queued', 1)
+    assert job.run_at > datetime.utcnow() and 'сбой' in job.last_error
+
+    # До истечения задержки задача не берется; после — выполняется успешно
+    assert job_service.claim('test') is None
+    job.run_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert job_service.run_pending('test') == 1
+    assert db.session.get(Job, job.id).status == 'done'
+
+
+def test_start_due_matches_moves_scheduled_to_live(app):
+    db.session.get(Match, 3).match_date = datetime.utcnow() - timedelta(minutes=1)
+    db.session.get(Match, 4).match_date = datetime.utcnow() + timedelta(days=1)
+    db.session.commit()
+
+    assert match_service.start_due_matches() == 1
+    assert (db.session.get(Match, 3).status, db.session.get(Match, 4).status) == ('live', 'scheduled')
+    assert match_service.start_due_matches() == 0
@@ -0,0 +1,39 @@
+import json
+import logging
+
+from utils.log import LogStats, SamplingFilter, configure_logging, flush_logs
+
+
+def test_async_json_log_carries_request_id(app, client, login, tmp_path):
+    """Записи пишутся фоновым потоком в JSON с request_id; выборка отбрасывает отладочные записи"""
+    log_file = tmp_path / 'app.log'
+    stats = app.extensions['log_stats']
+    configure_logging(dict(app.config, LOG_ASYNC=True, LOG_FILE=str(log_file), LOG_LEVEL='DEBUG',
+                           LOG_SAMPLING={'app': 0}), stats)
+    app.config['LOG_REQUESTS'] = True
+    headers = login('user1', 'user1pass')
+
+    response = client.get('/api/predictions/', headers=dict(headers, **{'X-Request-ID': 'req-42'}))
+    assert response.headers['X-Request-ID'] == 'req-42'
+    flush_logs()
+
+    records = [json.loads(line) for line in log_file.read_text(encoding='utf-8').splitlines()]
+    access = [record for record in records if record['logger'] == 'access']
+    assert access[-1]['request_id'] == 'req-42'
+    assert (access[-1]['path'], access[-1]['status']) == ('/api/predictions/', 200)
+    # Отладочная запись get_user_predictions отброшена выборкой app=0
+    assert not any(record['logger'] == 'app' for record in records)
+    assert stats.snapshot()['sampled_out'] >= 1
+
+
+def test_rate_limit_applies_to_logger_and_children():
+    stats = LogStats()
+    sampling = SamplingFilter({}, {'services': 2}, stats)
+
+    def record(name, level=logging.WARNING):
+        return logging.LogRecord(name, level, __file__, 0, 'сообщение', (), None)
+
+    results = [sampling.filter(record('services.job_service')) for _ in range(3)]
+    assert results == [True, True, False]
+    assert sampling.filter(record('routes.matches'))
+    assert stats.snapshot()['rate_limited'] == 1
@@ -0,0 +1,323 @@
+import json
+from datetime import datetime, timedelta
+
+from database import db
+from models.match import Match
+from models.match_event import MatchEvent
+from services import live_service, team_service
+
+
+def test_match_list_etag_and_invalidation(app, client, login):
+    """Список матчей отвечает 304 на If-None-Match и меняет ETag после записи администратора"""
+    first = client.get('/api/matches/past-matches')
+    etag = first.headers['ETag']
+
+    assert client.get('/api/matches/past-matches', headers={'If-None-Match': etag}).status_code == 304
+
+    headers = login('admin', 'adminpass')
+    client.put('/api/matches/matches/1', json={'stadium': 'Камп Ноу'}, headers=headers)
+
+    updated = client.get('/api/matches/past-matches', headers={'If-None-Match': etag})
+    assert updated.status_code == 200
+    assert updated.headers['ETag'] != etag
+    assert any(match['stadium'] == 'Камп Ноу' for match in updated.json)
+
+
+def _walk_pages(client, limit, **params):
+    """Id матчей всех страниц списка по X-Next-Cursor"""
+    ids, cursor = [], None
+    while True:
+        response = client.get('/api/matches/matches',
+                              query_string={**params, 'limit': limit, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        ids += [match['id'] for match in response.json]
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return ids
+
+
+def test_match_list_keyset_pages_across_equal_match_date(client):
+    """Курсор (match_date, id) проходит матчи с одинаковой датой без повторов и пропусков в обе стороны"""
+    kickoff = datetime(2100, 6, 1, 18, 0)
+    db.session.add_all(Match(home_team=f'K{i}', away_team=f'L{i}', match_date=kickoff) for i in range(7))
+    db.session.commit()
+
+    by_key = db.session.query(Match.id).order_by(Match.match_date, Match.id)
+    upcoming = [match_id for (match_id,) in by_key.filter(Match.match_date > datetime.utcnow())]
+    everything = [match_id for (match_id,) in by_key][::-1]
+
+    assert _walk_pages(client, 3, status='upcoming') == upcoming
+    assert _walk_pages(client, 3) == everything
+    assert len(set(everything)) == len(everything) == Match.query.count()
+
+
+def test_match_list_stream_matches_paged_response(client):
+    """stream=1 отдает потоком тот же JSON-массив, что и страницы, и продолжает с курсора"""
+    kickoff = datetime(2100, 6, 1, 18, 0)
+    db.session.add_all(Match(home_team=f'S{i}', away_team=f'T{i}', match_date=kickoff) for i in range(4))
+    db.session.commit()
+
+    paged = client.get('/api/matches/matches?limit=500').json
+    streamed = client.get('/api/matches/matches?stream=1')
+    assert streamed.is_streamed and streamed.mimetype == 'application/json'
+    assert streamed.json == paged
+
+    first = client.get('/api/matches/matches?limit=3')
+    rest = client.get('/api/matches/matches', query_string={'stream': 1, 'cursor': first.headers['X-Next-Cursor']})
+    assert first.json + rest.json == paged
+
+    empty = client.get('/api/matches/matches?stream=1&from_date=2200-01-01')
+    assert empty.get_data(as_text=True) == '[]'
+
+
+def test_import_fixtures_upserts_by_teams_and_date(client, login):
+    """Импорт CSV вставляет новые матчи, обновляет измененные и пропускает совпадающие"""
+    headers = login('admin', 'adminpass')
+    csv_data = (
+        'home_team,away_team,match_date,stadium\n'
+        'Барселона,Бавария,2024-09-15T20:00:00,Камп Ноу\n'
+        'ПСЖ,Манчестер Сити,2024-09-16T20:00:00Z,\n'
+        'Милан,Бенфика,2030-10-01T20:00:00,Сан-Сиро\n'
+        'Милан,,2030-10-01T20:00:00,\n'
+    )
+
+    def upload():
+        return client.post('/api/matches/import', headers=headers, data=csv_data.encode('utf-8'),
+                           content_type='text/csv')
+
+    first = upload().json
+    assert (first['inserted'], first['updated'], first['skipped']) == (1, 1, 2)
+    assert first['errors'][0]['line'] == 5
+
+    second = upload().json
+    assert (second['inserted'], second['updated'], second['skipped']) == (0, 0, 4)
+
+
+def test_import_fixtures_rejects_bad_status_and_scores(client, login):
+    """Недопустимый статус, нецелый счет и нестроковые поля — ошибки разбора строки, а не данные в базе"""
+    rows = [
+        {'home_team': 'A', 'away_team': 'B', 'match_date': '2030-01-01T18:00:00', 'status': 'done'},
+        {'home_team': 'A', 'away_team': 'C', 'match_date': '2030-01-01T18:00:00', 'home_score': -1},
+        {'home_team': 'A', 'away_team': 'D', 'match_date': '2030-01-01T18:00:00', 'home_score': 1.5},
+        {'home_team': 'A', 'away_team': 'E', 'match_date': '2030-01-01T18:00:00', 'away_score': True},
+        {'home_team': 'A', 'away_team': 'F', 'match_date': '2030-01-01T18:00:00', 'away_score': '-2'},
+        {'home_team': 'A', 'away_team': 'G', 'match_date': '2020-01-01T18:00:00', 'status': 'finished',
+         'home_score': '2', 'away_score': 0},
+        {'home_team': ['A'], 'away_team': 'H', 'match_date': '2030-01-01T18:00:00'},
+        {'home_team': 'A', 'away_team': 'I', 'match_date': '2030-01-01T18:00:00', 'stage': 5},
+        {'home_team': 'A', 'away_team': 'J', 'match_date': 20300101},
+    ]
+    body = '\n'.join(json.dumps(row) for row in rows).encode('utf-8')
+    report = client.post('/api/matches/import', headers=login('admin', 'adminpass'), data=body,
+                         content_type='application/x-ndjson').json
+
+    assert (report['inserted'], report['skipped']) == (1, 8)
+    assert [error['line'] for error in report['errors']] == [1, 2, 3, 4, 5, 7, 8, 9]
+    assert report['errors'][0]['message'] == 'Недопустимый статус: done'
+    assert {error['message'] for error in report['errors'][1:5]} == {'Счет должен быть неотрицательным целым числом'}
+    assert [error['message'] for error in report['errors'][5:]] == [
+        'Поле home_team должно быть строкой', 'Поле stage должно быть строкой', 'Поле match_date должно быть строкой'
+    ]
+    imported = Match.query.filter_by(home_team='A').one()
+    assert (imported.away_team, imported.home_score, imported.away_score) == ('G', 2, 0)
+
+
+def test_import_stops_with_report_on_unreadable_file(app, client, login):
+    """Файл не в UTF-8 или с поврежденным CSV: 400 с отчетом о сохраненных строках и строке остановки"""
+    app.config['IMPORT_BATCH_SIZE'] = 1
+    headers = login('admin', 'adminpass')
+
+    def upload(data):
+        return client.post('/api/matches/import', headers=headers, data=data, content_type='text/csv')
+
+    header = 'home_team,away_team,match_date\n'
+    cp1251 = (header + 'Alpha,Beta,2030-01-01T18:00:00\nЗенит,Спартак,2030-01-02T18:00:00\n').encode('cp1251')
+    response = upload(cp1251)
+    assert response.status_code == 400
+    assert response.json['inserted'] == 1  # Пачка до ошибки уже сохранена
+    assert response.json['aborted'] == {'line': 3, 'message': 'Файл должен быть в кодировке UTF-8'}
+
+    huge = header + 'Gamma,Delta,2030-01-03T18:00:00\n' + f'{"x" * 200000},Delta,2030-01-04T18:00:00\n'
+    response = upload(huge.encode('utf-8'))
+    assert response.status_code == 400
+    assert response.json['inserted'] == 1
+    assert response.json['aborted']['line'] == 3
+    assert response.json['aborted']['message'].startswith('Некорректный CSV')
+
+
+def test_team_search_cyrillic_case_insensitive_and_short_substring(client, login):
+    """Поиск команд без учета регистра кириллицы; запросы короче трех символов ищут подстроку"""
+    headers = login('admin', 'adminpass')
+    for home, away in [('Спартак Москва', 'ЦСКА'), ('Локомотив Москва', 'Зенит')]:
+        response = client.post('/api/matches/matches', headers=headers,
+                               json={'home_team': home, 'away_team': away, 'match_date': '2100-07-01T18:00:00'})
+        assert response.status_code == 201
+
+    def found(query):
+        return set(team_service.find_team_names(query))
+
+    assert found('МОСКВА') == found('москва') == {'Спартак Москва', 'Локомотив Москва'}
+    assert found('ск') == {'Спартак Москва', 'Локомотив Москва', 'ЦСКА'}  # Подстрока, не только префикс
+    assert found('Ит') == {'Зенит', 'Манчестер Сити'}
+    assert found('%') == set()
+    assert client.get('/api/matches/teams?prefix=зЕн').json == ['Зенит']
+
+    teams = {match['home_team'] for match in client.get('/api/matches/matches?team=СК').json}
+    assert teams == {'Спартак Москва', 'Локомотив Москва'}
+
+
+def test_live_stream_resumes_from_last_event_id(app, client, login):
+    """Изменение счета попадает в SSE-поток; переподключение с Last-Event-ID дочитывает пропущенное"""
+    app.config['LIVE_STREAM_HEARTBEAT'] = 0.05
+    headers = login('admin', 'adminpass')
+
+    client.put('/api/matches/matches/3', json={'status': 'live', 'home_score': 1, 'away_score': 0},
+               headers=headers)
+    client.put('/api/matches/matches/3', json={'stadium': 'Бернабеу'}, headers=headers)  # Не live-поле
+    client.put('/api/matches/matches/3', json={'home_score': 2}, headers=headers)
+
+    response = client.get('/api/matches/live/stream', headers={'Last-Event-ID': '1'}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    try:
+        assert next(chunks).decode().startswith('retry:')
+        missed = next(chunks).decode()
+        assert next(chunks).decode() == ': heartbeat\n\n'
+    finally:
+        response.close()
+
+    assert missed.startswith('id: 2\nevent: match\n')
+    assert '"home_score": 2' in missed and 'id: 1\n' not in missed
+
+
+def test_live_broker_holds_events_behind_uncommitted_id(app):
+    """Событие за пропуском в id ждет, пока пропуск не заполнится или не истечет LIVE_POLL_LAG"""
+    broker = live_service.get_live_broker()
+    broker.poll_lag = 60
+
+    def add_event(event_id):
+        db.session.add(MatchEvent(id=event_id, match_id=3, status='live', home_score=event_id, away_score=0))
+        db.session.commit()
+        broker.poll()
+
+    add_event(1)
+    add_event(3)  # Транзакция события 2 еще не закоммичена
+    assert broker.current_id() == 1
+    add_event(2)
+    assert broker.current_id() == 3
+    assert [frame.split('\n')[0] for frame in broker.events_after(0)[0]] == ['id: 1', 'id: 2', 'id: 3']
+
+    add_event(5)
+    broker.poll_lag = 0  # Событие 4 так и не появилось: транзакция откатилась
+    broker.poll()
+    assert broker.current_id() == 5
+
+
+def test_live_stream_limit_per_process(app, client):
+    """Сверх LIVE_MAX_STREAMS поток отклоняется с 503; закрытый поток освобождает место"""
+    live_service.get_live_broker().max_streams = 1
+
+    first = client.get('/api/matches/live/stream', buffered=False)
+    rejected = client.get('/api/matches/live/stream', buffered=False)
+    assert (first.status_code, rejected.status_code) == (200, 503)
+    assert rejected.headers['Retry-After'] == '3'
+
+    first.close()
+    second = client.get('/api/matches/live/stream', buffered=False)
+    assert second.status_code == 200
+    second.close()
+
+
+def test_prune_events_keeps_latest(app):
+    """Старые события удаляются, последнее остается — id новых событий не повторяются"""
+    old = datetime.utcnow() - timedelta(seconds=app.config['LIVE_EVENTS_RETENTION'] + 60)
+    db.session.add_all([MatchEvent(match_id=3, created_at=old) for _ in range(3)])
+    db.session.add(MatchEvent(match_id=4))
+    db.session.commit()
+    assert live_service.prune_events() == 3
+
+    db.session.query(MatchEvent).update({'created_at': old})
+    db.session.commit()
+    assert live_service.prune_events() == 0
+    assert [event.match_id for event in MatchEvent.query] == [4]
+
+
+def test_match_payloads_match_to_dict(app, client, login):
+    """Ответы из JSON-фрагментов совпадают с Match.to_dict, фрагмент обновляется после изменения матча"""
+    expected = sorted((match.to_dict() for match in Match.query), key=lambda match: match['id'])
+    listed = client.get('/api/matches/matches?limit=100').json
+    assert sorted(listed, key=lambda match: match['id']) == expected
+    assert client.get('/api/matches/matches/3').json == expected[2]
+
+    client.put('/api/matches/matches/3', json={'stadium': 'Бернабеу'}, headers=login('admin', 'adminpass'))
+    assert client.get('/api/matches/matches?limit=100&stream=1').json[1]['stadium'] == 'Бернабеу'
+    assert client.get('/api/matches/matches/3').json == db.session.get(Match, 3).to_dict()
+
+
+def test_gzip_compression_and_precompressed_cache(app, client, login, monkeypatch):
+    """Большие JSON-ответы сжимаются по Accept-Encoding; кэш ответов сжимает тело один раз"""
+    import gzip
+    from utils import http_cache
+
+    app.config['COMPRESSION_MIN_SIZE'] = 100
+    compressions = []
+    monkeypatch.setattr(http_cache, 'gzip_bytes', lambda data: compressions.append(data) or gzip.compress(data))
+
+    plain = client.get('/api/matches/past-matches')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    accept = {'Accept-Encoding': 'gzip, deflate'}
+    first = client.get('/api/matches/past-matches', headers=accept)
+    second = client.get('/api/matches/past-matches', headers=accept)
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(first.data) == plain.data
+    assert second.data == first.data
+    assert len(compressions) == 1
+
+    # ETag сжатого ответа слабый, и условный запрос по нему дает 304
+    assert first.headers['ETag'] == f"W/{plain.headers['ETag']}"
+    revalidated = client.get('/api/matches/past-matches', headers=dict(accept, **{'If-None-Match': first.headers['ETag']}))
+    assert revalidated.status_code == 304
+
+    # Ответы вне кэша сжимаются в after_request; gzip;q=0 — отказ клиента от сжатия
+    headers = login('user1', 'user1pass')
+    predictions = client.get('/api/predictions/', headers=dict(headers, **accept))
+    assert predictions.headers['Content-Encoding'] == 'gzip'
+    refused = client.get('/api/predictions/', headers=dict(headers, **{'Accept-Encoding': 'gzip;q=0'}))
+    assert 'Content-Encoding' not in refused.headers
+    assert gzip.decompress(predictions.data) == refused.data
+
+
+def test_calendar_groups_by_local_day_across_dst(client, login):
+    """Календарь группирует матчи по местным дням с учетом перехода на зимнее время и обновляется после записи"""
+    headers = login('admin', 'adminpass')
+    ids = []
+    # Europe/Berlin: 27.10.2024 в 01:00 UTC смещение меняется с +2 на +1
+    for home, match_date in [('A', '2024-10-26T22:30:00'), ('B', '2024-10-27T22:30:00'), ('C', '2024-10-31T23:30:00')]:
+        response = client.post('/api/matches/matches', headers=headers,
+                               json={'home_team': home, 'away_team': 'X', 'match_date': match_date})
+        ids.append(response.json['match_id'])
+
+    def calendar(tz, start='2024-10-26', end='2024-11-01'):
+        response = client.get(f'/api/matches/calendar?from={start}&to={end}&tz={tz}')
+        assert response.status_code == 200
+        return [(day['date'], day['count'], [(match['id'], match['time']) for match in day['matches']])
+                for day in response.json['days']]
+
+    assert calendar('Europe/Berlin') == [
+        ('2024-10-27', 2, [(ids[0], '00:30'), (ids[1], '23:30')]),
+        ('2024-11-01', 1, [(ids[2], '00:30')]),
+    ]
+    assert calendar('UTC') == [
+        ('2024-10-26', 1, [(ids[0], '22:30')]),
+        ('2024-10-27', 1, [(ids[1], '22:30')]),
+        ('2024-10-31', 1, [(ids[2], '23:30')]),
+    ]
+
+    # Перенос матча меняет оба затронутых месяца
+    client.put(f'/api/matches/matches/{ids[2]}', headers=headers, json={'match_date': '2024-10-30T10:00:00'})
+    assert calendar('Europe/Berlin')[-1] == ('2024-10-30', 1, [(ids[2], '11:00')])
+
+    assert client.get('/api/matches/calendar?tz=Mars/Base').status_code == 400
+    assert client.get('/api/matches/calendar?from=2024-01-01&to=2024-12-31').status_code == 400
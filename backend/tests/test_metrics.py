@@ -0,0 +1,43 @@
+import logging
+import os
+import re
+
+
+def test_metrics_record_latency_and_sql_per_endpoint(client, login):
+    headers = login('admin', 'adminpass')
+    for _ in range(2):
+        client.get('/api/matches/matches/1')
+    client.get('/api/matches/matches/999')
+
+    body = client.get('/api/metrics', headers=headers).get_data(as_text=True)
+    process = f'process_id="{os.getpid()}"'
+    labels = f'{process},endpoint="/api/matches/matches/<int:id>",method="GET"'
+
+    assert re.search(rf'http_request_duration_seconds_count{{{labels},status="200"}} 2\n', body)
+    assert re.search(rf'http_request_duration_seconds_count{{{labels},status="404"}} 1\n', body)
+    # Каждый запрос выполнил хотя бы один SQL-запрос: корзина le="0" пуста
+    assert f'http_request_sql_statements_bucket{{{process},endpoint="/api/matches/matches/<int:id>",le="0"}} 0\n' in body
+    assert re.search(rf'^jobs_backlog{{{process}}} 0$', body, re.MULTILINE)
+    # Ряды разных воркеров не сливаются: метка process_id есть у каждого образца
+    samples = [line for line in body.splitlines() if line and not line.startswith('#')]
+    assert all(process in line for line in samples)
+
+
+def test_metrics_require_admin_or_scrape_token(app, client, login):
+    """Метрики отдаются администратору или по METRICS_TOKEN, остальным — 401/403"""
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers=login('user1', 'user1pass')).status_code == 403
+    assert client.get('/api/metrics', headers=login('admin', 'adminpass')).status_code == 200
+
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer wrong'}).status_code != 200
+
+
+def test_query_count_warning(app, client, caplog):
+    app.config['METRICS_QUERY_WARNING_THRESHOLD'] = 1
+
+    with caplog.at_level(logging.WARNING, logger='utils.metrics'):
+        client.get('/api/matches/matches/1')
+
+    assert 'GET /api/matches/matches/1' in caplog.text
@@ -0,0 +1,279 @@
+import itertools
+from datetime import datetime
+
+import pytest
+
+from database import db
+from models.leaderboard import LeaderboardEntry
+from models.match import Match
+from models.prediction import Prediction
+from models.user import User
+from models.user_stats import UserStats
+from services import leaderboard_service, prediction_service, stats_service
+
+
+@pytest.mark.parametrize('result', [(2, 1), (0, 0), (1, 3), (None, None)])
+@pytest.mark.parametrize('status', ['finished', 'scheduled'])
+def test_score_match_matches_calculate_points(app, result, status):
+    """Очки из score_match совпадают с Prediction.calculate_points для всех вариантов счета"""
+    scores = list(itertools.product(range(4), repeat=2))
+    users = [User(username=f'scorer{i}', email=f'scorer{i}@example.com', password_hash='x') for i in range(len(scores))]
+    match = Match(home_team='A', away_team='B', match_date=datetime(2030, 1, 1),
+                  home_score=result[0], away_score=result[1], status=status)
+    db.session.add_all(users + [match])
+    db.session.flush()
+
+    predictions = [
+        Prediction(user_id=user.id, match_id=match.id, home_score=home, away_score=away)
+        for user, (home, away) in zip(users, scores)
+    ]
+    db.session.add_all(predictions)
+    db.session.commit()
+
+    expected = {prediction.id: prediction.calculate_points() for prediction in predictions}
+
+    prediction_service.score_match(match)
+    db.session.commit()
+
+    actual = dict(db.session.query(Prediction.id, Prediction.points_earned).filter_by(match_id=match.id))
+    assert actual == expected
+
+
+def test_duplicate_prediction_rejected_by_unique_constraint(client, login):
+    """Повторный прогноз на тот же матч отклоняется уникальным индексом"""
+    match = Match(home_team='A', away_team='B', match_date=datetime(2100, 1, 1))
+    db.session.add(match)
+    db.session.commit()
+    headers = login('user1', 'user1pass')
+
+    first = client.post(f'/api/predictions/{match.id}', json={'home_score': 1, 'away_score': 0}, headers=headers)
+    second = client.post(f'/api/predictions/{match.id}', json={'home_score': 2, 'away_score': 0}, headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 400
+    assert Prediction.query.filter_by(match_id=match.id).count() == 1
+
+
+def test_prediction_cursor_pages_across_equal_created_at(client, login):
+    """Курсор по (created_at, id) проходит группу равных created_at без повторов и пропусков"""
+    matches = [Match(home_team=f'C{i}', away_team=f'D{i}', match_date=datetime(2100, 2, 1 + i)) for i in range(7)]
+    db.session.add_all(matches)
+    db.session.flush()
+    same_time = datetime(2024, 5, 1, 12, 0)
+    db.session.add_all(Prediction(user_id=2, match_id=match.id, home_score=1, away_score=0,
+                                  created_at=same_time if i < 5 else datetime(2024, 5, 1 + i))
+                       for i, match in enumerate(matches))
+    db.session.commit()
+    expected = [prediction_id for (prediction_id,) in db.session.query(Prediction.id).filter_by(user_id=2)
+                .order_by(Prediction.created_at.desc(), Prediction.id.desc())]
+    headers = login('user1', 'user1pass')
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        response = client.get('/api/predictions/', headers=headers,
+                              query_string={'limit': 3, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen += [prediction['id'] for prediction in response.json]
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+
+    assert seen == expected and len(set(seen)) == len(seen) == 8
+    assert pages == 3  # Последняя страница неполная и без X-Next-Cursor
+
+
+def test_batch_submission_creates_updates_and_reports_errors(client, login):
+    """Пакетная отправка: новые и существующие прогнозы, ошибки по элементам"""
+    upcoming = [Match(home_team=f'H{i}', away_team=f'A{i}', match_date=datetime(2100, 1, 1 + i)) for i in range(3)]
+    past = Match(home_team='P', away_team='Q', match_date=datetime(2000, 1, 1))
+    db.session.add_all(upcoming + [past])
+    db.session.commit()
+    headers = login('user1', 'user1pass')
+    client.post(f'/api/predictions/{upcoming[0].id}', json={'home_score': 0, 'away_score': 0}, headers=headers)
+
+    response = client.post('/api/predictions/batch', headers=headers, json={'predictions': [
+        {'match_id': upcoming[0].id, 'home_score': 2, 'away_score': 1},
+        {'match_id': upcoming[1].id, 'home_score': 1, 'away_score': 1, 'comment': 'Ничья'},
+        {'match_id': past.id, 'home_score': 1, 'away_score': 0},
+        {'match_id': 10 ** 6, 'home_score': 1, 'away_score': 0},
+        {'match_id': upcoming[2].id, 'home_score': 'два', 'away_score': 0},
+        {'match_id': str(upcoming[2].id), 'home_score': 1, 'away_score': 0},
+        {'home_score': 1, 'away_score': 0},
+    ]})
+
+    assert response.status_code == 200
+    statuses = [result['status'] for result in response.json['results']]
+    assert statuses == ['updated', 'created', 'error', 'error', 'error', 'error', 'error']
+    messages = [result.get('message') for result in response.json['results'][-2:]]
+    assert messages == ['match_id должен быть целым числом', 'Не указан match_id']
+    assert Prediction.query.filter_by(match_id=upcoming[0].id, user_id=2).one().home_score == 2
+
+
+def _stats_snapshot():
+    return sorted(
+        (row.user_id, row.stage, row.predictions_count, row.exact_count, row.outcome_count,
+         row.total_points, row.current_streak)
+        for row in UserStats.query
+    )
+
+
+def test_stats_follow_scoring_and_match_rebuild(client, login):
+    """Статистика обновляется при начислении очков (в т.ч. не по порядку и повторно) и совпадает с rebuild()"""
+    matches = [Match(home_team=f'H{i}', away_team=f'A{i}', match_date=datetime(2024, 1, 1 + i),
+                     stage='Плей-офф' if i < 2 else 'Финал') for i in range(4)]
+    db.session.add_all(matches)
+    db.session.flush()
+    # user1: точный счет, исход, промах, точный счет
+    db.session.add_all(Prediction(user_id=2, match_id=match.id, home_score=home, away_score=away)
+                       for match, (home, away) in zip(matches, [(1, 0), (3, 0), (0, 2), (2, 2)]))
+    db.session.commit()
+    headers = login('admin', 'adminpass')
+
+    def finish(match, home, away):
+        response = client.put(f'/api/matches/matches/{match.id}', headers=headers,
+                              json={'status': 'finished', 'home_score': home, 'away_score': away})
+        assert response.status_code == 200
+
+    finish(matches[0], 1, 0)
+    finish(matches[1], 1, 0)
+    finish(matches[3], 2, 2)
+    finish(matches[2], 1, 0)  # Матч раньше уже учтенного: серия пересчитывается по истории
+
+    stats = client.get('/api/predictions/stats', headers=login('user1', 'user1pass')).json
+    assert (stats['predictions_count'], stats['exact_count'], stats['outcome_count'], stats['total_points']) == (4, 2, 1, 7)
+    assert (stats['accuracy'], stats['current_streak']) == (75.0, 1)
+    assert {stage['stage']: stage['total_points'] for stage in stats['stages']} == {'Плей-офф': 4, 'Финал': 3}
+
+    finish(matches[2], 0, 2)  # Исправление результата: промах стал точным счетом
+    assert client.get('/api/predictions/stats', headers=login('user1', 'user1pass')).json['current_streak'] == 4
+
+    client.delete(f'/api/matches/matches/{matches[1].id}', headers=headers)
+    incremental = _stats_snapshot()
+    stats_service.rebuild()
+    assert incremental == _stats_snapshot()
+
+
+def test_stats_follow_stage_and_date_changes_of_scored_match(client, login):
+    """Смена стадии или даты оцененного матча (PUT и импорт) переносит его вклад в статистике"""
+    matches = [Match(home_team=f'H{i}', away_team=f'A{i}', match_date=datetime(2024, 2, 1 + i), stage='Группа')
+               for i in range(3)]
+    db.session.add_all(matches)
+    db.session.flush()
+    # user1: промах, исход, точный счет — серия 2
+    db.session.add_all(Prediction(user_id=2, match_id=match.id, home_score=home, away_score=away)
+                       for match, (home, away) in zip(matches, [(0, 3), (2, 0), (1, 1)]))
+    db.session.commit()
+    headers = login('admin', 'adminpass')
+    for match in matches:
+        client.put(f'/api/matches/matches/{match.id}', headers=headers,
+                   json={'status': 'finished', 'home_score': 1, 'away_score': 1 if match is matches[2] else 0})
+
+    # Промах переносится в конец (серия обрывается), исход — в другую стадию, точный счет — без стадии
+    client.put(f'/api/matches/matches/{matches[0].id}', headers=headers, json={'match_date': '2024-03-01T20:00:00'})
+    client.put(f'/api/matches/matches/{matches[1].id}', headers=headers, json={'stage': 'Плей-офф'})
+    csv_data = f'home_team,away_team,match_date,stage\nH2,A2,{matches[2].match_date.isoformat()},\n'
+    assert client.post('/api/matches/import', headers=headers, data=csv_data.encode('utf-8'),
+                       content_type='text/csv').json['updated'] == 1
+
+    stats = client.get('/api/predictions/stats', headers=login('user1', 'user1pass')).json
+    assert (stats['total_points'], stats['current_streak']) == (4, 0)
+    assert {stage['stage']: stage['total_points'] for stage in stats['stages']} == {'Группа': 0, 'Плей-офф': 1}
+
+    incremental = _stats_snapshot()
+    stats_service.rebuild()
+    assert incremental == _stats_snapshot()
+
+
+def test_batch_results_apply_matchday_in_one_transaction(client, login):
+    """Результаты игрового дня вводятся одним запросом; ошибка в любом элементе не меняет ничего"""
+    headers = login('admin', 'adminpass')
+    assert client.post('/api/matches/results', headers=login('user1', 'user1pass'),
+                       json={'results': [{'match_id': 3, 'status': 'finished'}]}).status_code == 403
+
+    failed = client.post('/api/matches/results', headers=headers, json={'results': [
+        {'match_id': 3, 'home_score': 2, 'away_score': 1, 'status': 'finished'},
+        {'match_id': 999, 'status': 'finished'},
+        {'match_id': 4, 'home_score': -1},
+        {'match_id': '4', 'status': 'finished'},
+    ]})
+    assert failed.status_code == 400
+    assert [error['index'] for error in failed.json['errors']] == [2, 3]
+    assert failed.json['errors'][1]['message'] == 'match_id должен быть целым числом'
+    db.session.expire_all()
+    assert db.session.get(Match, 3).status == 'scheduled'
+
+    response = client.post('/api/matches/results', headers=headers, json={'results': [
+        {'match_id': 4, 'home_score': 0, 'away_score': 0, 'status': 'finished'},
+        {'match_id': 3, 'home_score': 2, 'away_score': 1, 'status': 'finished'},
+    ]})
+    assert response.status_code == 200
+    assert [(result['match_id'], result['scoring'], result['rescored']) for result in response.json['results']] == [
+        (4, 'scored', 0), (3, 'scored', 2)
+    ]
+    assert response.json['rescored'] == 2
+
+    db.session.expire_all()
+    points = dict(db.session.query(Prediction.user_id, Prediction.points_earned).filter_by(match_id=3))
+    assert points == {1: 0, 2: 1}
+    assert client.get('/api/predictions/stats', headers=login('user1', 'user1pass')).json['total_points'] == 1
+
+
+def test_leaderboard_ranks_ties_on_pages_and_around_user(client):
+    """Равные очки дают равный ранг (1, 2, 2, 2, 5) на любой странице и в окне вокруг пользователя"""
+    users = [User(username=f'ranked{i}', email=f'ranked{i}@example.com', password_hash='x') for i in range(5)]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all(LeaderboardEntry(user_id=user.id, total_points=points, predictions_count=1)
+                       for user, points in zip(users, [10, 7, 7, 7, 3]))
+    db.session.commit()
+
+    def ranks(limit, offset=0):
+        page = client.get(f'/api/predictions/leaderboard?limit={limit}&offset={offset}').json
+        return [(entry['username'], entry['rank']) for entry in page]
+
+    assert ranks(10) == [('ranked0', 1), ('ranked1', 2), ('ranked2', 2), ('ranked3', 2), ('ranked4', 5)]
+    # Страница начинается внутри группы равных очков
+    assert ranks(2, offset=2) == [('ranked2', 2), ('ranked3', 2)]
+    assert ranks(2, offset=3) == [('ranked3', 2), ('ranked4', 5)]
+
+    position = leaderboard_service.get_user_position(users[3].id, around=1)
+    assert position['rank'] == 2
+    assert [(entry['username'], entry['rank']) for entry in position['neighbours']] == [
+        ('ranked2', 2), ('ranked3', 2), ('ranked4', 5)
+    ]
+    assert leaderboard_service.get_user_position(users[4].id, around=10)['neighbours'][0]['rank'] == 1
+
+
+def test_leaderboard_follows_rescoring_and_match_deletion(client, login):
+    """Исправление счета меняет очки на разницу, удаление матча возвращает прежние итоги"""
+    headers = login('admin', 'adminpass')
+    earlier = Match(home_team='H', away_team='A', match_date=datetime(2024, 3, 1))
+    db.session.add(earlier)
+    db.session.flush()
+    db.session.add(Prediction(user_id=2, match_id=earlier.id, home_score=1, away_score=0))
+    db.session.commit()
+
+    def finish(match_id, home, away):
+        response = client.put(f'/api/matches/matches/{match_id}', headers=headers,
+                              json={'status': 'finished', 'home_score': home, 'away_score': away})
+        assert response.status_code == 200
+
+    def standings():
+        db.session.expire_all()
+        return {entry.user_id: (entry.total_points, entry.predictions_count) for entry in LeaderboardEntry.query}
+
+    finish(earlier.id, 1, 0)
+    before = standings()
+    assert before == {2: (3, 1)}
+
+    # Прогнозы на матч 3: user1 — 3:1, admin — 2:2
+    finish(3, 3, 1)
+    assert standings() == {1: (0, 1), 2: (6, 2)}
+    finish(3, 2, 2)
+    assert standings() == {1: (3, 1), 2: (3, 2)}
+    finish(3, 2, 0)
+    assert standings() == {1: (0, 1), 2: (4, 2)}
+
+    assert client.delete('/api/matches/matches/3', headers=headers).status_code == 200
+    assert standings() == {1: (0, 0), 2: before[2]}
@@ -0,0 +1,127 @@
+"""
+Регрессионные тесты планов запросов.
+
+Каждый маршрут вызывается через тестовый клиент, все выполненные им SQL-запросы
+перехватываются событием движка и проверяются через EXPLAIN QUERY PLAN:
+полный просмотр таблицы (SCAN <таблица> без индекса) считается ошибкой.
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from database import db
+from models.match import Match
+from models.prediction import Prediction
+
+# «SCAN matches» — полный просмотр; «SCAN matches USING INDEX ...» — просмотр индекса
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+@pytest.fixture
+def data(app):
+    """Несколько будущих и завершенных матчей с прогнозами обоих тестовых пользователей"""
+    now = datetime.utcnow()
+    matches = [
+        Match(home_team=f'Хозяева {i}', away_team=f'Гости {i}', match_date=now + timedelta(days=i - 3),
+              status='finished' if i < 3 else 'scheduled',
+              home_score=1 if i < 3 else None, away_score=0 if i < 3 else None)
+        for i in range(8)
+    ]
+    db.session.add_all(matches)
+    db.session.flush()
+    for user_id in (1, 2):
+        for match in matches[3:6]:
+            db.session.add(Prediction(user_id=user_id, match_id=match.id, home_score=1, away_score=0))
+    db.session.commit()
+    return [match.id for match in matches]
+
+
+def _captured_statements(client, method, url, **kwargs):
+    """Выполнение запроса к маршруту и перехват отправленных в БД SQL-запросов"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.open(url, method=method, **kwargs)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code < 400, response.get_data(as_text=True)
+    return statements
+
+
+def _full_scans(statements):
+    """Полные просмотры таблиц в планах перехваченных запросов"""
+    tables = set(db.metadata.tables)
+    scans = []
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'INSERT')):
+                continue
+            plan = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+            for row in plan:
+                found = FULL_SCAN.match(row[-1])
+                if found and found.group(1) in tables:
+                    scans.append(f'{row[-1]}: {statement}')
+    return scans
+
+
+ROUTES = [
+    ('GET', '/api/matches/matches?limit=2', 'user'),
+    ('GET', '/api/matches/matches?status=past&limit=2', 'user'),
+    ('GET', '/api/matches/matches?status=upcoming&limit=2', 'user'),
+    ('GET', '/api/matches/matches?from_date=2020-01-01T00:00:00&to_date=2100-01-01T00:00:00', 'user'),
+    ('GET', '/api/matches/matches/{match}', 'user'),
+    ('GET', '/api/matches/matches?team=реал', 'user'),
+    ('GET', '/api/matches/matches?team=ба', 'user'),
+    ('GET', '/api/matches/teams?prefix=Ар', 'user'),
+    ('GET', '/api/matches/calendar?from=2024-03-20&to=2024-04-10&tz=Europe/Berlin', 'user'),
+    ('GET', '/api/matches/past-matches?limit=2', 'user'),
+    ('GET', '/api/matches/upcoming-matches?limit=2', 'user'),
+    ('GET', '/api/predictions/?limit=2', 'user'),
+    ('GET', '/api/predictions/?match_status=upcoming&limit=2', 'user'),
+    ('GET', '/api/predictions/leaderboard?limit=2&offset=1', 'user'),
+    ('GET', '/api/predictions/leaderboard/me', 'user'),
+    ('GET', '/api/predictions/stats', 'user'),
+    ('POST', '/api/predictions/{free_match}', 'user'),
+    ('PUT', '/api/matches/matches/{match}', 'admin'),
+    ('POST', '/api/matches/results', 'admin'),
+    ('DELETE', '/api/matches/matches/{match}', 'admin'),
+    ('GET', '/api/auth/me', 'user'),
+]
+
+
+@pytest.mark.parametrize('method,url,role', ROUTES)
+def test_route_queries_use_indexes(client, login, data, method, url, role):
+    headers = login('admin', 'adminpass') if role == 'admin' else login('user1', 'user1pass')
+
+    # Таблица лидеров должна быть непустой, чтобы запросы ранга реально выполнялись
+    client.put(f'/api/matches/matches/{data[4]}', json={'home_score': 1, 'away_score': 0, 'status': 'finished'},
+               headers=login('admin', 'adminpass'))
+
+    url = url.format(match=data[3], free_match=data[7])
+    body = {'home_score': 2, 'away_score': 1, 'status': 'finished'} if method in ('POST', 'PUT') else None
+    if url.endswith('/results'):
+        body = {'results': [dict(body, match_id=data[3])]}
+
+    statements = _captured_statements(client, method, url, headers=headers, json=body)
+    assert statements
+
+    scans = _full_scans(statements)
+    assert not scans, '\n'.join(scans)
+
+
+def test_paginated_page_queries_use_indexes(client, login, data):
+    """Запросы вторых страниц (с условием курсора) тоже используют индексы"""
+    headers = login('user1', 'user1pass')
+    for url in ('/api/matches/matches?limit=2', '/api/matches/upcoming-matches?limit=2', '/api/predictions/?limit=2'):
+        cursor = client.get(url, headers=headers).headers['X-Next-Cursor']
+        statements = _captured_statements(client, 'GET', f'{url}&cursor={cursor}', headers=headers)
+        scans = _full_scans(statements)
+        assert not scans, '\n'.join(scans)
@@ -0,0 +1,83 @@
+import hmac
+from functools import wraps
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from models.user import User
+from utils.cache import TTLCache
+
+
+def init_user_cache(app):
+    """Создание TTL-кэша данных пользователей для приложения"""
+    app.extensions['user_cache'] = TTLCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+
+
+def _user_cache():
+    return current_app.extensions['user_cache']
+
+
+def token_claims(user):
+    """Дополнительные claims токенов: роль пользователя проверяется без запроса к БД"""
+    return {'is_admin': bool(user.is_admin)}
+
+
+def get_user_data(user_id):
+    """
+    Данные пользователя (User.to_dict) через TTL-кэш.
+    Для изменения пользователя нужна строка из сессии — используйте User.query.get.
+    """
+    cache = _user_cache()
+    data = cache.get(user_id)
+    if data is None:
+        user = User.query.get(user_id)
+        if user is None:
+            return None
+        data = user.to_dict()
+        cache.set(user_id, data)
+    return data
+
+
+def forget_user(user_id):
+    """Удаление пользователя из кэша после изменения его данных"""
+    _user_cache().delete(user_id)
+
+
+def admin_required(view):
+    """
+    Доступ только для администраторов.
+    Роль берется из claim is_admin токена; для токенов, выданных до появления
+    claim, используется кэшированная запись пользователя.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        verify_jwt_in_request()
+
+        is_admin = get_jwt().get('is_admin')
+        if is_admin is None:
+            user = get_user_data(get_jwt_identity())
+            is_admin = bool(user and user['is_admin'])
+
+        if not is_admin:
+            return jsonify({'message': 'Доступ запрещен'}), 403
+
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def token_or_admin_required(config_key):
+    """
+    Доступ по статическому токену из конфигурации (Authorization: Bearer <токен>) —
+    для сборщиков вроде Prometheus, у которых нет JWT, — или администратору.
+    Пустое значение настройки отключает доступ по токену.
+    """
+    def decorator(view):
+        admin_view = admin_required(view)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            token = current_app.config.get(config_key)
+            provided = request.headers.get('Authorization', '').encode('utf-8')
+            if token and hmac.compare_digest(provided, f'Bearer {token}'.encode('utf-8')):
+                return view(*args, **kwargs)
+            return admin_view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,58 @@
+"""
+Сжатие ответов gzip по Accept-Encoding клиента.
+
+Ответы больше COMPRESSION_MIN_SIZE байт с типом из COMPRESSION_MIMETYPES сжимаются
+в after_request. Закэшированные ответы (utils.http_cache) хранят сжатое тело рядом
+с исходным, и повторный запрос не тратит время ни на сериализацию, ни на сжатие.
+"""
+import gzip
+from flask import current_app, request
+
+
+def init_compression(app):
+    """Подключение сжатия ответов (регистрируется после метрик: время сжатия входит в длительность запроса)"""
+    if app.config['COMPRESSION_ENABLED']:
+        app.after_request(_compress_response)
+
+
+def accepts_gzip():
+    """Клиент принимает gzip (q=0 означает отказ)"""
+    return current_app.config['COMPRESSION_ENABLED'] and request.accept_encodings['gzip'] > 0
+
+
+def compressible(mimetype, size):
+    config = current_app.config
+    return size >= config['COMPRESSION_MIN_SIZE'] and mimetype in config['COMPRESSION_MIMETYPES']
+
+
+def gzip_bytes(data):
+    """Сжатие тела; mtime=0 — одинаковый результат для одинаковых данных"""
+    return gzip.compress(data, compresslevel=current_app.config['COMPRESSION_LEVEL'], mtime=0)
+
+
+def set_compressed(response, body):
+    """
+    Подстановка сжатого тела. Сильный ETag становится слабым: байты ответа другие,
+    но представление то же, и If-None-Match по нему продолжает давать 304.
+    """
+    response.set_data(body)
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _compress_response(response):
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return response
+    if response.mimetype not in current_app.config['COMPRESSION_MIMETYPES']:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    # Уже сжатые ответы (из кэша ответов) не трогаются
+    if 'Content-Encoding' in response.headers or not accepts_gzip():
+        return response
+    if not compressible(response.mimetype, response.content_length or 0):
+        return response
+    return set_compressed(response, gzip_bytes(response.get_data()))
@@ -0,0 +1,192 @@
+"""
+Генератор данных: демонстрационные записи и синтетический объем для бенчмарков.
+
+generate() вставляет строки пачками через executemany, не создавая ORM-объектов,
+поэтому масштабируется до сотен тысяч пользователей и миллионов прогнозов.
+"""
+import random
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert
+
+from database import db
+from models.match import Match
+from models.prediction import Prediction
+from models.user import User
+from services import leaderboard_service, stats_service, team_service
+
+# Пароль всех синтетических пользователей (хеш считается один раз)
+SYNTHETIC_PASSWORD = 'password'
+
+DEMO_USERS = [
+    {'username': 'admin', 'email': 'admin@example.com', 'password': 'adminpass', 'is_admin': True},
+    {'username': 'user1', 'email': 'user1@example.com', 'password': 'user1pass', 'is_admin': False},
+]
+
+DEMO_MATCHES = [
+    {'home_team': 'Барселона', 'away_team': 'Бавария', 'home_score': 2, 'away_score': 1,
+     'match_date': datetime(2024, 9, 15, 20, 0), 'status': 'finished'},
+    {'home_team': 'ПСЖ', 'away_team': 'Манчестер Сити', 'home_score': 0, 'away_score': 2,
+     'match_date': datetime(2024, 9, 16, 20, 0), 'status': 'finished'},
+    {'home_team': 'Реал Мадрид', 'away_team': 'Ливерпуль', 'home_score': None, 'away_score': None,
+     'match_date': datetime(2025, 4, 15, 20, 0), 'status': 'scheduled'},
+    {'home_team': 'Арсенал', 'away_team': 'Интер', 'home_score': None, 'away_score': None,
+     'match_date': datetime(2025, 4, 16, 20, 0), 'status': 'scheduled'},
+]
+
+# Прогнозы демонстрационных пользователей: (индекс в DEMO_USERS, индекс в DEMO_MATCHES, счет, комментарий)
+DEMO_PREDICTIONS = [
+    (1, 2, (3, 1), 'Думаю, Реал уверенно победит дома'),
+    (0, 2, (2, 2), 'Будет ничья с голами'),
+]
+
+TEAMS = [
+    'Реал Мадрид', 'Барселона', 'Атлетико Мадрид', 'Жирона', 'Бавария', 'Боруссия Дортмунд',
+    'Байер', 'РБ Лейпциг', 'Штутгарт', 'Манчестер Сити', 'Ливерпуль', 'Арсенал', 'Челси',
+    'Астон Вилла', 'ПСЖ', 'Монако', 'Брест', 'Лилль', 'Интер', 'Милан', 'Ювентус', 'Аталанта',
+    'Болонья', 'Бенфика', 'Спортинг', 'Порту', 'ПСВ', 'Фейеноорд', 'Селтик', 'Шахтер',
+    'Црвена Звезда', 'Динамо Загреб', 'Зальцбург', 'Штурм', 'Янг Бойз', 'Слован', 'Спарта Прага',
+]
+
+STAGES = ['Общий этап', 'Плей-офф', '1/8 финала', '1/4 финала', '1/2 финала', 'Финал']
+
+
+def _insert_chunked(model, rows, chunk_size):
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(insert(model), rows[start:start + chunk_size])
+
+
+def _outcome(home, away):
+    return (home > away) - (home < away)
+
+
+def _points(prediction, result):
+    """Очки прогноза по правилам prediction_service.points_expression"""
+    if prediction == result:
+        return 3
+    return 1 if _outcome(*prediction) == _outcome(*result) else 0
+
+
+def _password_hash(password):
+    user = User()
+    user.set_password(password)
+    return user.password_hash
+
+
+def _insert_demo():
+    """Демонстрационные пользователи, матчи и прогнозы (первые id в пустой базе)"""
+    users = []
+    for data in DEMO_USERS:
+        user = User(username=data['username'], email=data['email'], is_admin=data['is_admin'])
+        user.set_password(data['password'])
+        users.append(user)
+
+    matches = [Match(**data) for data in DEMO_MATCHES]
+    db.session.add_all(users + matches)
+    db.session.flush()
+
+    db.session.add_all(
+        Prediction(user_id=users[user_index].id, match_id=matches[match_index].id,
+                   home_score=home, away_score=away, comment=comment)
+        for user_index, match_index, (home, away), comment in DEMO_PREDICTIONS
+    )
+    return len(users), len(matches), len(DEMO_PREDICTIONS)
+
+
+def _insert_users(count, chunk_size, now):
+    if not count:
+        return None
+    password_hash = _password_hash(SYNTHETIC_PASSWORD)
+    last_id = db.session.query(db.func.max(User.id)).scalar() or 0
+    _insert_chunked(User, [
+        {'username': f'fan{last_id + i}', 'email': f'fan{last_id + i}@example.com',
+         'password_hash': password_hash, 'is_admin': False, 'created_at': now}
+        for i in range(1, count + 1)
+    ], chunk_size)
+    return [user_id for (user_id,) in db.session.query(User.id).filter(User.id > last_id)]
+
+
+def _insert_matches(rng, count, chunk_size, now):
+    """Синтетические матчи в пределах полугода от now: прошедшие завершены со счетом"""
+    last_id = db.session.query(db.func.max(Match.id)).scalar() or 0
+    start = now.replace(second=0, microsecond=0)
+    rows = []
+    for _ in range(count):
+        home, away = rng.sample(TEAMS, 2)
+        match_date = start + timedelta(minutes=rng.randint(-180 * 24 * 60, 180 * 24 * 60))
+        finished = match_date < now
+        rows.append({
+            'home_team': home, 'away_team': away, 'match_date': match_date,
+            'home_score': rng.randint(0, 4) if finished else None,
+            'away_score': rng.randint(0, 4) if finished else None,
+            'stadium': None, 'stage': rng.choice(STAGES),
+            'status': 'finished' if finished else 'scheduled',
+            'created_at': now, 'updated_at': now,
+        })
+    _insert_chunked(Match, rows, chunk_size)
+    match_ids = db.session.query(Match.id).filter(Match.id > last_id).order_by(Match.id)
+    return [(match_id, row) for (match_id,), row in zip(match_ids, rows)]
+
+
+def _insert_predictions(rng, count, user_ids, matches, chunk_size):
+    """
+    count прогнозов, равномерно распределенных по матчам; у матча не больше одного
+    прогноза от пользователя. Очки завершенных матчей считаются сразу.
+    """
+    if not count or not matches or not user_ids:
+        return 0
+
+    per_match, remainder = divmod(count, len(matches))
+    inserted = 0
+    buffer = []
+    for position, (match_id, match) in enumerate(matches):
+        size = min(per_match + (1 if position < remainder else 0), len(user_ids))
+        result = (match['home_score'], match['away_score']) if match['status'] == 'finished' else None
+        for user_id in rng.sample(user_ids, size):
+            score = (rng.randint(0, 4), rng.randint(0, 4))
+            created_at = match['match_date'] - timedelta(minutes=rng.randint(60, 30 * 24 * 60))
+            buffer.append({
+                'user_id': user_id, 'match_id': match_id,
+                'home_score': score[0], 'away_score': score[1],
+                'points_earned': _points(score, result) if result else None,
+                'created_at': created_at, 'updated_at': created_at,
+            })
+        if len(buffer) >= chunk_size:
+            _insert_chunked(Prediction, buffer, chunk_size)
+            inserted += len(buffer)
+            buffer = []
+
+    _insert_chunked(Prediction, buffer, chunk_size)
+    return inserted + len(buffer)
+
+
+def generate(users=0, matches=0, predictions=0, demo=True, seed=42, chunk_size=50000, now=None):
+    """
+    Заполнение базы: демонстрационные записи (demo) и синтетический объем —
+    users пользователей, matches матчей и predictions прогнозов на них.
+    Справочник команд, таблица лидеров и статистика перестраиваются по вставленным данным.
+    Возвращает количество созданных записей.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    counts = {'users': 0, 'matches': 0, 'predictions': 0}
+
+    if demo:
+        demo_users, demo_matches, demo_predictions = _insert_demo()
+        counts.update(users=demo_users, matches=demo_matches, predictions=demo_predictions)
+
+    user_ids = _insert_users(users, chunk_size, now)
+    synthetic_matches = _insert_matches(rng, matches, chunk_size, now)
+    counts['users'] += users
+    counts['matches'] += matches
+    counts['predictions'] += _insert_predictions(rng, predictions, user_ids, synthetic_matches, chunk_size)
+
+    rows = (DEMO_MATCHES if demo else []) + [match for _, match in synthetic_matches]
+    team_service.register_teams(name for row in rows for name in (row['home_team'], row['away_team']))
+    # rebuild() коммитит транзакцию вместе со вставленными данными
+    leaderboard_service.rebuild()
+    stats_service.rebuild()
+
+    current_app.logger.debug('Сгенерированы данные: %s', counts)
+    return counts
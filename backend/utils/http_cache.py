@@ -0,0 +1,167 @@
+import hashlib
+import time
+from datetime import timedelta
+from functools import wraps
+from flask import Response, current_app, make_response, request
+from models.table_version import TableVersion
+from utils.cache import LRUCache
+from utils.compression import accepts_gzip, compressible, gzip_bytes, set_compressed
+
+# Версия таблицы матчей (table_versions.name) и теги записей кэша
+MATCHES_TABLE = 'matches'
+MATCH_LIST_TAG = 'matches:list'
+# Версии месяцев календаря матчей: table_versions.name = 'calendar:ГГГГ-ММ'
+CALENDAR_TABLE = 'calendar'
+# Наибольшее отличие местного времени от UTC (UTC-12 ... UTC+14): матч может попасть
+# в календарь соседнего месяца
+_MAX_UTC_OFFSET = timedelta(hours=14)
+
+# Заголовки, которые не сохраняются вместе с телом закэшированного ответа
+_VOLATILE_HEADERS = {'Content-Length', 'Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Vary'}
+
+
+def match_tag(match_id):
+    """Тег записей кэша, зависящих от конкретного матча"""
+    return f'match:{match_id}'
+
+
+def init_response_cache(app):
+    """Создание LRU-кэша сериализованных ответов для приложения"""
+    app.extensions['response_cache'] = LRUCache(app.config['RESPONSE_CACHE_SIZE'])
+
+
+def response_cache():
+    return current_app.extensions['response_cache']
+
+
+class CachedResponse:
+    """Сериализованный ответ вместе с его валидаторами; сжатое тело создается при первом запросе с gzip"""
+    __slots__ = ('body', 'mimetype', 'headers', 'etag', 'last_modified', 'gzip_body')
+
+    def __init__(self, body, mimetype, headers, etag, last_modified):
+        self.body = body
+        self.mimetype = mimetype
+        self.headers = headers
+        self.etag = etag
+        self.last_modified = last_modified
+        self.gzip_body = None
+
+    def compressed(self):
+        if self.gzip_body is None:
+            self.gzip_body = gzip_bytes(self.body)
+        return self.gzip_body
+
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Клиент может хранить ответ, но обязан перепроверять его через If-None-Match
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def cached_response(version, tags):
+    """
+    Условный GET и кэширование ответа представления.
+
+    version(**view_args) возвращает (версия данных, время изменения) или None,
+    если ресурса нет (тогда представление вызывается без кэша). ETag строится из
+    версии, параметров запроса и временного окна RESPONSE_CACHE_TTL: признаки
+    is_past/is_upcoming зависят от текущего времени.
+    tags(**view_args) — теги, по которым запись будет инвалидирована.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**view_args):
+            # Потоковая выдача не кэшируется
+            if request.args.get('stream') in ('1', 'true'):
+                return view(**view_args)
+
+            current = version(**view_args)
+            if current is None:
+                return view(**view_args)
+            data_version, last_modified = current
+
+            window = int(time.time() // current_app.config['RESPONSE_CACHE_TTL'])
+            key = (
+                request.endpoint,
+                tuple(sorted(request.args.items(multi=True))),
+                tuple(sorted(view_args.items())),
+                data_version,
+                window
+            )
+            etag = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:32]
+
+            # Слабое сравнение: сжатый ответ несет тот же ETag с пометкой W/
+            if request.if_none_match.contains_weak(etag):
+                return _with_validators(Response(status=304), etag, last_modified)
+
+            cache = response_cache()
+            entry = cache.get(key)
+            if entry is None:
+                response = make_response(view(**view_args))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+
+                headers = [(name, value) for name, value in response.headers if name not in _VOLATILE_HEADERS]
+                entry = CachedResponse(response.get_data(), response.mimetype, headers, etag, last_modified)
+                cache.set(key, entry, tags=tags(**view_args))
+
+            response = _with_validators(Response(entry.body, mimetype=entry.mimetype, headers=entry.headers),
+                                        entry.etag, entry.last_modified)
+            if compressible(entry.mimetype, len(entry.body)) and accepts_gzip():
+                set_compressed(response, entry.compressed())
+            return response
+
+        return wrapper
+    return decorator
+
+
+def touch_matches():
+    """Отметка изменения матчей в текущей транзакции (меняет ETag во всех процессах)"""
+    TableVersion.bump(MATCHES_TABLE)
+
+
+def invalidate_matches(*match_ids):
+    """Удаление из локального кэша списков матчей и записей конкретных матчей (после коммита)"""
+    response_cache().invalidate(MATCH_LIST_TAG, *[match_tag(match_id) for match_id in match_ids])
+
+
+def matches_version():
+    """Версия таблицы матчей для ETag списков"""
+    return TableVersion.current(MATCHES_TABLE)
+
+
+def calendar_month(year, month):
+    return f'{year:04d}-{month:02d}'
+
+
+def touch_calendar(*match_dates):
+    """
+    Отметка изменения месяцев календаря, в которые матчи на эти даты (UTC) попадают
+    хотя бы в одном часовом поясе. Вызывается в транзакции записи при создании и удалении
+    матча или изменении его команд и даты; счет и статус в календаре не отображаются.
+    """
+    months = {
+        calendar_month(moment.year, moment.month)
+        for value in match_dates if value is not None
+        for moment in (value - _MAX_UTC_OFFSET, value + _MAX_UTC_OFFSET)
+    }
+    # Порядок имен одинаков во всех транзакциях — блокировки строк берутся без взаимоблокировок
+    for month in sorted(months):
+        TableVersion.bump(f'{CALENDAR_TABLE}:{month}')
+
+
+def calendar_versions(months):
+    """
+    Версии месяцев календаря одним запросом: ((месяц, версия), ...) и время последнего изменения.
+    Месяц входит в значение: у разных месяцев без изменений версии одинаковые (0).
+    """
+    names = {f'{CALENDAR_TABLE}:{month}': month for month in months}
+    rows = TableVersion.query.with_entities(
+        TableVersion.name, TableVersion.version, TableVersion.updated_at
+    ).filter(TableVersion.name.in_(names)).all()
+    versions = {names[name]: version for name, version, _ in rows}
+    changed = [updated_at for _, _, updated_at in rows if updated_at]
+    return tuple((month, versions.get(month, 0)) for month in months), max(changed, default=None)
@@ -0,0 +1,250 @@
+"""
+Логирование приложения: структурированные записи с request_id, выборка и
+ограничение частоты по логгерам, запись в файл/stderr фоновым потоком.
+
+Поток запроса только отбирает запись фильтрами, дополняет ее request_id и кладет
+в очередь (LOG_ASYNC); форматирование в JSON и запись выполняет QueueListener.
+При переполнении очереди запись отбрасывается, а не блокирует запрос.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import current_app, g, has_request_context, request
+
+# Заголовок с идентификатором запроса: принимается от прокси и возвращается клиенту
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# Логгер записей о запросах (LOG_REQUESTS)
+access_logger = logging.getLogger('access')
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+
+# Стандартные атрибуты LogRecord; остальные — поля, переданные через extra
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+# Обработчик и слушатель, установленные в корневой логгер этим процессом
+_installed = {}
+
+
+class LogStats:
+    """Счетчики записей: поставленные в очередь и отброшенные по причинам"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {'queued': 0, 'sampled_out': 0, 'rate_limited': 0, 'queue_full': 0}
+
+    def add(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+def _limit_lookup(limits):
+    """Значение для логгера: собственное или ближайшего родителя (routes -> routes.predictions)"""
+    resolved = {}
+
+    def lookup(name):
+        if name not in resolved:
+            parts = name.split('.')
+            resolved[name] = next(
+                (limits['.'.join(parts[:i])] for i in range(len(parts), 0, -1) if '.'.join(parts[:i]) in limits),
+                None
+            )
+        return resolved[name]
+
+    return lookup
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Выборка и ограничение частоты по логгерам. Записи ниже WARNING сохраняются с долей
+    sampling[логгер]; rate_limits[логгер] — не больше N записей в секунду любого уровня.
+    """
+
+    def __init__(self, sampling, rate_limits, stats):
+        super().__init__()
+        self._sampling = _limit_lookup(sampling)
+        self._rate = _limit_lookup(rate_limits)
+        self._buckets = {}  # логгер -> [доступные записи, время последнего пополнения]
+        self._lock = threading.Lock()
+        self._stats = stats
+
+    def filter(self, record):
+        rate = self._sampling(record.name)
+        if rate is not None and record.levelno < logging.WARNING and random.random() >= rate:
+            self._stats.add('sampled_out')
+            return False
+
+        limit = self._rate(record.name)
+        if limit is not None and not self._take(record.name, limit):
+            self._stats.add('rate_limited')
+            return False
+        return True
+
+    def _take(self, name, limit):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(name, [limit, now])
+            bucket[0] = min(limit, bucket[0] + (now - bucket[1]) * limit)
+            bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+
+class RequestContextFilter(logging.Filter):
+    """Идентификатор текущего запроса в записи (выполняется в потоке запроса)"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Запись в одну строку JSON: время, уровень, логгер, сообщение, request_id и поля extra"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'pid': record.process,
+        }
+        data.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Постановка записи в очередь без ожидания: при переполнении запись отбрасывается.
+    В потоке запроса сообщение только подставляется в шаблон — форматирование в
+    JSON и запись выполняет слушатель.
+    """
+
+    def __init__(self, log_queue, stats):
+        super().__init__(log_queue)
+        self._stats = stats
+
+    def prepare(self, record):
+        # Аргументы подставляются сразу: объекты могут измениться до записи слушателем
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            self._stats.add('queued')
+        except queue.Full:
+            self._stats.add('queue_full')
+
+
+def _output_handler(config):
+    handler = logging.FileHandler(config['LOG_FILE'], encoding='utf-8') if config['LOG_FILE'] \
+        else logging.StreamHandler(sys.stderr)
+    if config['LOG_FORMAT'] == 'json':
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+def _uninstall():
+    root = logging.getLogger()
+    if 'handler' in _installed:
+        root.removeHandler(_installed.pop('handler'))
+    if 'listener' in _installed:
+        _installed.pop('listener').stop()
+    if 'output' in _installed:
+        _installed.pop('output').close()
+
+
+def _start_request():
+    request_id = request.headers.get(REQUEST_ID_HEADER, '')
+    g.request_id = request_id if 0 < len(request_id) <= 128 and request_id.isprintable() else uuid.uuid4().hex
+    g.log_request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    if 'request_id' not in g:
+        return response
+    response.headers[REQUEST_ID_HEADER] = g.request_id
+    if current_app.config['LOG_REQUESTS']:
+        access_logger.info(
+            '%s %s %s', request.method, request.path, response.status_code,
+            extra={'method': request.method, 'path': request.path, 'status': response.status_code,
+                   'duration_ms': round((time.perf_counter() - g.log_request_started) * 1000, 3)}
+        )
+    return response
+
+
+def configure_logging(config, stats):
+    """
+    Установка обработчика корневого логгера по конфигурации (LOG_*).
+    Повторный вызов в том же процессе (несколько приложений в тестах) заменяет прежний обработчик.
+    """
+    _uninstall()
+    output = _output_handler(config)
+    if config['LOG_ASYNC']:
+        handler = NonBlockingQueueHandler(queue.Queue(config['LOG_QUEUE_SIZE']), stats)
+        listener = QueueListener(handler.queue, output, respect_handler_level=True)
+        listener.start()
+        _installed['listener'] = listener
+    else:
+        handler = output
+    handler.addFilter(SamplingFilter(config['LOG_SAMPLING'], config['LOG_RATE_LIMITS'], stats))
+    handler.addFilter(RequestContextFilter())
+    _installed.update(handler=handler, output=output)
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(config['LOG_LEVEL'])
+
+
+def init_logging(app):
+    """Настройка логирования по конфигурации приложения и request_id для запросов"""
+    app.extensions['log_stats'] = LogStats()
+    configure_logging(app.config, app.extensions['log_stats'])
+
+    # Записи app.logger идут через корневой обработчик, без обработчика Flask по умолчанию
+    from flask.logging import default_handler
+    app.logger.removeHandler(default_handler)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+def flush_logs():
+    """Ожидание записи всех записей из очереди (слушатель останавливается и запускается снова)"""
+    listener = _installed.get('listener')
+    if listener is not None:
+        listener.stop()
+        listener.start()
+
+
+atexit.register(_uninstall)
@@ -0,0 +1,219 @@
+import logging
+import os
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм: длительность запроса (секунды) и число SQL-запросов на запрос
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Кумулятивная гистограмма в формате Prometheus (без собственной блокировки)"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(**labels):
+    """
+    Метки образца. Каждый образец помечен process_id: под gunicorn сбор попадает на
+    любой воркер, и без метки счетчики разных процессов слились бы в один ряд.
+    """
+    labels = dict(process_id=os.getpid(), **labels)
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return ','.join(f'{name}="{value}"' for name, value in escaped)
+
+
+class RequestMetrics:
+    """
+    Метрики HTTP-запросов процесса: гистограммы длительности по эндпоинту,
+    методу и статусу, число SQL-запросов и время БД по эндпоинту.
+    В режиме нескольких воркеров каждый процесс отдает свои значения с меткой process_id.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {}  # (endpoint, method, status) -> Histogram
+        self._statements = {}  # endpoint -> Histogram числа SQL-запросов на запрос
+        self._db_seconds = {}  # endpoint -> суммарное время SQL
+
+    def observe(self, endpoint, method, status, seconds, statements, db_seconds):
+        with self._lock:
+            key = (endpoint, method, status)
+            if key not in self._latency:
+                self._latency[key] = Histogram(LATENCY_BUCKETS)
+            self._latency[key].observe(seconds)
+
+            if endpoint not in self._statements:
+                self._statements[endpoint] = Histogram(STATEMENT_BUCKETS)
+            self._statements[endpoint].observe(statements)
+            self._db_seconds[endpoint] = self._db_seconds.get(endpoint, 0.0) + db_seconds
+
+    def render(self):
+        """Строки метрик в текстовом формате Prometheus"""
+        with self._lock:
+            latency = sorted(self._latency.items())
+            statements = sorted(self._statements.items())
+            db_seconds = sorted(self._db_seconds.items())
+
+        lines = [
+            '# HELP http_request_duration_seconds Длительность обработки запроса',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (endpoint, method, status), histogram in latency:
+            lines += _histogram_lines('http_request_duration_seconds', histogram,
+                                      endpoint=endpoint, method=method, status=status)
+
+        lines += [
+            '# HELP http_request_sql_statements SQL-запросов на один HTTP-запрос',
+            '# TYPE http_request_sql_statements histogram',
+        ]
+        for endpoint, histogram in statements:
+            lines += _histogram_lines('http_request_sql_statements', histogram, endpoint=endpoint)
+
+        lines += [
+            '# HELP http_request_sql_seconds_total Суммарное время SQL-запросов',
+            '# TYPE http_request_sql_seconds_total counter',
+        ]
+        lines += [f'http_request_sql_seconds_total{{{_labels(endpoint=endpoint)}}} {value:.6f}'
+                  for endpoint, value in db_seconds]
+        return lines
+
+
+def _histogram_lines(name, histogram, **labels):
+    label_text = _labels(**labels)
+    lines = [
+        f'{name}_bucket{{{label_text},le="{bound}"}} {count}'
+        for bound, count in zip(histogram.buckets, histogram.counts)
+    ]
+    lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {histogram.count}')
+    lines.append(f'{name}_sum{{{label_text}}} {histogram.sum:.6f}')
+    lines.append(f'{name}_count{{{label_text}}} {histogram.count}')
+    return lines
+
+
+def _gauge_lines(name, help_text, value, metric_type='gauge'):
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}', f'{name}{{{_labels()}}} {value}']
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_statements' in g:
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_stack = conn.info.get('metrics_started')
+    if has_request_context() and 'sql_statements' in g and started_stack:
+        started = started_stack.pop()
+        g.sql_statements += 1
+        g.sql_seconds += time.perf_counter() - started
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.sql_statements = 0
+    g.sql_seconds = 0.0
+
+
+def _finish_request(response):
+    if 'request_started' not in g:
+        return response
+
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    statements = g.sql_statements
+    current_app.extensions['request_metrics'].observe(
+        endpoint, request.method, response.status_code,
+        time.perf_counter() - g.request_started, statements, g.sql_seconds
+    )
+
+    threshold = current_app.config['METRICS_QUERY_WARNING_THRESHOLD']
+    if threshold and statements > threshold:
+        logger.warning('%s %s выполнил %d SQL-запросов (порог %d) — возможен N+1',
+                       request.method, request.path, statements, threshold)
+    return response
+
+
+def init_metrics(app):
+    """Подключение сбора метрик запросов и SQL к приложению"""
+    app.extensions['request_metrics'] = RequestMetrics()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def render_metrics():
+    """Все метрики процесса в текстовом формате Prometheus"""
+    from services import job_service
+    from services.auth_service import get_password_hasher
+    from utils.http_cache import response_cache
+    from utils.serializers import fragment_cache
+
+    lines = current_app.extensions['request_metrics'].render()
+
+    cache = response_cache()
+    lines += _gauge_lines('response_cache_hits_total', 'Попадания в кэш ответов', cache.hits, 'counter')
+    lines += _gauge_lines('response_cache_misses_total', 'Промахи кэша ответов', cache.misses, 'counter')
+
+    fragments = fragment_cache()
+    lines += _gauge_lines('match_fragment_cache_hits_total', 'Попадания в кэш JSON-фрагментов матчей',
+                          fragments.hits, 'counter')
+    lines += _gauge_lines('match_fragment_cache_misses_total', 'Промахи кэша JSON-фрагментов матчей',
+                          fragments.misses, 'counter')
+
+    hasher = get_password_hasher().metrics()
+    for name in ('submitted', 'completed', 'rejected', 'expired'):
+        lines += _gauge_lines(f'password_hash_{name}_total', f'Операции хеширования: {name}',
+                              hasher[name], 'counter')
+    lines += _gauge_lines('password_hash_in_flight', 'Операции хеширования в работе', hasher['in_flight'])
+    lines += _gauge_lines('password_hash_queue_seconds_total', 'Суммарное ожидание в очереди хеширования',
+                          f"{hasher['queue_seconds_total']:.6f}", 'counter')
+
+    log_counts = current_app.extensions['log_stats'].snapshot()
+    lines += ['# HELP log_records_total Записи лога: поставленные в очередь и отброшенные',
+              '# TYPE log_records_total counter']
+    lines += [f'log_records_total{{{_labels(outcome=outcome)}}} {count}' for outcome, count in log_counts.items()]
+
+    router = current_app.extensions.get('db_router')
+    if router is not None:
+        lines += _gauge_lines('db_replica_reads_total', 'Чтения GET-запросов с реплик', router.stats['replica_reads'], 'counter')
+        lines += _gauge_lines('db_primary_fallback_reads_total', 'Чтения из основной БД при недоступных репликах',
+                              router.stats['primary_reads'], 'counter')
+        lines += _gauge_lines('db_replica_failovers_total', 'Реплики, исключенные из ротации после ошибки',
+                              router.stats['failovers'], 'counter')
+
+    jobs = job_service.metrics()
+    lines += ['# HELP jobs Фоновые задачи по статусам', '# TYPE jobs gauge']
+    lines += [f'jobs{{{_labels(status=status)}}} {jobs[status]}'
+              for status in ('queued', 'running', 'done', 'failed')]
+    lines += _gauge_lines('jobs_backlog', 'Готовые к выполнению задачи', jobs['backlog'])
+    lines += _gauge_lines('jobs_oldest_queued_seconds', 'Возраст самой старой ожидающей задачи',
+                          f"{jobs['oldest_queued_seconds']:.3f}")
+    lines += _gauge_lines('jobs_avg_wait_seconds', 'Среднее ожидание задачи до старта за последний час',
+                          f"{jobs['avg_wait_seconds_1h']:.3f}")
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+# Заголовок ответа с курсором следующей страницы (тело ответа остается массивом)
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(*values):
+    """Кодирование значений ключа последней строки страницы в непрозрачный курсор"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    """
+    Декодирование курсора в значения ключа.
+    types — ожидаемые типы значений (datetime или int); при ошибке — ValueError.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Некорректный курсор')
+
+    if not isinstance(payload, list) or len(payload) != len(types):
+        raise ValueError('Некорректный курсор')
+
+    values = []
+    for value, expected in zip(payload, types):
+        if expected is datetime:
+            if not isinstance(value, str):
+                raise ValueError('Некорректный курсор')
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, expected) or isinstance(value, bool):
+            raise ValueError('Некорректный курсор')
+        values.append(value)
+
+    return values
+
+
+def keyset_filter(columns, values, descending=False):
+    """
+    Условие «строки после курсора» для сортировки по набору столбцов.
+    Для (a, b) по убыванию: a < va OR (a = va AND b < vb).
+    """
+    clauses = []
+    for index, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [columns[i] == values[i] for i in range(index)]
+        after = column < value if descending else column > value
+        clauses.append(and_(*equal_prefix, after))
+
+    return or_(*clauses)
+
+
+def paginate(query, columns, cursor_values, limit, descending=False):
+    """
+    Keyset-пагинация запроса по столбцам columns.
+    Возвращает строки страницы и курсор следующей страницы (None, если страница последняя).
+    Ключевые столбцы должны присутствовать в строках результата под теми же именами.
+    """
+    if cursor_values is not None:
+        query = query.filter(keyset_filter(columns, cursor_values, descending))
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(*[getattr(last, column.key) for column in columns])
+
+    return rows, next_cursor
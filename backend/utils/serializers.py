@@ -0,0 +1,138 @@
+"""
+Быстрая сериализация матчей для списков и карточки матча.
+
+Вместо ORM-объектов и Match.to_dict строки читаются кортежами столбцов
+(MATCH_COLUMNS), признаки is_past/is_upcoming считаются от одного «сейчас» на
+запрос, а закодированный JSON матча кэшируется по id и проверяется по updated_at.
+Готовые фрагменты склеиваются в ответ провайдером FragmentJSONProvider без
+повторной сериализации. Результат совпадает с Match.to_dict.
+"""
+import json
+from datetime import datetime
+from flask import current_app, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
+
+from models.match import Match
+from utils.cache import LRUCache
+
+# Столбцы матча в порядке полей кортежа строки
+MATCH_COLUMNS = (
+    Match.id, Match.home_team, Match.away_team, Match.home_score, Match.away_score,
+    Match.match_date, Match.stadium, Match.stage, Match.status, Match.created_at, Match.updated_at
+)
+
+
+class JSONFragment(str):
+    """Уже закодированный JSON: провайдер отдает его в ответ как есть"""
+    __slots__ = ()
+
+
+class FragmentJSONProvider(DefaultJSONProvider):
+    """JSON-провайдер Flask, который пропускает JSONFragment без повторного кодирования"""
+
+    def fragment_encoder(self):
+        """
+        Кодировщик фрагментов с настройками провайдера. json.dumps создает новый
+        кодировщик на каждый вызов — для построчного кодирования это заметная доля времени.
+        """
+        return json.JSONEncoder(default=self.default, ensure_ascii=self.ensure_ascii,
+                                sort_keys=self.sort_keys, separators=(',', ':'))
+
+    def dumps(self, obj, **kwargs):
+        if isinstance(obj, JSONFragment):
+            return str(obj)
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if len(args) == 1 and not kwargs and isinstance(args[0], JSONFragment):
+            return self._app.response_class(f'{args[0]}\n', mimetype=self.mimetype)
+        return super().response(*args, **kwargs)
+
+
+def init_serializers(app):
+    """Подключение провайдера JSON-фрагментов и кэша фрагментов матчей к приложению"""
+    app.json = FragmentJSONProvider(app)
+    app.extensions['match_fragment_encoder'] = app.json.fragment_encoder()
+    app.extensions['match_fragments'] = LRUCache(app.config['MATCH_FRAGMENT_CACHE_SIZE'])
+
+
+def fragment_cache():
+    return current_app.extensions['match_fragments']
+
+
+def request_now():
+    """Одно значение «сейчас» на запрос для признаков всех матчей ответа"""
+    if not has_request_context():
+        return datetime.utcnow()
+    if 'now' not in g:
+        g.now = datetime.utcnow()
+    return g.now
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def match_flags(match_date, status, now):
+    """Признаки is_past и is_upcoming (те же правила, что у свойств Match)"""
+    return (
+        match_date < now or status == 'finished',
+        match_date > now and status in ('scheduled', 'postponed')
+    )
+
+
+def serialize_match_row(row, now):
+    """Словарь матча из кортежа MATCH_COLUMNS (совпадает с Match.to_dict)"""
+    (match_id, home_team, away_team, home_score, away_score, match_date,
+     stadium, stage, status, created_at, updated_at) = row
+    is_past, is_upcoming = match_flags(match_date, status, now)
+    return {
+        'id': match_id,
+        'home_team': home_team,
+        'away_team': away_team,
+        'home_score': home_score,
+        'away_score': away_score,
+        'match_date': _isoformat(match_date),
+        'stadium': stadium,
+        'stage': stage,
+        'status': status,
+        'is_past': is_past,
+        'is_upcoming': is_upcoming,
+        'created_at': _isoformat(created_at),
+        'updated_at': _isoformat(updated_at)
+    }
+
+
+def _fragments(rows, now):
+    """
+    Закодированный JSON матчей. Запись кэша действительна, пока не изменились
+    updated_at матча и его признаки is_past/is_upcoming.
+    """
+    cache = fragment_cache()
+    encode = current_app.extensions['match_fragment_encoder'].encode
+    for row in rows:
+        match_id, updated_at = row[0], row[10]
+        flags = match_flags(row[5], row[8], now)
+        entry = cache.get(match_id)
+        if entry is not None and entry[0] == updated_at and entry[1] == flags:
+            yield entry[2]
+            continue
+
+        text = encode(serialize_match_row(row, now))
+        cache.set(match_id, (updated_at, flags, text))
+        yield text
+
+
+def iter_match_fragments(rows, now=None):
+    """Закодированный JSON каждого матча из строк MATCH_COLUMNS (для потоковой выдачи)"""
+    return _fragments(rows, now or request_now())
+
+
+def encode_match(row):
+    """JSON-ответ с одним матчем"""
+    return JSONFragment(next(_fragments([row], request_now())))
+
+
+def encode_matches(rows):
+    """JSON-массив матчей из кортежей MATCH_COLUMNS"""
+    return JSONFragment('[' + ','.join(_fragments(rows, request_now())) + ']')
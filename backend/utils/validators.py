@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+
+def parse_int(value, default, min_value=None, max_value=None):
+    """
+    Разбор целочисленного параметра запроса.
+    Пустое значение заменяется значением по умолчанию, результат
+    ограничивается диапазоном [min_value, max_value].
+    Некорректное значение приводит к ValueError.
+    """
+    if value is None or value == '':
+        return default
+
+    number = int(value)
+
+    if min_value is not None and number < min_value:
+        number = min_value
+    if max_value is not None and number > max_value:
+        number = max_value
+
+    return number
+
+
+def parse_iso_datetime(value):
+    """
+    Разбор даты в формате ISO 8601 (допускается суффикс Z).
+    Дата с часовым поясом приводится к наивному UTC, как хранятся даты матчей.
+    Некорректное значение приводит к ValueError.
+    """
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed